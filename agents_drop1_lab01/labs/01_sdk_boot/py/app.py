@@ -1,31 +1,191 @@
 #!/usr/bin/env python3
-import os, json, time, pathlib, sys
+import os, json, time, pathlib, sys, asyncio, contextlib
+
+HERE = pathlib.Path(__file__).resolve().parent
+if str(HERE) not in sys.path:
+    sys.path.insert(0, str(HERE))
+REPO_ROOT = HERE.parents[3]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.append(str(REPO_ROOT))  # shared/
+from llm import (BACKENDS, CachedProvider, HedgedProvider, Limits, ResponseCache, Scheduler, configured_backends,
+                 fan_out, make_provider)
+from shared.profiling import session, span
 
 ROOT = pathlib.Path(__file__).resolve().parents[2]
-OUT = ROOT / "labs" / "01_sdk_boot" / "outputs"
-OUT.mkdir(parents=True, exist_ok=True)
+OUT = ROOT / "01_sdk_boot" / "outputs"
 
 backend = os.getenv("BACKEND","openai")
 offline = os.getenv("OFFLINE","1") == "1"
+MODEL = os.getenv("MODEL") or None
+TEMPERATURE = float(os.getenv("TEMPERATURE", "0"))
+PROMPT = os.getenv("PROMPT", "diga olá")
+
+# Streaming simulado (OFFLINE): atraso até o 1º token e entre tokens, em ms.
+# OFFLINE_DELAY_MS aceita uma lista ("20,35,10"), usada em ciclo.
+FIRST_DELAY_MS = float(os.getenv("OFFLINE_FIRST_DELAY_MS", "80"))
+DELAYS_MS = [float(x) for x in os.getenv("OFFLINE_DELAY_MS", "15").split(",") if x.strip()] or [0.0]
+# no máximo STREAM_QUEUE deltas esperando escrita; com a fila cheia o provider
+# fica parado no put (backpressure) em vez de acumular a resposta em memória
+QUEUE_SIZE = int(os.getenv("STREAM_QUEUE", "8"))
+
+# cache de respostas: chave = hash(backend, modelo, mensagens, temperatura),
+# LRU com CACHE_MAX_ENTRIES entradas e validade de CACHE_TTL segundos.
+# REPEAT rodadas em sequência, cada uma com PARALLEL pedidos idênticos ao mesmo
+# tempo (coalescidos numa só chamada ao provider).
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "256"))
+CACHE_TTL = float(os.getenv("CACHE_TTL", "300"))
+REPEAT = int(os.getenv("REPEAT", "1"))
+PARALLEL = int(os.getenv("PARALLEL", "1"))
+
+# MODE=single (padrão) usa só BACKEND; MODE=hedge manda para BACKEND e, se o
+# 1º token não chegar no p95 recente (HEDGE_DELAY_MS até ter amostras),
+# também para o próximo de HEDGE_BACKENDS — vence quem responder primeiro;
+# MODE=fanout manda para todos e grava a comparação das respostas.
+MODE = os.getenv("MODE", "single")
+HEDGE_BACKENDS = [b.strip() for b in os.getenv("HEDGE_BACKENDS", "").split(",") if b.strip()]
+HEDGE_DELAY_MS = float(os.getenv("HEDGE_DELAY_MS", "250"))
+
+# limites do lado do cliente por backend: <BACKEND>_RPM pedidos e <BACKEND>_TPM
+# tokens por minuto (ex.: OPENAI_RPM=500). Com algum definido, as chamadas
+# passam por uma fila com PRIORITY=interactive (padrão) ou batch (correção em
+# lote); um 429 pausa o backend pelo Retry-After e reduz o ritmo.
+PRIORITY = os.getenv("PRIORITY", "interactive")
+
+
+def _limit(name):
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
+LIMITS = {b: Limits(_limit(f"{b.upper()}_RPM"), _limit(f"{b.upper()}_TPM")) for b in BACKENDS}
+LIMITS = {b: lim for b, lim in LIMITS.items() if lim.rpm or lim.tpm}
+
+SCHEMA = {"title":"demo","fields":["message","tokens"]}
+
+
+async def _produce(deltas, queue):
+    try:
+        async for delta in deltas:
+            await queue.put(delta)  # espera enquanto a fila está cheia
+    finally:
+        await queue.put(None)
+
+
+async def stream_to_jsonl(provider, messages, out, queue_size=QUEUE_SIZE, req=0):
+    """Grava start/delta.../end/result de um pedido à medida que os deltas chegam.
+
+    ``out`` é um caminho (reescrito) ou um arquivo já aberto; toda linha leva
+    ``req`` e é descarregada (flush) na hora, então outro processo pode
+    acompanhar o arquivo. O chunk ``end`` traz as métricas do stream — tempo
+    até o 1º token, tokens/s depois dele e latência total — e, com cache,
+    o resultado da consulta e as estatísticas acumuladas.
+    """
+    queue = asyncio.Queue(max(1, queue_size))
+    meta = {}
+    opened = open(out, "w", encoding="utf-8") if isinstance(out, (str, os.PathLike)) else contextlib.nullcontext(out)
+    with opened as f, span("request", req=req, backend=provider.name) as s:
+        def emit(chunk):
+            f.write(json.dumps({**chunk, "req": req}, ensure_ascii=False) + "\n")
+            f.flush()
+
+        t0 = time.perf_counter()
+        emit({"type":"start","backend": provider.name, "model": provider.model, "ts": time.time()})
+        deltas = provider.stream(messages, temperature=TEMPERATURE, meta=meta)
+        producer = asyncio.create_task(_produce(deltas, queue))
+        first = last = None
+        parts = []
+        while (delta := await queue.get()) is not None:
+            last = time.perf_counter()
+            if first is None:
+                first = last
+            parts.append(delta)
+            emit({"type":"delta","text": delta, "t_ms": round((last - t0) * 1000, 3)})
+        await producer  # repassa erros do provider
+        total = time.perf_counter() - t0
+        n = len(parts)
+        metrics = {
+            "tokens": n,
+            "ttft_ms": round((first - t0) * 1000, 3) if n else None,
+            # ritmo de geração depois do 1º token (o TTFT entra só na latência total)
+            "tokens_per_s": round((n - 1) / (last - first), 2) if n > 1 and last > first else None,
+            "total_ms": round(total * 1000, 3),
+        }
+        s.set(**metrics)
+        end = {"type":"end","ok": True, "schema": SCHEMA, "metrics": metrics}
+        if isinstance(provider, CachedProvider):
+            end["cache"] = {"status": meta.get("cache"), **provider.cache.stats()}
+        if "hedge" in meta:
+            end["hedge"] = meta["hedge"]
+        if "sched" in meta:
+            end["sched"] = meta["sched"]
+        emit(end)
+        result = {
+            "message": f"Hello from {provider.name} (offline={offline})",
+            "text": "".join(parts),
+            "tokens": n,
+            "file_ingest": {"name":"demo.txt","bytes": 42}
+        }
+        emit({"type":"result","data":result})
+    return metrics
+
+
+async def compare_to_jsonl(providers, messages, f, req=0):
+    """MODE=fanout: uma linha ``compare`` com as respostas de todos os backends."""
+    with span("compare", req=req, backends=len(providers)):
+        comparison = await fan_out(providers, messages, temperature=TEMPERATURE)
+    f.write(json.dumps({"type":"compare", **comparison, "req": req}, ensure_ascii=False) + "\n")
+    f.flush()
+    return comparison
+
+
+def backends_for_mode():
+    """BACKEND primeiro, depois HEDGE_BACKENDS (ou os demais configurados)."""
+    others = HEDGE_BACKENDS or configured_backends(offline)
+    return [backend] + [b for b in others if b != backend] if MODE != "single" else [backend]
+
+
+def build_provider(backends, scheduler=None):
+    # OFFLINE=1: cada provider é o substituto local determinístico, sem rede
+    providers = [make_provider(b, offline, MODEL if b == backend else None,
+                               first_delay_ms=FIRST_DELAY_MS, delays_ms=DELAYS_MS) for b in backends]
+    if scheduler is not None:
+        providers = [scheduler.bind(p, PRIORITY) for p in providers]
+    if MODE == "fanout":
+        return providers
+    upstream = HedgedProvider(providers, initial_delay_ms=HEDGE_DELAY_MS) if MODE == "hedge" else providers[0]
+    return CachedProvider(upstream, ResponseCache(CACHE_MAX_ENTRIES, CACHE_TTL))
+
+
+async def run(provider, out_path, scheduler=None):
+    messages = [{"role":"user","content": PROMPT}]
+    with open(out_path, "w", encoding="utf-8") as f:
+        req = 0
+        for n in range(max(1, REPEAT)):
+            batch = range(req, req + max(1, PARALLEL))
+            with span("round", round=n, parallel=len(batch)):
+                if MODE == "fanout":
+                    await asyncio.gather(*(compare_to_jsonl(provider, messages, f, req=i) for i in batch))
+                else:
+                    await asyncio.gather(*(stream_to_jsonl(provider, messages, f, req=i) for i in batch))
+            req = batch.stop
+        if scheduler is not None:
+            # fila e espera por backend ao fim da execução
+            f.write(json.dumps({"type":"scheduler", "backends": scheduler.stats()}, ensure_ascii=False) + "\n")
+
+
+def main():
+    if MODE not in ("single", "hedge", "fanout"):
+        sys.exit(f"MODE inválido: {MODE!r} (use single, hedge ou fanout)")
+    OUT.mkdir(parents=True, exist_ok=True)
+    out_path = OUT / "output.jsonl"
+    scheduler = Scheduler(LIMITS) if LIMITS else None
+    # AGENTS_PROFILE=spans|cprofile grava o perfil da execução em outputs/profile/
+    with session("app", OUT):
+        with span("build_provider", mode=MODE):
+            provider = build_provider(backends_for_mode(), scheduler)
+        asyncio.run(run(provider, out_path, scheduler))
+    print(str(out_path))
+
 
-# Simulated streaming chunks
-chunks = [
-    {"type":"start","backend": backend, "ts": time.time()},
-    {"type":"delta","text":"Olá, "},
-    {"type":"delta","text":"mundo!"},
-    {"type":"end","ok": True, "schema":{"title":"demo","fields":["message","tokens"]}}
-]
-
-# Simulated structured output
-result = {
-    "message": f"Hello from {backend} (offline={offline})",
-    "tokens": 12,
-    "file_ingest": {"name":"demo.txt","bytes": 42}
-}
-
-with open(OUT / "output.jsonl","w", encoding="utf-8") as f:
-    for c in chunks:
-        f.write(json.dumps(c, ensure_ascii=False) + "\n")
-    f.write(json.dumps({"type":"result","data":result}, ensure_ascii=False) + "\n")
-
-print(str(OUT / "output.jsonl"))
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,12 @@
+"""Client layer behind ``BACKEND``: providers, response cache, hedging and rate limits."""
+
+from .cache import CachedProvider, ResponseCache, cache_key
+from .hedge import HedgedProvider, LatencyTracker, fan_out
+from .providers import (BACKENDS, Completion, LocalProvider, Provider, ProviderError,
+                        configured_backends, make_provider)
+from .ratelimit import Limits, ScheduledProvider, Scheduler, TokenBucket
+from .remote import HTTPProvider
+
+__all__ = ["BACKENDS", "CachedProvider", "Completion", "HTTPProvider", "HedgedProvider", "LatencyTracker",
+           "Limits", "LocalProvider", "Provider", "ProviderError", "ResponseCache", "ScheduledProvider",
+           "Scheduler", "TokenBucket", "cache_key", "configured_backends", "fan_out", "make_provider"]
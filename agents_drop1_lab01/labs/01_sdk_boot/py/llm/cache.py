@@ -0,0 +1,152 @@
+"""Response cache with in-flight coalescing for providers.
+
+Identical prompts are common (same system prompt, same question, many
+agents).  :class:`CachedProvider` wraps any :class:`~llm.providers.Provider`:
+
+* the key is a SHA-256 of ``(backend, model, messages, temperature)`` in a
+  canonical JSON form, so equal requests hash equal regardless of dict order;
+* finished answers live in :class:`ResponseCache`, an LRU bounded by entry
+  count with a per-entry TTL; a hit replays the cached deltas immediately;
+* while a request is in flight, identical requests wait for it instead of
+  calling upstream again (coalescing), then replay its deltas; if the
+  leading call fails, the waiters get the same error.
+
+Counters (hits, misses, coalesced, evictions, expirations) and the upstream
+latency avoided by hits are available from :meth:`ResponseCache.stats`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Sequence
+
+from .providers import Completion, Message, Provider, ProviderError
+
+
+def cache_key(backend: str, model: str, messages: Sequence[Message], temperature: float) -> str:
+    payload = json.dumps([backend, model, list(messages), float(temperature)],
+                         sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """LRU of :class:`Completion` objects with a time-to-live."""
+
+    def __init__(self, max_entries: int = 256, ttl: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.inflight: Dict[str, asyncio.Future] = {}
+        self.hits = self.misses = self.coalesced = self.evictions = self.expired = 0
+        self.saved_ms = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Completion]:
+        """The fresh entry for ``key`` (counted as a hit), else ``None``."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, completion = entry
+        if self.clock() >= expires:
+            del self._entries[key]
+            self.expired += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        self.saved_ms += completion.latency_ms
+        return completion
+
+    def put(self, key: str, completion: Completion) -> None:
+        self._entries[key] = (self.clock() + self.ttl, completion)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "lookups": lookups,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "upstream_calls_saved": self.hits + self.coalesced,
+            "saved_ms": round(self.saved_ms, 3),
+            "evictions": self.evictions,
+            "expired": self.expired,
+        }
+
+
+class CachedProvider(Provider):
+    """``provider`` behind a :class:`ResponseCache` (``meta["cache"]`` = hit/miss/coalesced)."""
+
+    def __init__(self, provider: Provider, cache: Optional[ResponseCache] = None):
+        self.provider = provider
+        self.name = provider.name
+        self.model = provider.model
+        self.cache = cache if cache is not None else ResponseCache()
+
+    async def stream(self, messages: Sequence[Message], *, model: Optional[str] = None,
+                     temperature: float = 0.0, meta: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        meta = {} if meta is None else meta
+        model = model or self.model
+        key = cache_key(self.name, model, messages, temperature)
+        cache = self.cache
+
+        cached = cache.get(key)
+        if cached is not None:
+            meta.update(cached.meta, cache="hit", saved_ms=round(cached.latency_ms, 3))
+            for delta in cached.deltas:
+                yield delta
+            return
+
+        waiting = cache.inflight.get(key)
+        if waiting is not None:
+            cache.coalesced += 1
+            meta["cache"] = "coalesced"
+            completion = await asyncio.shield(waiting)
+            meta.update(completion.meta, cache="coalesced")
+            for delta in completion.deltas:
+                yield delta
+            return
+
+        cache.misses += 1
+        meta["cache"] = "miss"
+        future = asyncio.get_running_loop().create_future()
+        cache.inflight[key] = future
+        deltas = []
+        upstream: Dict[str, Any] = {}
+        start = time.perf_counter()
+        try:
+            async for delta in self.provider.stream(messages, model=model, temperature=temperature, meta=upstream):
+                deltas.append(delta)
+                yield delta
+            completion = Completion(deltas, (time.perf_counter() - start) * 1000, self.name, model, upstream)
+            cache.put(key, completion)
+            future.set_result(completion)
+            meta.update(upstream, cache="miss")
+        except BaseException as exc:  # includes the consumer abandoning the stream
+            if not future.done():
+                error = exc if isinstance(exc, Exception) else ProviderError("chamada original interrompida")
+                future.set_exception(error)
+                future.exception()  # waiters re-raise it; nobody waiting is fine too
+            raise
+        finally:
+            if cache.inflight.get(key) is future:
+                del cache.inflight[key]
+
+
+__all__ = ["CachedProvider", "ResponseCache", "cache_key"]
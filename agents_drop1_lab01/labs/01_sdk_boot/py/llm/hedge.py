@@ -0,0 +1,215 @@
+"""Hedged and fan-out calls across several providers.
+
+Hedging (:class:`HedgedProvider`) trims tail latency: the request goes to the
+primary backend; if no token has arrived after the *hedge delay*, the same
+request also goes to the next backend.  The first attempt to produce a token
+wins and is streamed to the caller; the others are cancelled (for
+:class:`~llm.remote.HTTPProvider` that closes their sockets).  An attempt
+that fails does not win — the remaining ones keep racing and the next backend
+is started at once — so hedging also fails over.
+
+The hedge delay is the primary's recent p95 time-to-first-token
+(:class:`LatencyTracker`), clamped to ``[min_delay_ms, max_delay_ms]``; until
+there are ``min_samples`` observations ``initial_delay_ms`` is used.  At p95
+about one request in twenty is duplicated.
+
+Fan-out (:func:`fan_out`) is the explicit comparison mode: every backend gets
+the request, and the answers come back side by side with their latencies
+and how similar they are.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import difflib
+import time
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, List, Optional, Sequence
+
+from .providers import Message, Provider, ProviderError
+
+
+class LatencyTracker:
+    """Rolling window of time-to-first-token samples per backend."""
+
+    def __init__(self, window: int = 200):
+        self.window = window
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def add(self, backend: str, ms: float) -> None:
+        self._samples.setdefault(backend, deque(maxlen=self.window)).append(ms)
+
+    def count(self, backend: str) -> int:
+        return len(self._samples.get(backend, ()))
+
+    def quantile(self, backend: str, q: float) -> Optional[float]:
+        samples = sorted(self._samples.get(backend, ()))
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+    def p95(self, backend: str) -> Optional[float]:
+        return self.quantile(backend, 0.95)
+
+
+class _Attempt:
+    __slots__ = ("provider", "stream", "task", "started", "meta")
+
+    def __init__(self, provider: Provider, messages: Sequence[Message], model: Optional[str], temperature: float):
+        self.provider = provider
+        self.meta: Dict[str, Any] = {}
+        self.stream = provider.stream(messages, model=model, temperature=temperature, meta=self.meta).__aiter__()
+        self.started = time.perf_counter()
+        self.task = asyncio.ensure_future(self._first())
+
+    async def _first(self) -> Any:
+        try:
+            return await self.stream.__anext__()
+        except StopAsyncIteration:
+            return None  # stream vazio: também é uma resposta
+
+    async def cancel(self) -> None:
+        self.task.cancel()
+        try:
+            await self.task
+        except BaseException:
+            pass
+        try:
+            await self.stream.aclose()
+        except (AttributeError, RuntimeError):
+            pass
+
+
+class HedgedProvider(Provider):
+    """``providers[0]`` with ``providers[1:]`` as hedges, in order."""
+
+    def __init__(self, providers: Sequence[Provider], tracker: Optional[LatencyTracker] = None,
+                 initial_delay_ms: float = 250.0, min_delay_ms: float = 10.0,
+                 max_delay_ms: float = 5000.0, min_samples: int = 20):
+        if not providers:
+            raise ProviderError("HedgedProvider precisa de pelo menos um provider")
+        self.providers = list(providers)
+        self.name = self.providers[0].name
+        self.model = self.providers[0].model
+        self.tracker = tracker if tracker is not None else LatencyTracker()
+        self.initial_delay_ms = initial_delay_ms
+        self.min_delay_ms = min_delay_ms
+        self.max_delay_ms = max_delay_ms
+        self.min_samples = min_samples
+        self.hedged = self.wins = 0  # pedidos que dispararam hedge / que o hedge venceu
+
+    def hedge_delay_ms(self) -> float:
+        primary = self.providers[0].name
+        if self.tracker.count(primary) < self.min_samples:
+            return self.initial_delay_ms
+        return min(self.max_delay_ms, max(self.min_delay_ms, self.tracker.p95(primary)))
+
+    async def stream(self, messages: Sequence[Message], *, model: Optional[str] = None,
+                     temperature: float = 0.0, meta: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        # ``model`` só vale para o primário; os hedges usam o modelo de cada um
+        delay = self.hedge_delay_ms()
+        pending = list(self.providers)
+        attempts: List[_Attempt] = []
+        errors: List[BaseException] = []
+        cancelled: List[str] = []
+        winner: Optional[_Attempt] = None
+        first: Any = None
+
+        def launch() -> None:
+            provider = pending.pop(0)
+            attempts.append(_Attempt(provider, messages, model if provider is self.providers[0] else None,
+                                     temperature))
+
+        launch()
+        try:
+            while winner is None:
+                running = {a.task: a for a in attempts if not a.task.done()}
+                if not running:
+                    if not pending:
+                        raise errors[-1] if errors else ProviderError("nenhum provider respondeu")
+                    launch()
+                    continue
+                timeout = delay / 1000 if pending else None
+                done, _ = await asyncio.wait(running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:  # passou o atraso de hedge sem token: dispara o próximo
+                    launch()
+                    continue
+                for task in done:
+                    attempt = running[task]
+                    if task.exception() is not None:
+                        errors.append(task.exception())
+                        if pending:
+                            launch()  # falhou: o próximo entra já, sem esperar o atraso
+                        continue
+                    if winner is None:
+                        winner, first = attempt, task.result()
+        finally:
+            for attempt in attempts:
+                if attempt is not winner:
+                    if not attempt.task.done():
+                        cancelled.append(attempt.provider.name)
+                        # amostra censurada: o token levaria pelo menos isso; sem ela o
+                        # p95 do primário só veria as respostas rápidas
+                        self.tracker.add(attempt.provider.name, (time.perf_counter() - attempt.started) * 1000)
+                    await attempt.cancel()
+
+        ttft_ms = (time.perf_counter() - winner.started) * 1000
+        self.tracker.add(winner.provider.name, ttft_ms)
+        if len(attempts) > 1:
+            self.hedged += 1
+            self.wins += winner is not attempts[0]
+        if meta is not None:
+            meta.update(winner.meta)
+            meta["backend"] = winner.provider.name
+            meta["hedge"] = {
+                "delay_ms": round(delay, 3),
+                "attempts": [a.provider.name for a in attempts],
+                "winner": winner.provider.name,
+                "cancelled": cancelled,
+                "errors": [str(e) for e in errors],
+            }
+        if first is None:
+            return
+        try:
+            yield first
+            async for delta in winner.stream:
+                yield delta
+        finally:
+            await winner.stream.aclose()
+
+
+def similarity(a: str, b: str) -> float:
+    return round(difflib.SequenceMatcher(None, a, b).ratio(), 4)
+
+
+async def fan_out(providers: Sequence[Provider], messages: Sequence[Message], *,
+                  temperature: float = 0.0, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """Send ``messages`` to every provider at once and compare the answers.
+
+    Returns ``{"answers": [{"backend", "text", "latency_ms", "error"}, ...],
+    "agree": bool, "similarity": {"a|b": ratio}, "fastest": backend}``;
+    a failed or timed-out backend has ``text=None`` and its ``error``.
+    """
+    async def one(provider: Provider) -> Dict[str, Any]:
+        start = time.perf_counter()
+        try:
+            completion = await asyncio.wait_for(provider.complete(messages, temperature=temperature), timeout)
+            text, error = completion.text, None
+        except (ProviderError, asyncio.TimeoutError) as exc:
+            text, error = None, str(exc) or exc.__class__.__name__
+        return {"backend": provider.name, "text": text,
+                "latency_ms": round((time.perf_counter() - start) * 1000, 3), "error": error}
+
+    answers = await asyncio.gather(*(one(p) for p in providers))
+    ok = [a for a in answers if a["error"] is None]
+    pairs = {f"{a['backend']}|{b['backend']}": similarity(a["text"], b["text"])
+             for i, a in enumerate(ok) for b in ok[i + 1:]}
+    return {
+        "answers": list(answers),
+        "agree": len({a["text"] for a in ok}) == 1 if ok else False,
+        "similarity": pairs,
+        "fastest": min(ok, key=lambda a: a["latency_ms"])["backend"] if ok else None,
+    }
+
+
+__all__ = ["HedgedProvider", "LatencyTracker", "fan_out", "similarity"]
@@ -0,0 +1,191 @@
+"""Local mock of an OpenAI-compatible provider, with injected latency.
+
+For exercising the client layer (hedging, fan-out, timeouts) against real
+sockets without leaving the machine::
+
+    with MockProvider("openai", latency_ms=[40, 40, 400]) as mock:
+        provider = HTTPProvider("openai", mock.url)
+
+or from the shell (then point ``OPENAI_BASE_URL`` at it)::
+
+    python -m llm.mock --name openai --port 9001 --latency 40,40,400
+
+``latency_ms`` is a number, a sequence used in a cycle (one value per
+request), or a callable ``(request index) -> ms``.  The answer is
+deterministic: ``"Resposta de <name> para: <last user message>"``.
+Counters: ``requests`` received, ``completed`` answers and ``aborted`` ones
+(the client went away before the answer was written).
+
+``rate_limit=(n, seconds)`` makes it throttle like a real provider: past
+``n`` requests in any ``seconds`` window it answers ``429`` with a
+``Retry-After`` (seconds until the window frees up; left out with
+``retry_after=False``), counted in ``throttled``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Deque, Dict, Optional, Sequence, Tuple, Union
+
+from .providers import last_user_message
+from .remote import PATH
+
+Latency = Union[float, Sequence[float], Callable[[int], float]]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: "_Server"
+
+    def log_message(self, *args: Any) -> None:  # silencioso
+        pass
+
+    def do_POST(self) -> None:
+        mock = self.server.mock
+        length = int(self.headers.get("Content-Length", "0"))
+        try:
+            payload = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            payload = {}
+        if self.path != PATH:
+            return self._send(404, {"error": {"message": "not found"}})
+        wait = mock._admit()
+        if wait is not None:
+            headers = {"Retry-After": f"{wait:.3f}"} if mock.retry_after else {}
+            return self._send(429, {"error": {"message": "rate limit exceeded", "type": "rate_limit"}}, headers)
+        index = mock._next()
+        time.sleep(mock.delay_ms(index) / 1000)
+        content = f"Resposta de {mock.name} para: {last_user_message(payload.get('messages') or [])}"
+        answer = {
+            "id": f"mock-{mock.name}-{index}",
+            "model": payload.get("model", "mock"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                         "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 0, "completion_tokens": len(content.split()),
+                      "total_tokens": len(content.split())},
+        }
+        self._send(200, answer)
+
+    def _send(self, status: int, payload: Any, headers: Dict[str, str] | None = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+            self.wfile.flush()
+        except OSError:  # o cliente desistiu (ex.: perdeu o hedge)
+            self.server.mock._count("aborted")
+            return
+        if status == 200:
+            self.server.mock._count("completed")
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    mock: "MockProvider"
+
+
+class MockProvider:
+    """A chat-completions server on ``127.0.0.1`` (``port=0`` picks one)."""
+
+    def __init__(self, name: str = "mock", latency_ms: Latency = 0.0, port: int = 0,
+                 rate_limit: Optional[Tuple[int, float]] = None, retry_after: bool = True):
+        self.name = name
+        self.rate_limit = rate_limit
+        self.retry_after = retry_after
+        self._window: Deque[float] = deque()
+        self.latency_ms = latency_ms
+        self._cycle = itertools.cycle(latency_ms) if isinstance(latency_ms, Sequence) else None
+        self._lock = threading.Lock()
+        self.requests = self.completed = self.aborted = self.throttled = 0
+        self._server = _Server(("127.0.0.1", port), _Handler)
+        self._server.mock = self
+        self._thread: threading.Thread | None = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}"
+
+    def delay_ms(self, index: int) -> float:
+        if callable(self.latency_ms):
+            return float(self.latency_ms(index))
+        if self._cycle is not None:
+            with self._lock:
+                return float(next(self._cycle))
+        return float(self.latency_ms)
+
+    def _admit(self) -> Optional[float]:
+        """``None`` if the request fits the rate limit, else seconds to wait."""
+        if self.rate_limit is None:
+            return None
+        limit, seconds = self.rate_limit
+        now = time.monotonic()
+        with self._lock:
+            while self._window and self._window[0] <= now - seconds:
+                self._window.popleft()
+            if len(self._window) >= limit:
+                self.throttled += 1
+                return self._window[0] + seconds - now if self._window else seconds
+            self._window.append(now)
+        return None
+
+    def _next(self) -> int:
+        with self._lock:
+            self.requests += 1
+            return self.requests - 1
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def start(self) -> "MockProvider":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def __enter__(self) -> "MockProvider":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Provider chat-completions local com latência injetada.")
+    parser.add_argument("--name", default="mock")
+    parser.add_argument("--port", type=int, default=9001)
+    parser.add_argument("--latency", default="0", help="ms, ou lista em ciclo: 40,40,400")
+    parser.add_argument("--rate-limit", default=None, help="N/S: no máximo N pedidos a cada S segundos (429 além)")
+    args = parser.parse_args(argv)
+    values = [float(x) for x in args.latency.split(",") if x.strip()]
+    rate_limit = None
+    if args.rate_limit:
+        n, _, seconds = args.rate_limit.partition("/")
+        rate_limit = (int(n), float(seconds or 60))
+    mock = MockProvider(args.name, values if len(values) > 1 else values[0], args.port, rate_limit)
+    print(f"{args.name}: {mock.url}", flush=True)
+    try:
+        mock._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mock._server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Provider interface behind the ``BACKEND`` switch.
+
+A provider turns a list of chat ``messages`` into a stream of text deltas::
+
+    async for delta in provider.stream(messages, temperature=0.0, meta=meta):
+        ...
+
+``meta`` is an optional dict the provider (or a wrapper such as
+:class:`llm.cache.CachedProvider`) fills with facts about the call — which
+backend answered, whether the cache served it — so callers can log them
+without a side channel.  :meth:`Provider.complete` collects a whole stream
+into a :class:`Completion`.
+
+:class:`LocalProvider` is the deterministic stand-in used when ``OFFLINE=1``:
+the answer depends only on the messages, nothing leaves the machine, and the
+first-token and inter-token delays are configurable so latency code can be
+exercised.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence
+
+BACKENDS = ("openai", "anthropic", "google")
+DEFAULT_MODELS = {
+    "openai": "gpt-4o-mini",
+    "anthropic": "claude-3-5-haiku-latest",
+    "google": "gemini-1.5-flash",
+}
+
+API_KEYS = {"openai": "OPENAI_API_KEY", "anthropic": "ANTHROPIC_API_KEY", "google": "GOOGLE_API_KEY"}
+
+Message = Dict[str, str]
+TOKEN = re.compile(r"\S+\s*")
+
+
+class ProviderError(RuntimeError):
+    """A provider could not be built or its call failed.
+
+    ``status`` is the HTTP status of a failed upstream call (``None`` for
+    other failures) and ``retry_after`` the seconds the upstream asked to
+    wait, when it said so.
+    """
+
+    def __init__(self, message: str, status: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+@dataclass
+class Completion:
+    """A finished call: the deltas as streamed and the upstream latency."""
+
+    deltas: List[str]
+    latency_ms: float
+    backend: str = ""
+    model: str = ""
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def text(self) -> str:
+        return "".join(self.deltas)
+
+
+class Provider:
+    """Base class: subclasses implement :meth:`stream`."""
+
+    name = "base"
+
+    def __init__(self, model: Optional[str] = None):
+        self.model = model or DEFAULT_MODELS.get(self.name, "default")
+
+    def stream(self, messages: Sequence[Message], *, model: Optional[str] = None,
+               temperature: float = 0.0, meta: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        raise NotImplementedError
+
+    async def complete(self, messages: Sequence[Message], *, model: Optional[str] = None,
+                       temperature: float = 0.0) -> Completion:
+        meta: Dict[str, Any] = {}
+        start = time.perf_counter()
+        deltas = [d async for d in self.stream(messages, model=model, temperature=temperature, meta=meta)]
+        return Completion(deltas, (time.perf_counter() - start) * 1000,
+                          meta.get("backend", self.name), model or self.model, meta)
+
+
+def last_user_message(messages: Sequence[Message]) -> str:
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            return str(message.get("content", ""))
+    return ""
+
+
+class LocalProvider(Provider):
+    """Deterministic local stand-in for ``backend`` (no network)."""
+
+    def __init__(self, backend: str = "openai", model: Optional[str] = None,
+                 first_delay_ms: float = 0.0, delays_ms: Sequence[float] = (0.0,)):
+        self.name = backend
+        super().__init__(model)
+        self.first_delay = first_delay_ms / 1000
+        self.delays = [d / 1000 for d in delays_ms] or [0.0]
+        self.calls = 0
+
+    def reply(self, messages: Sequence[Message]) -> str:
+        return f"Olá, mundo! Resposta simulada de {self.name} para: {last_user_message(messages)}"
+
+    async def stream(self, messages: Sequence[Message], *, model: Optional[str] = None,
+                     temperature: float = 0.0, meta: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        self.calls += 1
+        if meta is not None:
+            meta.setdefault("backend", self.name)
+        await asyncio.sleep(self.first_delay)
+        for i, token in enumerate(TOKEN.findall(self.reply(messages))):
+            if i:
+                await asyncio.sleep(self.delays[(i - 1) % len(self.delays)])
+            yield token
+
+
+def base_url(backend: str) -> Optional[str]:
+    """``<BACKEND>_BASE_URL``: an OpenAI-compatible chat-completions endpoint."""
+    return os.getenv(f"{backend.upper()}_BASE_URL") or None
+
+
+def configured_backends(offline: bool = True) -> List[str]:
+    """Backends usable now: all of them offline, those with a base URL online."""
+    return [b for b in BACKENDS if offline or base_url(b)]
+
+
+def make_provider(backend: str, offline: bool = True, model: Optional[str] = None, **local: Any) -> Provider:
+    """The provider for ``BACKEND``; ``OFFLINE=1`` always gets the local one.
+
+    Online, the backend needs ``<BACKEND>_BASE_URL`` (and its usual API key
+    variable, sent as a bearer token).  ``local`` is passed to
+    :class:`LocalProvider` (delays).
+    """
+    backend = backend.lower()
+    if backend not in BACKENDS:
+        raise ProviderError(f"backend desconhecido: {backend!r} (use {', '.join(BACKENDS)})")
+    if offline:
+        return LocalProvider(backend, model, **local)
+    url = base_url(backend)
+    if not url:
+        raise ProviderError(f"defina {backend.upper()}_BASE_URL para usar {backend!r} com OFFLINE=0")
+    from .remote import HTTPProvider
+    return HTTPProvider(backend, url, model, api_key=os.getenv(API_KEYS[backend]))
+
+
+__all__ = ["API_KEYS", "BACKENDS", "Completion", "DEFAULT_MODELS", "LocalProvider", "Message", "Provider",
+           "ProviderError", "TOKEN", "base_url", "configured_backends", "last_user_message", "make_provider"]
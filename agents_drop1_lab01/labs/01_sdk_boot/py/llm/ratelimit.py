@@ -0,0 +1,283 @@
+"""Client-side rate limiting and priority scheduling per backend.
+
+Providers publish requests-per-minute and tokens-per-minute limits and answer
+``429`` past them; retrying straight away only deepens the overload.
+:class:`Scheduler` keeps the calls under the limits on our side:
+
+* each backend has a lane with two :class:`TokenBucket` objects, RPM and TPM,
+  refilled continuously; a call takes one request and its estimated tokens
+  (prompt + ``expected_output_tokens``), corrected afterwards with the real
+  usage when the upstream reports it;
+* calls wait in a priority queue: ``interactive`` always goes before
+  ``batch`` (grading runs), first come first served within a priority;
+* a ``429`` closes the lane for ``Retry-After`` seconds (exponential backoff
+  when the header is missing) and halves the lane's request rate, which
+  successful calls then restore step by step; the call is queued again, at
+  its priority, up to ``max_retries`` times;
+* :meth:`Scheduler.stats` reports queue depth, waits per priority
+  (p50/p95/max) and throttling counters.
+
+:meth:`Scheduler.bind` returns a provider that goes through the scheduler at
+a fixed priority, so it stacks with the cache and hedging like any other.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Sequence, Tuple
+
+from .providers import Message, Provider, ProviderError
+
+PRIORITIES = ("interactive", "batch")
+
+
+@dataclass
+class Limits:
+    """Per-minute limits of one backend (``None`` = unlimited).
+
+    ``burst_s`` sizes the buckets: at most that many seconds' worth of
+    requests/tokens go out back to back.
+    """
+
+    rpm: Optional[float] = None
+    tpm: Optional[float] = None
+    burst_s: float = 1.0
+
+
+class TokenBucket:
+    """``rate_per_min`` units per minute, holding at most ``capacity``."""
+
+    def __init__(self, rate_per_min: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.limit = rate_per_min / 60  # por segundo; ``rate`` pode baixar após 429
+        self.rate = self.limit
+        self.capacity = capacity if capacity is not None else max(1.0, self.limit)
+        self.level = self.capacity
+        self.clock = clock
+        self._stamp = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.level = min(self.capacity, self.level + (now - self._stamp) * self.rate)
+        self._stamp = now
+
+    def wait_time(self, n: float) -> float:
+        """Seconds until ``n`` units are available (0 if they are now)."""
+        self._refill()
+        need = min(n, self.capacity)  # maior que o balde: sai com o balde cheio
+        if self.level >= need:
+            return 0.0
+        return (need - self.level) / self.rate if self.rate > 0 else math.inf
+
+    def take(self, n: float) -> None:
+        self._refill()
+        self.level -= n  # pode ficar negativo: a dívida atrasa os próximos
+
+    def give(self, n: float) -> None:
+        self._refill()
+        self.level = min(self.capacity, self.level + n)
+
+
+def estimate_tokens(messages: Sequence[Message]) -> int:
+    """Rough prompt size: about four characters per token."""
+    return max(1, math.ceil(sum(len(str(m.get("content", ""))) for m in messages) / 4))
+
+
+def _summary(samples: Sequence[float]) -> Dict[str, Any]:
+    ordered = sorted(samples)
+    if not ordered:
+        return {"n": 0, "p50_ms": None, "p95_ms": None, "max_ms": None}
+    def q(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000, 3)
+    return {"n": len(ordered), "p50_ms": q(0.5), "p95_ms": q(0.95), "max_ms": round(ordered[-1] * 1000, 3)}
+
+
+class _Lane:
+    def __init__(self, limits: Limits):
+        self.requests = TokenBucket(limits.rpm, max(1.0, limits.rpm / 60 * limits.burst_s)) if limits.rpm else None
+        self.tokens = TokenBucket(limits.tpm, max(1.0, limits.tpm / 60 * limits.burst_s)) if limits.tpm else None
+        # heap de (prioridade, ordem de chegada, chegada, future, tokens)
+        self.queue: List[Tuple[int, int, float, asyncio.Future, float]] = []
+        self.wakeup: Optional[asyncio.Event] = None
+        self.dispatcher: Optional[asyncio.Future] = None
+        self.blocked_until = 0.0
+        self.strikes = 0  # 429 seguidos
+        self.dispatched = self.throttled = self.retries = self.max_depth = 0
+        self.waits: Dict[str, Deque[float]] = {p: deque(maxlen=1000) for p in PRIORITIES}
+
+    def delay(self, tokens: float) -> float:
+        delay = self.blocked_until - time.monotonic()
+        if self.requests is not None:
+            delay = max(delay, self.requests.wait_time(1))
+        if self.tokens is not None:
+            delay = max(delay, self.tokens.wait_time(tokens))
+        return delay
+
+    def take(self, tokens: float) -> None:
+        if self.requests is not None:
+            self.requests.take(1)
+        if self.tokens is not None:
+            self.tokens.take(tokens)
+
+
+class Scheduler:
+    """RPM/TPM buckets and a priority queue for each backend in ``limits``.
+
+    Backends without an entry are not limited, but still back off on 429.
+    """
+
+    def __init__(self, limits: Optional[Dict[str, Limits]] = None, expected_output_tokens: int = 256,
+                 max_retries: int = 3, base_backoff_s: float = 1.0, max_backoff_s: float = 60.0,
+                 recovery: float = 0.05):
+        self.limits = dict(limits or {})
+        self.expected_output_tokens = expected_output_tokens
+        self.max_retries = max_retries
+        self.base_backoff_s = base_backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.recovery = recovery  # fração do limite devolvida ao ritmo por sucesso
+        self._lanes: Dict[str, _Lane] = {}
+        self._seq = itertools.count()
+
+    def _lane(self, backend: str) -> _Lane:
+        lane = self._lanes.get(backend)
+        if lane is None:
+            lane = self._lanes[backend] = _Lane(self.limits.get(backend, Limits()))
+        return lane
+
+    def bind(self, provider: Provider, priority: str = "interactive") -> "ScheduledProvider":
+        return ScheduledProvider(provider, self, priority)
+
+    async def acquire(self, backend: str, tokens: float = 0, priority: str = "interactive") -> float:
+        """Wait for ``backend``'s turn; returns the seconds spent queued."""
+        if priority not in PRIORITIES:
+            raise ProviderError(f"prioridade desconhecida: {priority!r} (use {', '.join(PRIORITIES)})")
+        lane = self._lane(backend)
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(lane.queue, (PRIORITIES.index(priority), next(self._seq), time.monotonic(), future, tokens))
+        lane.max_depth = max(lane.max_depth, len(lane.queue))
+        if lane.dispatcher is None or lane.dispatcher.done():
+            lane.wakeup = asyncio.Event()
+            lane.dispatcher = asyncio.ensure_future(self._dispatch(lane))
+        else:
+            lane.wakeup.set()  # a fila mudou: o despachante reavalia a cabeça
+        try:
+            waited = await future
+        except asyncio.CancelledError:
+            lane.wakeup.set()
+            raise
+        lane.waits[priority].append(waited)
+        return waited
+
+    async def _dispatch(self, lane: _Lane) -> None:
+        while lane.queue:
+            _, _, queued, future, tokens = lane.queue[0]
+            if future.done():  # desistiu enquanto esperava
+                heapq.heappop(lane.queue)
+                continue
+            delay = lane.delay(tokens)
+            if delay > 0:
+                lane.wakeup.clear()
+                try:
+                    await asyncio.wait_for(lane.wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(lane.queue)
+            lane.take(tokens)
+            lane.dispatched += 1
+            future.set_result(time.monotonic() - queued)
+
+    def throttled(self, backend: str, retry_after: Optional[float] = None) -> float:
+        """Record a 429 for ``backend``; returns the backoff applied, in seconds."""
+        lane = self._lane(backend)
+        lane.strikes += 1
+        lane.throttled += 1
+        if retry_after is None:
+            retry_after = min(self.max_backoff_s, self.base_backoff_s * 2 ** (lane.strikes - 1))
+        lane.blocked_until = max(lane.blocked_until, time.monotonic() + retry_after)
+        if lane.requests is not None:
+            lane.requests.rate = max(lane.requests.limit / 16, lane.requests.rate / 2)
+        return retry_after
+
+    def succeeded(self, backend: str, used_tokens: float = 0, estimated_tokens: float = 0) -> None:
+        lane = self._lane(backend)
+        lane.strikes = 0
+        if lane.requests is not None:
+            lane.requests.rate = min(lane.requests.limit, lane.requests.rate + lane.requests.limit * self.recovery)
+        if lane.tokens is not None and used_tokens != estimated_tokens:
+            lane.tokens.give(estimated_tokens - used_tokens)
+
+    def stats(self, backend: Optional[str] = None) -> Dict[str, Any]:
+        """Queue and throttling metrics of one backend, or of all by name."""
+        if backend is None:
+            return {name: self.stats(name) for name in self._lanes}
+        lane = self._lane(backend)
+        return {
+            "queue_depth": sum(1 for entry in lane.queue if not entry[3].done()),
+            "max_queue_depth": lane.max_depth,
+            "dispatched": lane.dispatched,
+            "throttled": lane.throttled,
+            "retries": lane.retries,
+            "blocked_ms": round(max(0.0, lane.blocked_until - time.monotonic()) * 1000, 3),
+            "rpm": round(lane.requests.rate * 60, 3) if lane.requests is not None else None,
+            "wait": {p: _summary(lane.waits[p]) for p in PRIORITIES},
+        }
+
+
+class ScheduledProvider(Provider):
+    """``provider`` called through ``scheduler`` at ``priority``.
+
+    ``meta["sched"]`` gets the priority, the queueing time and the retries.
+    """
+
+    def __init__(self, provider: Provider, scheduler: Scheduler, priority: str = "interactive"):
+        if priority not in PRIORITIES:
+            raise ProviderError(f"prioridade desconhecida: {priority!r} (use {', '.join(PRIORITIES)})")
+        self.provider = provider
+        self.scheduler = scheduler
+        self.priority = priority
+        self.name = provider.name
+        self.model = provider.model
+
+    async def stream(self, messages: Sequence[Message], *, model: Optional[str] = None,
+                     temperature: float = 0.0, meta: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        prompt = estimate_tokens(messages)
+        estimate = prompt + self.scheduler.expected_output_tokens
+        sched = {"priority": self.priority, "wait_ms": 0.0, "retries": 0}
+        if meta is not None:
+            meta["sched"] = sched
+        while True:
+            waited = await self.scheduler.acquire(self.name, estimate, self.priority)
+            sched["wait_ms"] = round(sched["wait_ms"] + waited * 1000, 3)
+            upstream: Dict[str, Any] = {}
+            n = 0
+            try:
+                async for delta in self.provider.stream(messages, model=model, temperature=temperature,
+                                                        meta=upstream):
+                    if not n and meta is not None:
+                        meta.update(upstream, sched=sched)
+                    n += 1
+                    yield delta
+            except ProviderError as exc:
+                if exc.status != 429 or n:
+                    raise
+                self.scheduler.throttled(self.name, exc.retry_after)
+                if sched["retries"] >= self.scheduler.max_retries:
+                    raise
+                sched["retries"] += 1
+                self.scheduler._lane(self.name).retries += 1
+                continue
+            break
+        if meta is not None:
+            meta.update(upstream, sched=sched)
+        used = (upstream.get("usage") or {}).get("total_tokens") or prompt + n
+        self.scheduler.succeeded(self.name, used, estimate)
+
+
+__all__ = ["Limits", "PRIORITIES", "ScheduledProvider", "Scheduler", "TokenBucket", "estimate_tokens"]
@@ -0,0 +1,115 @@
+"""HTTP provider for OpenAI-compatible chat-completions endpoints.
+
+Standard library only: one ``asyncio`` connection per call, ``POST
+{base_url}/v1/chat/completions`` with ``{"model", "messages",
+"temperature"}``, and the answer read from ``choices[0].message.content``.
+Because the request lives in the calling task, cancelling the task (a lost
+hedge, a timeout) closes the socket and the upstream sees the disconnect.
+
+Non-2xx answers raise :class:`~llm.providers.ProviderError` with ``status``
+and, when present, the ``Retry-After`` seconds.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import ssl
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from .providers import TOKEN, Message, Provider, ProviderError
+
+PATH = "/v1/chat/completions"
+
+
+async def post_json(url: str, payload: Any, headers: Optional[Dict[str, str]] = None
+                    ) -> Tuple[int, Dict[str, str], bytes]:
+    """``(status, headers, body)`` of one HTTP/1.1 POST (``Connection: close``)."""
+    parts = urlsplit(url)
+    secure = parts.scheme == "https"
+    host = parts.hostname or "127.0.0.1"
+    port = parts.port or (443 if secure else 80)
+    reader, writer = await asyncio.open_connection(host, port, ssl=ssl.create_default_context() if secure else None)
+    try:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        lines = [f"POST {parts.path or '/'}{'?' + parts.query if parts.query else ''} HTTP/1.1",
+                 f"Host: {parts.netloc}", "Content-Type: application/json",
+                 f"Content-Length: {len(body)}", "Connection: close"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        try:
+            status = int(status_line.split()[1])
+        except (IndexError, ValueError):
+            raise ProviderError(f"resposta HTTP inválida de {host}:{port}") from None
+        response_headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            response_headers[name.strip().lower()] = value.strip()
+        if response_headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks: List[bytes] = []
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    break
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+            data = b"".join(chunks)
+        elif "content-length" in response_headers:
+            data = await reader.readexactly(int(response_headers["content-length"]))
+        else:
+            data = await reader.read()
+        return status, response_headers, data
+    finally:
+        writer.close()
+
+
+def _retry_after(headers: Dict[str, str]) -> Optional[float]:
+    try:
+        return max(0.0, float(headers["retry-after"]))
+    except (KeyError, ValueError):
+        return None
+
+
+class HTTPProvider(Provider):
+    """``backend`` served by an OpenAI-compatible endpoint at ``base_url``."""
+
+    def __init__(self, backend: str, base_url: str, model: Optional[str] = None,
+                 api_key: Optional[str] = None, timeout: float = 60.0):
+        self.name = backend
+        super().__init__(model)
+        self.url = base_url.rstrip("/") + PATH
+        self.api_key = api_key
+        self.timeout = timeout
+
+    async def stream(self, messages: Sequence[Message], *, model: Optional[str] = None,
+                     temperature: float = 0.0, meta: Optional[Dict[str, Any]] = None) -> AsyncIterator[str]:
+        headers = {"Authorization": f"Bearer {self.api_key}"} if self.api_key else {}
+        payload = {"model": model or self.model, "messages": list(messages), "temperature": temperature}
+        try:
+            status, response_headers, body = await asyncio.wait_for(
+                post_json(self.url, payload, headers), self.timeout)
+        except (OSError, EOFError, asyncio.TimeoutError) as exc:
+            raise ProviderError(f"{self.name}: falha de conexão ({exc.__class__.__name__})") from exc
+        if not 200 <= status < 300:
+            raise ProviderError(f"{self.name}: HTTP {status}", status, _retry_after(response_headers))
+        try:
+            data = json.loads(body)
+            content = data["choices"][0]["message"]["content"]
+        except (ValueError, KeyError, IndexError, TypeError):
+            raise ProviderError(f"{self.name}: resposta fora do formato chat-completions") from None
+        if meta is not None:
+            meta.setdefault("backend", self.name)
+            if "usage" in data:
+                meta["usage"] = data["usage"]
+        for token in TOKEN.findall(content):
+            yield token
+
+
+__all__ = ["HTTPProvider", "PATH", "post_json"]
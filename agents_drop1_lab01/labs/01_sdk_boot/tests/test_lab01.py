@@ -1,7 +1,7 @@
 import json, pathlib
 
 ROOT = pathlib.Path(__file__).resolve().parents[2]
-OUT = ROOT / "labs" / "01_sdk_boot" / "outputs"
+OUT = ROOT / "01_sdk_boot" / "outputs"
 
 def test_python_output_exists():
     p = OUT / "output.jsonl"
@@ -19,3 +19,33 @@ def test_schema_and_result():
     assert res, "faltou result"
     r = res[0]["data"]
     assert {"message","tokens","file_ingest"} <= set(r.keys()), "schema de result inesperado"
+
+def test_stream_metrics_in_end_chunk():
+    p = OUT / "output.jsonl"
+    data = [json.loads(x) for x in p.read_text(encoding="utf-8").splitlines()]
+    data = [x for x in data if x.get("req", 0) == 0]
+    kinds = [x["type"] for x in data]
+    assert kinds[0] == "start" and kinds[-2:] == ["end", "result"], "ordem dos chunks inesperada"
+    deltas = [x for x in data if x["type"] == "delta"]
+    times = [d["t_ms"] for d in deltas]
+    assert deltas and times == sorted(times), "deltas devem chegar em ordem de tempo"
+    m = data[-2]["metrics"]
+    assert m["tokens"] == len(deltas) == data[-1]["data"]["tokens"]
+    assert 0 < m["ttft_ms"] <= times[0] + 1e-6 and m["total_ms"] >= times[-1]
+    assert m["tokens_per_s"] is None or m["tokens_per_s"] > 0
+    assert data[-2]["cache"]["status"] in ("miss", "hit", "coalesced")
+
+def test_stream_with_full_queue(tmp_path):
+    import asyncio, importlib.util
+    spec = importlib.util.spec_from_file_location("lab01_app", ROOT / "01_sdk_boot" / "py" / "app.py")
+    app = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(app)
+    from llm import LocalProvider
+    provider = LocalProvider("openai")
+    messages = [{"role": "user", "content": "um dois três quatro"}]
+    out = tmp_path / "out.jsonl"
+    metrics = asyncio.run(app.stream_to_jsonl(provider, messages, out, queue_size=1))
+    data = [json.loads(x) for x in out.read_text(encoding="utf-8").splitlines()]
+    text = "".join(x["text"] for x in data if x["type"] == "delta")
+    assert text == provider.reply(messages) == data[-1]["data"]["text"]
+    assert metrics["tokens"] == len(text.split())
@@ -0,0 +1,79 @@
+import asyncio, pathlib, sys
+
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "py"))
+from llm import CachedProvider, LocalProvider, ProviderError, ResponseCache, cache_key, make_provider
+
+MSGS = [{"role": "user", "content": "qual a dose?"}]
+
+def _collect(provider, messages=MSGS, temperature=0.0):
+    async def go():
+        meta = {}
+        text = "".join([d async for d in provider.stream(messages, temperature=temperature, meta=meta)])
+        return text, meta
+    return go()
+
+def test_cache_key_is_canonical():
+    a = cache_key("openai", "m", [{"role": "user", "content": "x"}], 0)
+    b = cache_key("openai", "m", [{"content": "x", "role": "user"}], 0.0)
+    assert a == b
+    assert a != cache_key("openai", "m", [{"role": "user", "content": "x"}], 0.7)
+    assert a != cache_key("anthropic", "m", [{"role": "user", "content": "x"}], 0)
+
+def test_hit_replays_without_upstream_call():
+    upstream = LocalProvider("openai", first_delay_ms=20)
+    provider = CachedProvider(upstream)
+    text1, meta1 = asyncio.run(_collect(provider))
+    text2, meta2 = asyncio.run(_collect(provider))
+    assert text1 == text2 and upstream.calls == 1
+    assert (meta1["cache"], meta2["cache"]) == ("miss", "hit")
+    stats = provider.cache.stats()
+    assert stats["hit_rate"] == 0.5 and stats["saved_ms"] >= 20
+
+def test_concurrent_identical_requests_are_coalesced():
+    upstream = LocalProvider("openai", first_delay_ms=30)
+    provider = CachedProvider(upstream)
+    async def go():
+        return await asyncio.gather(*(_collect(provider) for _ in range(5)))
+    results = asyncio.run(go())
+    assert upstream.calls == 1
+    assert len({text for text, _ in results}) == 1
+    assert sorted(meta["cache"] for _, meta in results) == ["coalesced"] * 4 + ["miss"]
+    assert provider.cache.stats()["upstream_calls_saved"] == 4
+
+def test_ttl_and_lru_eviction():
+    now = [0.0]
+    cache = ResponseCache(max_entries=2, ttl=10, clock=lambda: now[0])
+    upstream = LocalProvider("openai")
+    provider = CachedProvider(upstream, cache)
+    for content in ("a", "b", "c"):
+        asyncio.run(_collect(provider, [{"role": "user", "content": content}]))
+    assert len(cache) == 2 and cache.evictions == 1
+    asyncio.run(_collect(provider, [{"role": "user", "content": "c"}]))
+    assert upstream.calls == 3
+    now[0] = 11
+    asyncio.run(_collect(provider, [{"role": "user", "content": "c"}]))
+    assert upstream.calls == 4 and cache.expired == 1
+
+def test_errors_reach_waiters_and_are_not_cached():
+    class Failing(LocalProvider):
+        async def stream(self, messages, **kwargs):
+            self.calls += 1
+            await asyncio.sleep(0.01)
+            raise ProviderError("429")
+            yield ""
+    upstream = Failing("openai")
+    provider = CachedProvider(upstream)
+    async def go():
+        return await asyncio.gather(*(_collect(provider) for _ in range(3)), return_exceptions=True)
+    results = asyncio.run(go())
+    assert all(isinstance(r, ProviderError) for r in results) and upstream.calls == 1
+    with pytest.raises(ProviderError):
+        asyncio.run(_collect(provider))
+    assert upstream.calls == 2
+
+def test_make_provider_is_local_when_offline():
+    assert isinstance(make_provider("anthropic", offline=True), LocalProvider)
+    with pytest.raises(ProviderError):
+        make_provider("nope")
@@ -0,0 +1,100 @@
+import asyncio, pathlib, sys, time
+
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "py"))
+from llm import HTTPProvider, HedgedProvider, LatencyTracker, ProviderError, fan_out
+from llm.mock import MockProvider
+
+MSGS = [{"role": "user", "content": "qual a dose?"}]
+
+def _collect(provider, messages=MSGS):
+    async def go():
+        meta = {}
+        text = "".join([d async for d in provider.stream(messages, meta=meta)])
+        return text, meta
+    return asyncio.run(go())
+
+def _seeded(backend, ms, n=20):
+    tracker = LatencyTracker()
+    for _ in range(n):
+        tracker.add(backend, ms)
+    return tracker
+
+def test_http_provider_talks_to_mock():
+    with MockProvider("openai", latency_ms=5) as mock:
+        text, meta = _collect(HTTPProvider("openai", mock.url))
+    assert text == "Resposta de openai para: qual a dose?"
+    assert meta["backend"] == "openai" and meta["usage"]["completion_tokens"] == 7
+    assert mock.requests == 1
+
+def test_slow_primary_is_hedged_and_cancelled():
+    with MockProvider("openai", latency_ms=1500) as slow, MockProvider("anthropic", latency_ms=10) as fast:
+        provider = HedgedProvider([HTTPProvider("openai", slow.url), HTTPProvider("anthropic", fast.url)],
+                                  tracker=_seeded("openai", 50))
+        t0 = time.perf_counter()
+        text, meta = _collect(provider)
+        elapsed = time.perf_counter() - t0
+        time.sleep(1.6)  # deixa o mock lento tentar escrever a resposta
+        assert slow.completed == 0
+    assert text.startswith("Resposta de anthropic")
+    assert elapsed < 0.5
+    assert meta["hedge"]["delay_ms"] == 50 and meta["hedge"]["winner"] == "anthropic"
+    assert meta["hedge"]["cancelled"] == ["openai"] and meta["backend"] == "anthropic"
+    assert provider.hedged == provider.wins == 1
+    # a amostra censurada do primário empurra o p95 para cima
+    assert provider.tracker.count("openai") == 21
+
+def test_fast_primary_is_not_hedged():
+    with MockProvider("openai", latency_ms=5) as primary, MockProvider("anthropic", latency_ms=5) as hedge:
+        provider = HedgedProvider([HTTPProvider("openai", primary.url), HTTPProvider("anthropic", hedge.url)],
+                                  initial_delay_ms=500)
+        for _ in range(3):
+            text, meta = _collect(provider)
+            assert meta["hedge"]["attempts"] == ["openai"]
+        assert hedge.requests == 0 and provider.hedged == 0
+    assert provider.tracker.count("openai") == 3
+
+def test_hedge_delay_follows_p95():
+    provider = HedgedProvider([HTTPProvider("openai", "http://127.0.0.1:1")], tracker=LatencyTracker(),
+                              initial_delay_ms=250, min_delay_ms=10, max_delay_ms=1000)
+    assert provider.hedge_delay_ms() == 250
+    for ms in range(1, 101):
+        provider.tracker.add("openai", ms)
+    assert provider.hedge_delay_ms() == 96
+    provider.tracker.add("openai", 10_000)
+    assert provider.max_delay_ms >= provider.hedge_delay_ms()
+
+def test_failed_primary_fails_over_without_waiting():
+    with MockProvider("anthropic", latency_ms=5) as backup:
+        provider = HedgedProvider([HTTPProvider("openai", "http://127.0.0.1:1"), HTTPProvider("anthropic", backup.url)],
+                                  initial_delay_ms=2000)
+        t0 = time.perf_counter()
+        text, meta = _collect(provider)
+    assert time.perf_counter() - t0 < 1.0
+    assert text.startswith("Resposta de anthropic")
+    assert len(meta["hedge"]["errors"]) == 1 and meta["hedge"]["cancelled"] == []
+
+def test_all_failing_raises_last_error():
+    provider = HedgedProvider([HTTPProvider("openai", "http://127.0.0.1:1"),
+                               HTTPProvider("anthropic", "http://127.0.0.1:1")])
+    with pytest.raises(ProviderError, match="anthropic"):
+        _collect(provider)
+
+def test_fan_out_compares_answers():
+    with MockProvider("openai", latency_ms=5) as a, MockProvider("google", latency_ms=60) as b:
+        providers = [HTTPProvider("openai", a.url), HTTPProvider("google", b.url),
+                     HTTPProvider("anthropic", "http://127.0.0.1:1")]
+        result = asyncio.run(fan_out(providers, MSGS))
+    answers = {x["backend"]: x for x in result["answers"]}
+    assert answers["openai"]["text"] == "Resposta de openai para: qual a dose?"
+    assert answers["anthropic"]["text"] is None and answers["anthropic"]["error"]
+    assert result["fastest"] == "openai" and result["agree"] is False
+    assert 0.8 < result["similarity"]["openai|google"] < 1
+
+def test_non_2xx_carries_status():
+    with MockProvider("openai") as mock:
+        provider = HTTPProvider("openai", mock.url + "/outro")
+        with pytest.raises(ProviderError) as err:
+            _collect(provider)
+    assert err.value.status == 404
@@ -0,0 +1,104 @@
+import asyncio, pathlib, sys, time
+
+import pytest
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "py"))
+from llm import HTTPProvider, Limits, LocalProvider, ProviderError, Scheduler, TokenBucket
+from llm.mock import MockProvider
+
+MSGS = [{"role": "user", "content": "qual a dose?"}]
+
+async def _call(provider, messages=MSGS):
+    meta = {}
+    text = "".join([d async for d in provider.stream(messages, meta=meta)])
+    return text, meta
+
+def test_token_bucket_refills_per_minute():
+    now = [0.0]
+    bucket = TokenBucket(120, capacity=2, clock=lambda: now[0])  # 2/s
+    assert bucket.wait_time(2) == 0
+    bucket.take(2)
+    assert bucket.wait_time(1) == pytest.approx(0.5)
+    now[0] = 0.5
+    assert bucket.wait_time(1) == 0
+    # pedido maior que o balde sai quando ele estiver cheio e deixa dívida
+    assert bucket.wait_time(10) == pytest.approx(0.5)
+    now[0] = 1.0
+    bucket.take(10)
+    assert bucket.wait_time(1) == pytest.approx(4.5)
+
+def test_interactive_jumps_ahead_of_batch():
+    scheduler = Scheduler({"openai": Limits(rpm=600, burst_s=0.1)})  # 1 pedido a cada 100 ms, sem rajada
+    upstream = LocalProvider("openai")
+    batch, interactive = scheduler.bind(upstream, "batch"), scheduler.bind(upstream, "interactive")
+    order = []
+    async def one(provider, tag):
+        await _call(provider)
+        order.append(tag)
+    async def go():
+        jobs = [asyncio.ensure_future(one(batch, f"b{i}")) for i in range(3)]
+        await asyncio.sleep(0.01)
+        jobs.append(asyncio.ensure_future(one(interactive, "i0")))
+        await asyncio.gather(*jobs)
+    t0 = time.perf_counter()
+    asyncio.run(go())
+    assert order == ["b0", "i0", "b1", "b2"]
+    assert time.perf_counter() - t0 >= 0.28
+    stats = scheduler.stats("openai")
+    assert stats["dispatched"] == 4 and stats["max_queue_depth"] == 3 and stats["queue_depth"] == 0
+    assert stats["wait"]["batch"]["n"] == 3 and stats["wait"]["batch"]["max_ms"] >= 250
+
+def test_tokens_per_minute_spaces_large_prompts():
+    scheduler = Scheduler({"openai": Limits(tpm=60_000)}, expected_output_tokens=0)  # 1000 tokens/s
+    provider = scheduler.bind(LocalProvider("openai"))
+    big = [{"role": "user", "content": "x" * 2000}]  # ~500 tokens
+    async def go():
+        return await asyncio.gather(*(_call(provider, big) for _ in range(4)))
+    t0 = time.perf_counter()
+    results = asyncio.run(go())
+    assert time.perf_counter() - t0 >= 0.45
+    assert results[-1][1]["sched"]["wait_ms"] >= 450
+
+def test_limits_below_provider_avoid_429():
+    with MockProvider("openai", rate_limit=(4, 1.0)) as mock:
+        # 2/s com rajada de 1: no máximo 3 por segundo, abaixo dos 4 do mock
+        scheduler = Scheduler({"openai": Limits(rpm=120, burst_s=0.5)})
+        provider = scheduler.bind(HTTPProvider("openai", mock.url))
+        async def go():
+            return await asyncio.gather(*(_call(provider) for _ in range(6)))
+        asyncio.run(go())
+        assert mock.throttled == 0 and mock.requests == 6
+
+def test_retry_after_is_honoured_and_slows_lane():
+    with MockProvider("openai", rate_limit=(2, 0.4)) as mock:
+        scheduler = Scheduler({"openai": Limits(rpm=6000, burst_s=1)})
+        provider = scheduler.bind(HTTPProvider("openai", mock.url))
+        async def go():
+            return await asyncio.gather(*(_call(provider) for _ in range(5)))
+        results = asyncio.run(go())
+        assert mock.requests == 5 and mock.throttled >= 1
+    assert all(text.startswith("Resposta de openai") for text, _ in results)
+    stats = scheduler.stats("openai")
+    assert stats["throttled"] == mock.throttled and stats["retries"] == mock.throttled
+    assert stats["rpm"] < 6000
+    assert max(meta["sched"]["retries"] for _, meta in results) >= 1
+
+def test_exponential_backoff_without_retry_after():
+    scheduler = Scheduler(base_backoff_s=0.1, max_backoff_s=0.3)
+    assert [scheduler.throttled("openai") for _ in range(4)] == [0.1, 0.2, 0.3, 0.3]
+    scheduler.succeeded("openai")
+    assert scheduler.throttled("openai", retry_after=2.5) == 2.5
+    assert scheduler.stats("openai")["blocked_ms"] > 2000
+
+def test_gives_up_after_max_retries():
+    with MockProvider("openai", rate_limit=(0, 1.0), retry_after=False) as mock:
+        scheduler = Scheduler(max_retries=2, base_backoff_s=0.01)
+        provider = scheduler.bind(HTTPProvider("openai", mock.url))
+        with pytest.raises(ProviderError) as err:
+            asyncio.run(_call(provider))
+        assert err.value.status == 429 and err.value.retry_after is None
+        assert mock.throttled == 3
+
+def test_unknown_priority_is_rejected():
+    with pytest.raises(ProviderError):
+        Scheduler().bind(LocalProvider("openai"), "urgente")
@@ -0,0 +1,42 @@
+import asyncio, json, pathlib, pstats, sys
+
+import pytest
+
+sys.path.append(str(pathlib.Path(__file__).resolve().parents[4]))  # shared/
+from shared import profiling
+from shared.profiling import enabled_modes, session, span
+
+def _spans(path):
+    return [e for e in json.loads(path.read_text(encoding="utf-8"))["traceEvents"] if e["ph"] == "X"]
+
+def test_unset_is_noop(tmp_path, monkeypatch):
+    monkeypatch.delenv("AGENTS_PROFILE", raising=False)
+    with session("app", tmp_path) as written:
+        assert span("a") is span("b", req=1)
+    assert written == {} and not (tmp_path / "profile").exists()
+    with pytest.raises(ValueError):
+        enabled_modes("spans,perf")
+
+def test_parallel_requests_get_own_rows(tmp_path):
+    async def request(i):
+        with span("request", req=i) as s:
+            with span("first_token"):
+                await asyncio.sleep(0.01)
+            s.set(tokens=3)
+
+    async def run():
+        with span("round"):
+            await asyncio.gather(*(request(i) for i in range(3)))
+
+    with session("app", tmp_path, frozenset({"spans", "cprofile"})) as written:
+        asyncio.run(run())
+    assert profiling._tracer is None
+    spans = _spans(written["trace"])
+    requests = [e for e in spans if e["name"] == "request"]
+    firsts = [e for e in spans if e["name"] == "first_token"]
+    assert len({e["tid"] for e in requests}) == 3 and all(e["args"]["tokens"] == 3 for e in requests)
+    # cada etapa fica dentro do seu pedido, na mesma linha
+    for inner in firsts:
+        outer = next(e for e in requests if e["tid"] == inner["tid"])
+        assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert pstats.Stats(str(written["profile"])).total_calls > 0
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""Calculator engine benchmark (mcp_stub.calc) against plain ``eval``.
+
+Each expression is evaluated ``--repeat`` times with ``eval(text)`` (what the
+tool used to do) and with :func:`mcp_stub.calc.evaluate` (compiled once,
+served from the LRU afterwards), plus one :meth:`Expression.evaluate_batch`
+call over ``--rows`` bindings when NumPy is available.  One JSON object per
+line::
+
+    python benchmarks/bench_calc.py --repeat 20000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from mcp_stub.calc import compile_expression, evaluate  # noqa: E402
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+EXPRESSIONS = [
+    ("2 * (3 + 4) / 5 - 1", {}),
+    ("x * (3 + y) / 5", {"x": 2, "y": 3}),
+    ("x**2 + 3*x*y - y/4 + 7", {"x": 2, "y": 3}),
+]
+
+
+def _per_call_us(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20000)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args(argv)
+
+    for text, variables in EXPRESSIONS:
+        baseline = _per_call_us(lambda: eval(text, {"__builtins__": {}}, variables), args.repeat)
+        compiled = _per_call_us(lambda: evaluate(text, variables), args.repeat)
+        print(json.dumps({"bench": "scalar", "expression": text, "eval_us": round(baseline, 3),
+                          "compiled_us": round(compiled, 3), "speedup": round(baseline / compiled, 1)}))
+
+    if np is not None:
+        xs, ys = np.random.default_rng(0).random((2, args.rows))
+        text = EXPRESSIONS[2][0]
+        start = time.perf_counter()
+        compile_expression(text).evaluate_batch({"x": xs, "y": ys})
+        seconds = time.perf_counter() - start
+        print(json.dumps({"bench": "batch", "expression": text, "rows": args.rows,
+                          "seconds": round(seconds, 4), "rows_per_s": round(args.rows / seconds)}))
+
+
+if __name__ == "__main__":
+    main()
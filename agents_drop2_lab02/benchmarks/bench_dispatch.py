@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""Per-request dispatch cost of the FastAPI shim (fastapi.routing).
+
+Registers ``--routes`` static and ``--routes`` parameterised routes with
+trivial handlers, then times match + call for a static path, a path
+parameter route and a body-model route.  ``legacy`` reproduces the previous
+dispatch (exact-path dict plus ``inspect.signature`` on every request) for
+comparison.  One JSON object per line::
+
+    python benchmarks/bench_dispatch.py --routes 50 --repeat 200000
+"""
+
+import argparse
+import inspect
+import json
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from fastapi import FastAPI  # noqa: E402
+from pydantic import BaseModel  # noqa: E402
+
+
+class Body(BaseModel):
+    tool_name: str
+    arguments: dict
+
+
+def build_app(routes: int) -> FastAPI:
+    app = FastAPI()
+    for i in range(routes):
+        app.get(f"/static/{i}")(lambda: {"ok": True})
+        app.post(f"/tools{i}/{{name}}/invoke")(lambda name, arguments: {"name": name})
+    app.post("/invoke")(invoke)
+    return app
+
+
+def invoke(request: Body):
+    return {"tool": request.tool_name}
+
+
+LEGACY_ROUTES = {("POST", "/invoke"): invoke}
+
+
+def _legacy_dispatch(method: str, path: str, body: dict):
+    """The previous TestClient path: exact dict match, signature per request."""
+    handler = LEGACY_ROUTES[(method, path)]
+    call_args = []
+    for provided, parameter in zip((body,), inspect.signature(handler).parameters.values()):
+        annotation = parameter.annotation
+        if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+            call_args.append(annotation(**provided))
+        else:
+            call_args.append(provided)
+    return handler(*call_args)
+
+
+def _ns_per_call(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e9
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--routes", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200_000)
+    args = parser.parse_args(argv)
+
+    app = build_app(args.routes)
+    last = args.routes - 1
+    body = {"tool_name": "calculator", "arguments": {"expression": "1"}}
+
+    def dispatch(method, path, payload=None):
+        route, params = app.match(method, path)
+        return route.call(params, payload)
+
+    cases = {
+        "static": lambda: dispatch("GET", f"/static/{last}"),
+        "path_param": lambda: dispatch("POST", f"/tools{last}/calculator/invoke", {}),
+        "body_model": lambda: dispatch("POST", "/invoke", body),
+        "legacy_body_model": lambda: _legacy_dispatch("POST", "/invoke", body),
+    }
+    for name, fn in cases.items():
+        fn()
+        print(json.dumps({"bench": name, "routes": args.routes,
+                          "ns_per_request": round(_ns_per_call(fn, args.repeat), 1)}))
+
+
+if __name__ == "__main__":
+    main()
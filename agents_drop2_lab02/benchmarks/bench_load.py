@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""Load test for both MCP servers: throughput and latency percentiles.
+
+Starts each server as a subprocess on a free port, over a synthetic asset
+corpus (``MCP_ASSETS``, text files and PDFs made with
+:func:`mcp_stub.pdf.build_pdf`), and drives it with one of two load models:
+
+* ``closed`` — ``--concurrency`` clients, each sending its next request as
+  soon as the previous answer arrives (throughput under saturation);
+* ``open``   — requests arrive at ``--rate`` per second (constant spacing or
+  ``--poisson``) whatever the server does; latency is measured from the
+  scheduled arrival, so queueing on an overloaded server is counted instead
+  of hidden (no coordinated omission).
+
+Endpoints are mixed round-robin over what each server exposes:
+
+* ``stdlib`` (``labs/02_mcp/server.py``): ``health``, ``list_pdfs``,
+  ``summarize_pdf``;
+* ``shim``   (``labs/02_mcp/py/server.py``): ``tools``, ``invoke``.
+
+One JSON object per line per (server, endpoint) and an ``all`` line per
+server, with requests, errors, ``rps`` and p50/p95/p99/max latency::
+
+    python benchmarks/bench_load.py --mode closed --concurrency 16 --duration 10
+    python benchmarks/bench_load.py --mode open --rate 300 --server stdlib \\
+        --server-env MCP_MODE=threaded --save-baseline bench_baseline.jsonl
+    python benchmarks/bench_load.py --mode open --rate 300 --server stdlib \\
+        --server-env MCP_MODE=threaded --baseline bench_baseline.jsonl
+
+With ``--baseline`` each line is compared with the saved run (same server,
+endpoint, load, corpus size and ``--server-env``): p95/p99 up or ``rps``
+down by more than ``--tolerance``, or a higher error rate, is a regression;
+they are listed in a ``compare`` line and the exit status is 1 (also when
+no line of the baseline matches).
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from mcp_stub.pdf import build_pdf  # noqa: E402
+
+WORDS = ("paciente pressão arterial dose diária insuficiência cardíaca renal hepática "
+         "guideline recomendação evidência nível classe tratamento diagnóstico exame").split()
+
+SERVERS = {
+    "stdlib": ROOT / "labs" / "02_mcp" / "server.py",
+    "shim": ROOT / "labs" / "02_mcp" / "py" / "server.py",
+}
+ENDPOINTS = {
+    "health": ("stdlib",),
+    "list_pdfs": ("stdlib",),
+    "summarize_pdf": ("stdlib",),
+    "tools": ("shim",),
+    "invoke": ("shim",),
+}
+# métricas que pioram quando sobem / quando descem
+HIGHER_IS_WORSE = ("p95_ms", "p99_ms")
+LOWER_IS_WORSE = ("rps",)
+
+
+def make_corpus(directory: Path, docs: int, pages: int, words_per_page: int, pdf_ratio: float,
+                seed: int = 0) -> list[Path]:
+    """``docs`` files, about ``pdf_ratio`` of them PDFs and the rest ``.txt``."""
+    rng = random.Random(seed)
+    paths = []
+    for i in range(docs):
+        page_texts = []
+        for _ in range(pages):
+            words = [rng.choice(WORDS) for _ in range(words_per_page)]
+            page_texts.append("\n".join(" ".join(words[j:j + 12]) for j in range(0, len(words), 12)))
+        if rng.random() < pdf_ratio:
+            path = directory / f"doc_{i:05d}.pdf"
+            path.write_bytes(build_pdf(page_texts))
+        else:
+            path = directory / f"doc_{i:05d}.txt"
+            path.write_text("\n\n".join(page_texts), encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def request_factory(endpoint: str, corpus: list[Path]):
+    """``next() -> (method, path, body)`` cycling through varied requests."""
+    names = itertools.cycle([p.name for p in corpus])
+    paths = itertools.cycle([str(p) for p in corpus])
+    counter = itertools.count()
+    if endpoint == "health":
+        return lambda: ("GET", "/health", None)
+    if endpoint == "list_pdfs":
+        return lambda: ("POST", "/tools/list_pdfs", {"limit": 100})
+    if endpoint == "summarize_pdf":
+        return lambda: ("POST", "/tools/summarize_pdf", {"path": next(paths), "max_words": 40})
+    if endpoint == "tools":
+        return lambda: ("GET", "/tools", None)
+    if endpoint == "invoke":
+        def invoke():
+            i = next(counter)
+            if i % 2:
+                return "POST", "/invoke", {"tool_name": "text_analyzer", "arguments": {"path": next(names)}}
+            return "POST", "/invoke", {"tool_name": "calculator",
+                                       "arguments": {"expression": "x**2 + y", "variables": {"x": i, "y": 1}}}
+        return invoke
+    raise SystemExit(f"endpoint desconhecido: {endpoint!r} (use {', '.join(ENDPOINTS)})")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(name: str, corpus_dir: Path, state_dir: Path, extra_env: dict[str, str],
+                 timeout: float = 30.0) -> tuple[subprocess.Popen, int]:
+    port = free_port()
+    env = dict(os.environ, MCP_PORT=str(port), MCP_ASSETS=str(corpus_dir),
+               MCP_SEARCH_INDEX=str(state_dir / f"{name}-search.sqlite3"),
+               MCP_TEXT_STORE=str(state_dir / f"{name}-pdf_text"),
+               MCP_DENSE_DIR=str(state_dir / f"{name}-dense"), **extra_env)
+    # o log de acesso vai para arquivo: um pipe não lido encheria e travaria o servidor
+    log = state_dir / f"{name}.log"
+    with open(log, "wb") as stderr:
+        proc = subprocess.Popen([sys.executable, str(SERVERS[name])], env=env,
+                                stdout=subprocess.DEVNULL, stderr=stderr)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"servidor {name} saiu ao iniciar:\n{log.read_text(errors='replace')}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return proc, port
+        except OSError:
+            time.sleep(0.05)
+    proc.kill()
+    raise SystemExit(f"servidor {name} não abriu a porta {port} em {timeout}s")
+
+
+def stop_server(proc: subprocess.Popen) -> None:
+    proc.terminate()
+    try:
+        proc.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+
+
+class _Client(threading.local):
+    """One keep-alive connection per thread (reopened when the server closes it)."""
+
+    def __init__(self, port: int, timeout: float):
+        self.conn = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+
+    def send(self, method: str, path: str, body) -> bool:
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if data is not None else {}
+        try:
+            self.conn.request(method, path, data, headers)
+            response = self.conn.getresponse()
+            response.read()
+            if response.will_close:
+                self.conn.close()
+            return response.status < 400
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            return False
+
+
+def run_load(port: int, factories: dict, args) -> list[tuple[str, float, float, bool]]:
+    """Samples ``(endpoint, start, latency_s, ok)`` for ``warmup + duration`` seconds."""
+    client = _Client(port, args.timeout)
+    order = itertools.cycle(list(factories))
+    lock = threading.Lock()
+    samples: list[tuple[str, float, float, bool]] = []
+    start = time.perf_counter()
+    stop_at = start + args.warmup + args.duration
+
+    def one(endpoint: str, scheduled: float) -> None:
+        ok = client.send(*factories[endpoint]())
+        sample = (endpoint, scheduled, time.perf_counter() - scheduled, ok)
+        with lock:
+            samples.append(sample)
+
+    if args.mode == "closed":
+        def worker() -> None:
+            while (now := time.perf_counter()) < stop_at:
+                with lock:
+                    endpoint = next(order)
+                one(endpoint, now)
+        threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+    else:
+        rng = random.Random(args.seed)
+        with ThreadPoolExecutor(max_workers=args.max_inflight) as pool:
+            scheduled = start
+            while scheduled < stop_at:
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                # a latência conta a partir da chegada programada, mesmo se o pool estiver cheio
+                pool.submit(one, next(order), scheduled)
+                scheduled += rng.expovariate(args.rate) if args.poisson else 1 / args.rate
+    warm = start + args.warmup
+    return [s for s in samples if s[1] >= warm]
+
+
+def summarize(samples, seconds: float) -> dict:
+    latencies = sorted(s[2] for s in samples)
+    errors = sum(1 for s in samples if not s[3])
+
+    def q(p: float):
+        if not latencies:
+            return None
+        return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))] * 1000, 3)
+
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+        "rps": round(len(samples) / seconds, 1) if seconds else None,
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3) if latencies else None,
+        "p50_ms": q(0.50),
+        "p95_ms": q(0.95),
+        "p99_ms": q(0.99),
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else None,
+    }
+
+
+def _key(row: dict) -> tuple:
+    return (row["server"], row["endpoint"], row["mode"], row.get("concurrency"), row.get("rate"),
+            row.get("docs"), json.dumps(row.get("server_env") or {}, sort_keys=True))
+
+
+def compare(rows: list[dict], baseline: list[dict], tolerance: float) -> tuple[int, list[dict]]:
+    """``(rows compared, regressions)`` of ``rows`` against ``baseline``.
+
+    Only rows with the same server, endpoint, load, corpus size and server
+    environment are compared.
+    """
+    saved = {_key(b): b for b in baseline if b.get("bench") == "load"}
+    compared = 0
+    regressions = []
+    for row in rows:
+        base = saved.get(_key(row))
+        if base is None:
+            continue
+        compared += 1
+        checks = [(m, row[m], base[m], row[m] > base[m] * (1 + tolerance)) for m in HIGHER_IS_WORSE]
+        checks += [(m, row[m], base[m], row[m] < base[m] * (1 - tolerance)) for m in LOWER_IS_WORSE]
+        checks.append(("error_rate", row["error_rate"], base["error_rate"],
+                       row["error_rate"] > base["error_rate"] + 0.01))
+        for metric, now, before, worse in checks:
+            if None not in (now, before) and worse:
+                regressions.append({"server": row["server"], "endpoint": row["endpoint"], "metric": metric,
+                                    "baseline": before, "current": now,
+                                    "change": round(now / before - 1, 4) if before else None})
+    return compared, regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--server", choices=("stdlib", "shim", "both"), default="both")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS),
+                        help="lista separada por vírgulas (cada servidor usa os que expõe)")
+    parser.add_argument("--mode", choices=("closed", "open"), default="closed")
+    parser.add_argument("--concurrency", type=int, default=8, help="clientes (closed)")
+    parser.add_argument("--rate", type=float, default=200.0, help="requisições/s (open)")
+    parser.add_argument("--poisson", action="store_true", help="chegadas exponenciais (open)")
+    parser.add_argument("--max-inflight", type=int, default=64, help="requisições simultâneas (open)")
+    parser.add_argument("--duration", type=float, default=5.0, help="segundos medidos")
+    parser.add_argument("--warmup", type=float, default=1.0, help="segundos descartados no início")
+    parser.add_argument("--timeout", type=float, default=10.0, help="timeout por requisição (conta como erro)")
+    parser.add_argument("--docs", type=int, default=50, help="tamanho do corpus sintético")
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--words", type=int, default=200, help="palavras por página")
+    parser.add_argument("--pdf-ratio", type=float, default=0.5, help="fração de PDFs no corpus")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--server-env", action="append", default=[], metavar="K=V",
+                        help="variável extra para os servidores (ex.: MCP_MODE=threaded)")
+    parser.add_argument("--out", type=Path, help="também grava as linhas neste arquivo")
+    parser.add_argument("--save-baseline", type=Path, help="grava esta execução como baseline")
+    parser.add_argument("--baseline", type=Path, help="compara com um baseline salvo")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="piora relativa aceita (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    wanted = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    for endpoint in wanted:
+        if endpoint not in ENDPOINTS:
+            parser.error(f"endpoint desconhecido: {endpoint!r} (use {', '.join(ENDPOINTS)})")
+    extra_env = dict(item.split("=", 1) for item in args.server_env)
+    servers = ("stdlib", "shim") if args.server == "both" else (args.server,)
+    load = {"mode": args.mode, "concurrency": args.concurrency if args.mode == "closed" else None,
+            "rate": args.rate if args.mode == "open" else None}
+
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        corpus_dir, state_dir = Path(tmp) / "corpus", Path(tmp) / "state"
+        corpus_dir.mkdir()
+        state_dir.mkdir()
+        corpus = make_corpus(corpus_dir, args.docs, args.pages, args.words, args.pdf_ratio, args.seed)
+        for server in servers:
+            endpoints = [e for e in wanted if server in ENDPOINTS[e]]
+            if not endpoints:
+                continue
+            proc, port = start_server(server, corpus_dir, state_dir, extra_env)
+            try:
+                samples = run_load(port, {e: request_factory(e, corpus) for e in endpoints}, args)
+            finally:
+                stop_server(proc)
+            for endpoint in endpoints + ["all"]:
+                chosen = samples if endpoint == "all" else [s for s in samples if s[0] == endpoint]
+                rows.append({"bench": "load", "server": server, "endpoint": endpoint, **load,
+                             "docs": args.docs, "server_env": extra_env, "seconds": args.duration,
+                             **summarize(chosen, args.duration)})
+
+    lines = list(rows)
+    status = 0
+    if args.baseline:
+        baseline = [json.loads(x) for x in args.baseline.read_text(encoding="utf-8").splitlines() if x.strip()]
+        compared, regressions = compare(rows, baseline, args.tolerance)
+        # nada comparável (carga ou ambiente diferentes) também é falha
+        ok = compared > 0 and not regressions
+        lines.append({"bench": "compare", "baseline": str(args.baseline), "tolerance": args.tolerance,
+                      "compared": compared, "regressions": regressions, "ok": ok})
+        status = 0 if ok else 1
+    text = "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in lines)
+    sys.stdout.write(text)
+    if args.out:
+        args.out.write_text(text, encoding="utf-8")
+    if args.save_baseline:
+        args.save_baseline.write_text("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in rows),
+                                      encoding="utf-8")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""Overhead of the metrics layer (mcp_stub.metrics) on the request path.
+
+* ``ops``  — ns per ``Counter.inc``, ``Histogram.observe`` and per request
+  recorded by ``HttpMetrics.begin/end`` (what every request pays);
+* ``threads`` — the same recording from several threads at once, against a
+  counter behind a shared lock (what the sharding avoids);
+* ``asgi`` — ``/health`` (a route that does nothing) and the lab's
+  ``POST /invoke`` (a cached ``calculator`` call) through ASGI, with and
+  without :class:`MetricsMiddleware`: the fixed cost per request, and what
+  it weighs next to a real route.
+
+Results are printed as one JSON object per line::
+
+    python benchmarks/bench_metrics.py --n 200000 --threads 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from fastapi import FastAPI  # noqa: E402
+from mcp_stub.metrics import HttpMetrics, MetricsMiddleware, Registry  # noqa: E402
+
+
+def _per_op(fn, n: int) -> float:
+    start = time.perf_counter()
+    fn(n)
+    return (time.perf_counter() - start) / n * 1e9
+
+
+def bench_ops(n: int) -> None:
+    registry = Registry()
+    counter = registry.counter("c_total", "c", ("route",))
+    histogram = registry.histogram("h_seconds", "h", ("route",))
+    metrics = HttpMetrics(Registry())
+    labels = ("/tools/summarize_pdf",)
+
+    def empty(k):
+        for _ in range(k):
+            pass
+
+    def inc(k):
+        for _ in range(k):
+            counter.inc(labels)
+
+    def observe(k):
+        for _ in range(k):
+            histogram.observe(0.0042, labels)
+
+    def request(k):
+        for _ in range(k):
+            started = metrics.begin("/tools/summarize_pdf")
+            metrics.end("POST", "/tools/summarize_pdf", 200, started, 64, 512)
+
+    loop = _per_op(empty, n)
+    for name, fn in (("counter_inc", inc), ("histogram_observe", observe), ("request_record", request)):
+        print(json.dumps({"bench": "ops", "op": name, "ns_per_op": round(_per_op(fn, n) - loop, 1)}))
+    start = time.perf_counter()
+    text = metrics.render()
+    print(json.dumps({"bench": "ops", "op": "render", "us": round((time.perf_counter() - start) * 1e6, 1),
+                      "bytes": len(text)}))
+
+
+def bench_threads(n: int, threads: int) -> None:
+    counter = Registry().counter("c_total", "c")
+    lock = threading.Lock()
+    locked = {"n": 0}
+
+    def sharded():
+        for _ in range(n):
+            counter.inc()
+
+    def with_lock():
+        for _ in range(n):
+            with lock:
+                locked["n"] += 1
+
+    for name, target in (("sharded", sharded), ("locked", with_lock)):
+        workers = [threading.Thread(target=target) for _ in range(threads)]
+        start = time.perf_counter()
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        seconds = time.perf_counter() - start
+        print(json.dumps({"bench": "threads", "kind": name, "threads": threads,
+                          "ns_per_op": round(seconds / (n * threads) * 1e9, 1)}))
+    assert counter.value() == n * threads == locked["n"]
+
+
+def bench_asgi(n: int, rounds: int = 5) -> None:
+    app = FastAPI()
+
+    @app.get("/health")
+    async def health():
+        return {"ok": True}
+
+    sys.path.insert(0, str(ROOT / "labs" / "02_mcp" / "py"))
+    import server as shim
+
+    invoke = json.dumps({"tool_name": "calculator", "arguments": {"expression": "2 * (3 + x)",
+                                                                  "variables": {"x": 4}}}).encode()
+    cases = (
+        ("/health", app, MetricsMiddleware(app, HttpMetrics(), lambda method, path: path), "GET", b""),
+        ("/invoke", shim.app, shim.asgi_app, "POST", invoke),
+    )
+
+    async def send(message):
+        pass
+
+    async def drive(target, method, path, body, k):
+        scope = {"type": "http", "method": method, "path": path}
+
+        async def receive():
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        start = time.perf_counter()
+        for _ in range(k):
+            await target(scope, receive, send)
+        return (time.perf_counter() - start) / k * 1e6
+
+    for path, plain_app, wrapped, method, body in cases:
+        # rodadas alternadas, melhor de cada lado: tira a deriva do processo
+        plain = measured = float("inf")
+        for _ in range(rounds):
+            plain = min(plain, asyncio.run(drive(plain_app, method, path, body, max(1, n // rounds))))
+            measured = min(measured, asyncio.run(drive(wrapped, method, path, body, max(1, n // rounds))))
+        print(json.dumps({"bench": "asgi", "route": path, "plain_us": round(plain, 2),
+                          "with_metrics_us": round(measured, 2), "overhead_us": round(measured - plain, 2),
+                          "overhead_pct": round((measured / plain - 1) * 100, 1)}))
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--n", type=int, default=200_000, help="operações por medida")
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args(argv)
+    bench_ops(args.n)
+    bench_threads(args.n // args.threads, args.threads)
+    bench_asgi(max(1, args.n // 10))
+
+
+if __name__ == "__main__":
+    main()
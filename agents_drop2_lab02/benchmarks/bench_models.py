@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""Construction time and memory of pydantic-shim models.
+
+Compares the generated, slotted :class:`pydantic.BaseModel` with the
+previous shim (``setattr`` into a per-instance ``__dict__``, no
+validation), using the lab's ``InvokeRequest``/``InvokeResponse`` shapes.
+Construction and ``dict()`` are timed per call; memory is the ``tracemalloc``
+growth per live instance.  One JSON object per line::
+
+    python benchmarks/bench_models.py --repeat 200000
+"""
+
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Dict
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from pydantic import BaseModel  # noqa: E402
+
+
+class LegacyModel:
+    """The previous shim, verbatim in behaviour."""
+
+    def __init__(self, **data: Any):
+        for key, value in data.items():
+            setattr(self, key, value)
+
+    def dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+
+class InvokeRequest(BaseModel):
+    tool_name: str
+    arguments: Dict[str, Any]
+
+
+class InvokeResponse(BaseModel):
+    result: Any
+
+
+class LegacyInvokeRequest(LegacyModel):
+    tool_name: str
+    arguments: Dict[str, Any]
+
+
+class LegacyInvokeResponse(LegacyModel):
+    result: Any
+
+
+def _ns_per_call(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1e9
+
+
+def _bytes_per_instance(cls, payload: Dict[str, Any], count: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    keep = [cls(**payload) for _ in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    grown = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    del keep
+    return grown / count
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=200_000)
+    parser.add_argument("--instances", type=int, default=50_000)
+    args = parser.parse_args(argv)
+
+    request = {"tool_name": "calculator", "arguments": {"expression": "2 + 2"}}
+    response = {"result": 4}
+    cases = [
+        ("invoke_request", InvokeRequest, LegacyInvokeRequest, request),
+        ("invoke_response", InvokeResponse, LegacyInvokeResponse, response),
+    ]
+    for name, new, old, payload in cases:
+        for impl, cls in (("generated", new), ("legacy", old)):
+            obj = cls(**payload)
+            print(json.dumps({
+                "bench": name, "impl": impl,
+                "init_ns": round(_ns_per_call(lambda: cls(**payload), args.repeat), 1),
+                "dict_ns": round(_ns_per_call(obj.dict, args.repeat), 1),
+                "bytes_per_instance": round(_bytes_per_instance(cls, payload, args.instances), 1),
+            }))
+
+
+if __name__ == "__main__":
+    main()
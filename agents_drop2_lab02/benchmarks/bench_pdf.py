@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""Throughput benchmark for the pure-Python PDF extractor (mcp_stub.pdf).
+
+Generates a corpus of PDFs with :func:`mcp_stub.pdf.build_pdf` and measures:
+
+* ``cold``  — open + extract every page of every document;
+* ``lazy``  — open + extract only the last page (what a targeted request pays);
+* ``store`` — the same pages served again from :class:`PdfTextStore`.
+
+Results are printed as one JSON object per line::
+
+    python benchmarks/bench_pdf.py --docs 200 --pages 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from mcp_stub.pdf import PdfDocument, PdfTextStore, build_pdf  # noqa: E402
+
+WORDS = ("paciente pressão arterial dose diária insuficiência cardíaca renal hepática "
+         "guideline recomendação evidência nível classe tratamento diagnóstico exame").split()
+
+
+def make_corpus(directory: Path, docs: int, pages: int, words_per_page: int, seed: int = 0) -> list[Path]:
+    rng = random.Random(seed)
+    paths = []
+    for i in range(docs):
+        page_texts = []
+        for _ in range(pages):
+            words = [rng.choice(WORDS) for _ in range(words_per_page)]
+            page_texts.append("\n".join(" ".join(words[j:j + 12]) for j in range(0, len(words), 12)))
+        path = directory / f"doc_{i:05d}.pdf"
+        path.write_bytes(build_pdf(page_texts, object_streams=bool(i % 2)))
+        paths.append(path)
+    return paths
+
+
+def _report(name: str, seconds: float, pages: int, nbytes: int) -> None:
+    print(json.dumps({
+        "bench": name,
+        "seconds": round(seconds, 4),
+        "pages": pages,
+        "pages_per_s": round(pages / seconds, 1) if seconds else None,
+        "mb_per_s": round(nbytes / seconds / 1e6, 2) if seconds else None,
+    }))
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--docs", type=int, default=50)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--words", type=int, default=300, help="words per page")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        corpus = root / "corpus"
+        corpus.mkdir()
+        paths = make_corpus(corpus, args.docs, args.pages, args.words)
+        nbytes = sum(p.stat().st_size for p in paths)
+
+        start = time.perf_counter()
+        for path in paths:
+            with PdfDocument(path) as doc:
+                for _ in doc.iter_pages():
+                    pass
+        _report("cold", time.perf_counter() - start, args.docs * args.pages, nbytes)
+
+        start = time.perf_counter()
+        for path in paths:
+            with PdfDocument(path) as doc:
+                doc.page_text(doc.page_count - 1)
+        _report("lazy", time.perf_counter() - start, args.docs, 0)
+
+        store = PdfTextStore(root / "store")
+        for path in paths:
+            store.page_text(path, args.pages - 1)
+        fresh = PdfTextStore(root / "store")  # new process: only the on-disk store
+        start = time.perf_counter()
+        for path in paths:
+            fresh.page_text(path, args.pages - 1)
+        _report("store", time.perf_counter() - start, args.docs, 0)
+        assert fresh.extracted == 0
+
+
+if __name__ == "__main__":
+    main()
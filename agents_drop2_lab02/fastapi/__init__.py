@@ -5,8 +5,11 @@ implementation imports :mod:`fastapi`.  To keep the exercises focused on the
 Model Context Protocol instead of framework setup, we provide a very small
 subset of the FastAPI surface that is sufficient for the unit tests.  Only the
 behaviour required by ``labs/02_mcp/py/server.py`` is implemented: declaring
-``GET`` and ``POST`` routes and invoking them via the accompanying
-``TestClient``.
+``GET`` and ``POST`` routes (optionally with ``{name}`` path parameters, see
+:mod:`fastapi.routing`) and invoking them via the accompanying
+``TestClient``.  The app object is also an ASGI application — ``async def``
+handlers are awaited, sync ones run in a thread pool — and
+:mod:`fastapi.server` hosts it over HTTP/1.1 with the standard library.
 
 The goal of this shim is not to be feature complete—just ergonomic enough so
 the rest of the lab code reads naturally.  Students can later swap this module
@@ -15,30 +18,48 @@ for the real dependency without changing the server logic.
 
 from __future__ import annotations
 
-from typing import Any, Callable, Dict, Tuple
+import asyncio
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Iterator, List, Tuple, Union
 
+from .encoders import dumps, iter_json
+from .responses import Response
+from .routing import APIRoute, RequestValidationError, RouteHandler, Router, split_result
 
-RouteHandler = Callable[..., Any]
+logger = logging.getLogger("fastapi")
+
+Body = Union[bytes, Iterator[bytes]]
 
 
 class FastAPI:
     """Very small subset of the :class:`fastapi.FastAPI` interface.
 
     Only the functionality exercised by the tests is included: route
-    registration through ``@app.get`` and ``@app.post`` decorators.  The
-    returned callable is stored and later exercised by the simplified test
-    client.
+    registration through ``@app.get`` and ``@app.post`` decorators.  Each
+    handler is stored as an :class:`~fastapi.routing.APIRoute` with its call
+    plan and later exercised by the simplified test client.
     """
 
-    def __init__(self, title: str | None = None, description: str | None = None):
+    def __init__(self, title: str | None = None, description: str | None = None,
+                 max_workers: int | None = None):
         self.title = title
         self.description = description
-        self._routes: Dict[Tuple[str, str], RouteHandler] = {}
+        self.router = Router()
+        self.max_workers = max_workers or int(os.getenv("FASTAPI_THREADS", "0")) or min(32, (os.cpu_count() or 1) + 4)
+        self._executor: ThreadPoolExecutor | None = None
 
     def _register(self, method: str, path: str, func: RouteHandler) -> RouteHandler:
-        self._routes[(method.upper(), path)] = func
+        self.router.add(APIRoute(method.upper(), path, func))
         return func
 
+    def match(self, method: str, path: str) -> Tuple[APIRoute, Dict[str, str]] | None:
+        """``(route, path params)`` for ``method``/``path``, or ``None``."""
+        return self.router.match(method.upper(), path)
+
     def get(self, path: str, **_: Any) -> Callable[[RouteHandler], RouteHandler]:
         """Decorator used to register a ``GET`` handler."""
 
@@ -55,5 +76,99 @@ class FastAPI:
 
         return decorator
 
-
-__all__ = ["FastAPI"]
+    # --- ASGI ---------------------------------------------------------------
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            raise RuntimeError(f"unsupported ASGI scope type: {scope['type']}")
+        chunks, more = [], True
+        while more:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            more = message.get("more_body", False)
+        status, headers, body = await self.handle(scope["method"], scope["path"], b"".join(chunks))
+        if isinstance(body, bytes):
+            await send({"type": "http.response.start", "status": status, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+            return
+        # Streamed JSON: one chunk -> Content-Length; more -> chunked encoding.
+        chunks = iter(body)
+        try:
+            chunk = next(chunks, b"")
+        except Exception:
+            logger.exception("could not encode the response to %s %s", scope["method"], scope["path"])
+            status, headers, chunk = _error_response(500, "Internal Server Error")
+            chunks = iter(())
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        for following in chunks:
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+            chunk = following
+        await send({"type": "http.response.body", "body": chunk})
+
+    async def _lifespan(self, receive: Callable, send: Callable) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                    self._executor = None
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def handle(self, method: str, path: str, raw_body: bytes) -> Tuple[int, List[Tuple[bytes, bytes]], Body]:
+        """``(status, headers, body)`` for one request; used by :meth:`__call__`.
+
+        ``body`` is ``bytes`` for raw :class:`Response` results and an iterator
+        of UTF-8 JSON chunks (:func:`~fastapi.encoders.iter_json`) otherwise.
+        """
+        method = method.upper()
+        matched = self.router.match(method, path)
+        if matched is None:
+            if self.router.allowed_methods(path):
+                return _error_response(405, "Method Not Allowed")
+            return _error_response(404, "Not Found")
+        route, path_params = matched
+        try:
+            body = json.loads(raw_body) if raw_body else (None if method == "GET" else {})
+        except ValueError:
+            return _error_response(422, "invalid JSON body")
+        try:
+            if route.is_async:
+                result = await route.call(path_params, body)
+            else:
+                result = await asyncio.get_running_loop().run_in_executor(
+                    self._pool(), partial(route.call, path_params, body))
+        except RequestValidationError as exc:
+            return _error_response(422, str(exc))
+        except Exception:
+            logger.exception("unhandled error in %s %s", method, path)
+            return _error_response(500, "Internal Server Error")
+        status, payload = split_result(result)
+        if isinstance(payload, Response):
+            headers = [(k.lower().encode("latin-1"), v.encode("latin-1")) for k, v in payload.headers.items()]
+            if payload.media_type:
+                headers.append((b"content-type", payload.media_type.encode("latin-1")))
+            return status, headers, payload.body
+        return status, [_JSON], iter_json(payload)
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.max_workers, thread_name_prefix="fastapi")
+        return self._executor
+
+
+_JSON = (b"content-type", b"application/json")
+
+
+def _error_response(status: int, detail: str) -> Tuple[int, List[Tuple[bytes, bytes]], bytes]:
+    return status, [_JSON], dumps({"detail": detail})
+
+
+__all__ = ["FastAPI", "Response"]
@@ -0,0 +1,219 @@
+"""Subset of :mod:`fastapi.encoders` plus the shim's streaming JSON writer.
+
+:func:`jsonable_encoder` turns handler results into plain JSON data, as in
+FastAPI.  Responses, however, are not built that way any more: materialising
+the whole converted structure and then ``json.dumps(...).encode()`` holds two
+full copies of a large response in memory.  :func:`iter_json` encodes the
+value directly into UTF-8 chunks of about ``chunk_size`` bytes instead:
+
+* one dispatch table maps the exact type to its encoder — scalars return
+  their JSON text, lists/tuples, dicts and models walk their items — so
+  there is no ``isinstance`` chain per value; subclasses are resolved once
+  through the MRO and cached in the table;
+* models are read field by field (``model_fields``), never copied to a dict;
+* output is flushed every time the buffer reaches ``chunk_size``, so peak
+  memory is about one chunk whatever the size of the response;
+* containers being encoded are tracked by ``id`` (json's ``check_circular``),
+  so a value that contains itself raises ``ValueError`` instead of recursing.
+
+Servers send a response with ``Content-Length`` when it fits in one chunk and
+with chunked transfer encoding otherwise.  Output matches
+``json.dumps(value, ensure_ascii=False)``.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Dict, Iterator, List, Set
+
+from pydantic import BaseModel
+
+CHUNK_SIZE = 64 * 1024
+
+_encode_str = json.encoder.encode_basestring  # C-accelerated, ensure_ascii=False
+
+
+def jsonable_encoder(value: Any) -> Any:
+    """Models become dicts, recursively; everything else is left as-is."""
+    if isinstance(value, BaseModel):
+        return jsonable_encoder(value.dict())
+    if isinstance(value, list):
+        return [jsonable_encoder(item) for item in value]
+    if isinstance(value, dict):
+        return {key: jsonable_encoder(val) for key, val in value.items()}
+    return value
+
+
+class _Buffer:
+    """Pending text of the current chunk."""
+
+    __slots__ = ("parts", "size", "limit", "markers")
+
+    def __init__(self, limit: int):
+        self.parts: List[str] = []
+        self.size = 0
+        self.limit = limit
+        self.markers: Set[int] = set()  # ids of the containers open right now
+
+    def enter(self, value: Any) -> int:
+        marker = id(value)
+        if marker in self.markers:
+            raise ValueError("Circular reference detected")
+        self.markers.add(marker)
+        return marker
+
+    def flush(self) -> bytes:
+        data = "".join(self.parts).encode("utf-8")
+        self.parts.clear()  # in place: encoders keep a reference to the list
+        self.size = 0
+        return data
+
+
+def _float(value: float) -> str:
+    text = float.__repr__(value)
+    if text[-1] in "nf":  # nan / inf / -inf, spelled as json.dumps does
+        return {"nan": "NaN", "inf": "Infinity", "-inf": "-Infinity"}[text]
+    return text
+
+
+def _key(key: Any) -> str:
+    # same order as json.dumps: str subclasses (str-mixin enums too) are strings,
+    # bools before ints since bool is an int
+    if isinstance(key, str):
+        return _encode_str(key)
+    if key is True or key is False or key is None:
+        return '"%s"' % _SCALARS[type(key)](key)
+    if isinstance(key, (int, float)):
+        return '"%s"' % (int.__repr__(key) if isinstance(key, int) else _float(key))
+    raise TypeError(f"keys must be str, int, float, bool or None, not {type(key).__name__}")
+
+
+def _list(value: Any, buf: _Buffer) -> Iterator[bytes]:
+    marker = buf.enter(value)
+    parts = buf.parts
+    parts.append("[")
+    buf.size += 1
+    separator = ""
+    for item in value:
+        encode = _SCALARS.get(type(item))
+        if encode is not None:
+            text = encode(item)
+            parts.append(separator)
+            parts.append(text)
+            buf.size += len(text) + 2
+        else:
+            parts.append(separator)
+            yield from _walker(type(item))(item, buf)
+        separator = ", "
+        if buf.size >= buf.limit:
+            yield buf.flush()
+    parts.append("]")
+    buf.size += 1
+    buf.markers.discard(marker)
+
+
+def _dict(value: Dict[Any, Any], buf: _Buffer) -> Iterator[bytes]:
+    return _pairs(value, value.items(), buf)
+
+
+def _model(value: BaseModel, buf: _Buffer) -> Iterator[bytes]:
+    return _pairs(value, ((name, getattr(value, name)) for name in type(value).model_fields), buf)
+
+
+def _pairs(value: Any, items: Any, buf: _Buffer) -> Iterator[bytes]:
+    marker = buf.enter(value)
+    parts = buf.parts
+    parts.append("{")
+    buf.size += 1
+    separator = ""
+    for key, item in items:
+        key = _encode_str(key) if type(key) is str else _key(key)
+        encode = _SCALARS.get(type(item))
+        if encode is not None:
+            text = encode(item)
+            parts.append(f"{separator}{key}: {text}")
+            buf.size += len(key) + len(text) + 4
+        else:
+            parts.append(f"{separator}{key}: ")
+            buf.size += len(key) + 4
+            yield from _walker(type(item))(item, buf)
+        separator = ", "
+        if buf.size >= buf.limit:
+            yield buf.flush()
+    parts.append("}")
+    buf.size += 1
+    buf.markers.discard(marker)
+
+
+def _scalar(encode: Callable[[Any], str]) -> Callable[[Any, _Buffer], Iterator[bytes]]:
+    def walk(value: Any, buf: _Buffer) -> Iterator[bytes]:
+        text = encode(value)
+        buf.parts.append(text)
+        buf.size += len(text)
+        return iter(())
+    return walk
+
+
+# exact type -> JSON text (no nested values)
+_SCALARS: Dict[type, Callable[[Any], str]] = {
+    str: _encode_str,
+    int: int.__repr__,
+    float: _float,
+    bool: lambda value: "true" if value else "false",
+    type(None): lambda value: "null",
+}
+# exact type -> generator appending to the buffer (yields full chunks)
+_WALKERS: Dict[type, Callable[[Any, _Buffer], Iterator[bytes]]] = {
+    list: _list,
+    tuple: _list,
+    dict: _dict,
+    BaseModel: _model,
+}
+
+
+def _walker(cls: type) -> Callable[[Any, _Buffer], Iterator[bytes]]:
+    walker = _WALKERS.get(cls)
+    if walker is None:
+        for base in cls.__mro__[1:]:  # subclasses: resolve once, then cache
+            if base in _SCALARS:
+                walker = _scalar(_SCALARS[base])
+                break
+            if base in _WALKERS:
+                walker = _WALKERS[base]
+                break
+        else:
+            raise TypeError(f"Object of type {cls.__name__} is not JSON serializable")
+        _WALKERS[cls] = walker
+    return walker
+
+
+def iter_json(value: Any, chunk_size: int = CHUNK_SIZE) -> Iterator[bytes]:
+    """Encode ``value`` as UTF-8 JSON, yielding chunks of about ``chunk_size`` bytes.
+
+    The last chunk may be shorter; an empty value never yields ``b""``.
+    """
+    buf = _Buffer(chunk_size)
+    encode = _SCALARS.get(type(value))
+    if encode is not None:
+        yield encode(value).encode("utf-8")
+        return
+    yield from _walker(type(value))(value, buf)
+    if buf.parts:
+        yield buf.flush()
+
+
+def write_json(value: Any, write: Callable[[bytes], Any], chunk_size: int = CHUNK_SIZE) -> int:
+    """Stream ``value`` into ``write`` (e.g. ``wfile.write``); returns the bytes written."""
+    total = 0
+    for chunk in iter_json(value, chunk_size):
+        write(chunk)
+        total += len(chunk)
+    return total
+
+
+def dumps(value: Any) -> bytes:
+    """The whole document as one ``bytes`` object."""
+    return b"".join(iter_json(value, 1 << 62))
+
+
+__all__ = ["CHUNK_SIZE", "dumps", "iter_json", "jsonable_encoder", "write_json"]
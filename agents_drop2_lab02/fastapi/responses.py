@@ -0,0 +1,27 @@
+"""Subset of :mod:`fastapi.responses` used by the lab.
+
+Handlers normally return plain data that the framework serialises.  A
+:class:`Response` lets a handler send bytes it already has — for example a
+payload serialised once and cached — without another encoding pass.
+"""
+
+from __future__ import annotations
+
+from typing import Dict
+
+
+class Response:
+    """Raw response: ``content`` is sent as-is with ``media_type``."""
+
+    media_type: str | None = None
+
+    def __init__(self, content: bytes | str = b"", status_code: int = 200,
+                 headers: Dict[str, str] | None = None, media_type: str | None = None):
+        self.body = content.encode("utf-8") if isinstance(content, str) else bytes(content)
+        self.status_code = status_code
+        self.headers = dict(headers or {})
+        if media_type is not None:
+            self.media_type = media_type
+
+
+__all__ = ["Response"]
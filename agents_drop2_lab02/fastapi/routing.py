@@ -0,0 +1,211 @@
+"""Route matching and per-handler call plans for the FastAPI shim.
+
+Routes without parameters are found with one dictionary lookup.  Routes with
+``{name}`` (one path segment) or ``{name:path}`` (the rest of the path)
+placeholders are bucketed by method and first path segment, and each bucket
+is compiled into a single alternation regex; the branch that matched is read
+from ``match.lastgroup``, so adding routes does not add per-request loops.
+
+Each :class:`APIRoute` inspects its handler once, at registration, and keeps
+a *call plan*: which parameters come from the path (with their converter),
+which one receives the request body (a :class:`pydantic.BaseModel` built from
+it, or the raw JSON), and which are injected with their default (or
+``None``).  The plan is generated into a small function, so calling a route
+is a direct call of the handler with its arguments already wired (for an
+``async def`` handler the call returns the coroutine to await).
+"""
+
+from __future__ import annotations
+
+import inspect
+import re
+import typing
+from typing import Any, Callable, Dict, List, Tuple
+
+from pydantic import BaseModel, ValidationError
+
+from .responses import Response
+
+RouteHandler = Callable[..., Any]
+
+_PARAM = re.compile(r"{([A-Za-z_][A-Za-z0-9_]*)(?::(path))?}")
+_CONVERTERS: Dict[Any, Callable[[str], Any]] = {int: int, float: float}
+
+
+class RequestValidationError(ValueError):
+    """A path parameter or the body did not match the handler's signature."""
+
+
+def compile_path(path: str) -> Tuple[str, List[str]]:
+    """``(regex source, parameter names)`` for a route path.
+
+    ``/tools/{name}/invoke`` -> ``/tools/(?P<name>[^/]+)/invoke``.
+    """
+    names, pattern, pos = [], [], 0
+    for match in _PARAM.finditer(path):
+        pattern.append(re.escape(path[pos:match.start()]))
+        names.append(match.group(1))
+        pattern.append(f"(?P<{match.group(1)}>{'.+' if match.group(2) else '[^/]+'})")
+        pos = match.end()
+    pattern.append(re.escape(path[pos:]))
+    return "".join(pattern), names
+
+
+def _is_model(annotation: Any) -> bool:
+    return isinstance(annotation, type) and issubclass(annotation, BaseModel)
+
+
+class APIRoute:
+    """One registered handler plus its call plan."""
+
+    def __init__(self, method: str, path: str, endpoint: RouteHandler):
+        self.method = method
+        self.path = path
+        self.endpoint = endpoint
+        self.pattern, self.param_names = compile_path(path)
+        self.is_async = inspect.iscoroutinefunction(endpoint)
+        self.plan = self._build_plan()
+        #: ``call(path_params, body)`` runs the handler for a matched request
+        self.call = self._compile_call()
+
+    def _build_plan(self) -> List[Tuple[str, str, Any]]:
+        """``[(kind, name, extra), ...]`` in handler parameter order.
+
+        ``kind`` is ``"path"`` (``extra`` = converter or ``None``), ``"model"``
+        (``extra`` = model class), ``"body"`` (raw JSON) or ``"inject"``
+        (``extra`` = value passed).
+        """
+        try:
+            hints = typing.get_type_hints(self.endpoint)
+        except Exception:  # unresolved forward references: fall back to raw annotations
+            hints = {}
+        plan, body_taken = [], False
+        for param in inspect.signature(self.endpoint).parameters.values():
+            annotation = hints.get(param.name, param.annotation)
+            if param.name in self.param_names:
+                plan.append(("path", param.name, _CONVERTERS.get(annotation)))
+            elif _is_model(annotation) and not body_taken:
+                plan.append(("model", param.name, annotation))
+                body_taken = True
+            elif not body_taken and self.method != "GET":
+                plan.append(("body", param.name, None))
+                body_taken = True
+            else:
+                default = None if param.default is param.empty else param.default
+                plan.append(("inject", param.name, default))
+        return plan
+
+    def _compile_call(self) -> Callable[[Dict[str, str], Any], Any]:
+        """Turn the plan into one generated function: no per-request branching."""
+        namespace: Dict[str, Any] = {"_endpoint": self.endpoint, "_model": _model, "_convert": _convert}
+        exprs = []
+        for i, (kind, name, extra) in enumerate(self.plan):
+            namespace[f"_x{i}"] = extra
+            if kind == "model":
+                exprs.append(f"_model(_x{i}, body)")
+            elif kind == "path":
+                exprs.append(f"path_params[{name!r}]" if extra is None
+                             else f"_convert(_x{i}, path_params, {name!r})")
+            elif kind == "body":
+                exprs.append("{} if body is None else body")
+            else:
+                exprs.append(f"_x{i}")
+        source = f"def call(path_params, body=None):\n    return _endpoint({', '.join(exprs)})\n"
+        exec(compile(source, f"<route {self.method} {self.path}>", "exec"), namespace)
+        return namespace["call"]
+
+
+def split_result(result: Any) -> Tuple[int, Any]:
+    """``(status, payload)``: handlers may return ``(payload, status)``."""
+    if isinstance(result, Response):
+        return result.status_code, result
+    if isinstance(result, tuple) and len(result) == 2 and isinstance(result[1], int):
+        return result[1], result[0]
+    return 200, result
+
+
+def _object(body: Any) -> Dict[str, Any]:
+    if not isinstance(body, dict):
+        raise RequestValidationError("request body must be a JSON object")
+    return body
+
+
+def _model(model: type, body: Any) -> BaseModel:
+    try:
+        return model(**_object(body))
+    except ValidationError as exc:
+        raise RequestValidationError(str(exc)) from None
+
+
+def _convert(converter: Callable[[str], Any], path_params: Dict[str, str], name: str) -> Any:
+    value = path_params[name]
+    try:
+        return converter(value)
+    except ValueError:
+        raise RequestValidationError(f"invalid path parameter {name!r}: {value!r}") from None
+
+
+def _first_segment(path: str) -> str:
+    return path[1:].split("/", 1)[0] if path.startswith("/") else ""
+
+
+class Router:
+    """Static-path dictionary plus compiled regexes for parameter routes.
+
+    Parameter routes are bucketed by (method, first path segment) — a
+    one-level radix split — and each bucket is one alternation regex, so a
+    request only tries the routes that share its first segment.  Routes
+    whose first segment is itself a parameter live in the ``""`` bucket,
+    tried after the specific one.
+    """
+
+    def __init__(self) -> None:
+        self.routes: List[APIRoute] = []
+        self._static: Dict[Tuple[str, str], APIRoute] = {}
+        self._dynamic: Dict[Tuple[str, str], List[APIRoute]] = {}
+        self._compiled: Dict[Tuple[str, str], Any] = {}
+
+    def add(self, route: APIRoute) -> APIRoute:
+        self.routes.append(route)
+        if route.param_names:
+            segment = _first_segment(route.path)
+            key = (route.method, "" if "{" in segment else segment)
+            self._dynamic.setdefault(key, []).append(route)
+            self._compiled.pop(key, None)
+        else:
+            self._static[(route.method, route.path)] = route
+        return route
+
+    def _regex(self, key: Tuple[str, str]):
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            routes = self._dynamic.get(key, [])
+            # group names must be unique across branches: prefix them per route
+            branches = [f"(?P<r{i}>{re.sub(r'[(][?]P<', f'(?P<r{i}_', r.pattern)})"
+                        for i, r in enumerate(routes)]
+            regex = re.compile("(?:%s)$" % "|".join(branches)) if branches else None
+            compiled = self._compiled[key] = (regex, routes)
+        return compiled
+
+    def match(self, method: str, path: str) -> Tuple[APIRoute, Dict[str, str]] | None:
+        """``(route, path params)`` for a request, or ``None``."""
+        route = self._static.get((method, path))
+        if route is not None:
+            return route, {}
+        for key in ((method, _first_segment(path)), (method, "")):
+            regex, routes = self._regex(key)
+            m = regex.match(path) if regex is not None else None
+            if m is not None:
+                index = int(m.lastgroup[1:])
+                route = routes[index]
+                prefix = f"r{index}_"
+                return route, {name: m.group(prefix + name) for name in route.param_names}
+        return None
+
+    def allowed_methods(self, path: str) -> List[str]:
+        """Methods that have a route for ``path`` (for ``405`` responses)."""
+        methods = {r.method for r in self.routes}
+        return sorted(m for m in methods if self.match(m, path) is not None)
+
+
+__all__ = ["APIRoute", "RequestValidationError", "Router", "compile_path", "split_result"]
@@ -0,0 +1,304 @@
+"""Small asyncio HTTP/1.1 server for ASGI apps (standard library only).
+
+Enough to put the shim app — or any ASGI 3 application — under real load
+without installing uvicorn:
+
+* persistent connections (HTTP/1.1 keep-alive, idle timeout);
+* request bodies by ``Content-Length`` or ``Transfer-Encoding: chunked``;
+* responses with ``Content-Length`` when the app sends the body in one
+  message, chunked transfer encoding when it streams (HTTP/1.0 clients get
+  the stream unframed, ended by closing the connection);
+* limits on header and body size (``431`` / ``413``).
+
+Run an app from the command line::
+
+    python -m fastapi.server labs/02_mcp/py/server.py:app --port 8000
+
+or from code with :func:`run` / :class:`Server`.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import importlib
+import importlib.util
+import logging
+import signal
+import sys
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import unquote
+
+logger = logging.getLogger("fastapi.server")
+
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 16 * 1024 * 1024
+KEEPALIVE = 5.0
+_HEX_DIGITS = b"0123456789abcdefABCDEF"
+
+
+class _BadRequest(Exception):
+    def __init__(self, status: int, reason: str = ""):
+        super().__init__(reason)
+        self.status = status
+
+
+class Server:
+    """Serve ``app`` on ``host``:``port`` (``port=0`` picks a free port)."""
+
+    def __init__(self, app: Callable, host: str = "127.0.0.1", port: int = 8000,
+                 keepalive: float = KEEPALIVE, max_body: int = MAX_BODY_BYTES):
+        self.app = app
+        self.host = host
+        self.port = port
+        self.keepalive = keepalive
+        self.max_body = max_body
+        self._server: asyncio.AbstractServer | None = None
+        self._connections: set = set()
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._connection, self.host, self.port,
+                                                  limit=MAX_HEADER_BYTES)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self) -> None:
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def close(self) -> None:
+        """Stop accepting connections (open ones finish their request)."""
+        if self._server is not None:
+            self._server.close()
+
+    async def shutdown(self) -> None:
+        """Stop accepting and cancel the open connections."""
+        self.close()
+        tasks = list(self._connections)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    # --- one connection ------------------------------------------------------
+
+    async def _connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        peer = writer.get_extra_info("peername")
+        sock = writer.get_extra_info("sockname")
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.keepalive)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await _simple(writer, 431)
+                    return
+                try:
+                    scope, keep_alive, body = await self._request(reader, head, peer, sock)
+                except _BadRequest as exc:
+                    await _simple(writer, exc.status)
+                    return
+                if not await self._run_app(scope, body, writer, keep_alive) or not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _request(self, reader: asyncio.StreamReader, head: bytes, peer: Any, sock: Any):
+        lines = head[:-4].split(b"\r\n")
+        try:
+            method, target, version = lines[0].decode("latin-1").split(" ")
+        except ValueError:
+            raise _BadRequest(400) from None
+        if version not in ("HTTP/1.1", "HTTP/1.0"):
+            raise _BadRequest(505)
+        headers: List[Tuple[bytes, bytes]] = []
+        for line in lines[1:]:
+            name, sep, value = line.partition(b":")
+            if not sep:
+                raise _BadRequest(400)
+            headers.append((name.strip().lower(), value.strip()))
+        fields = dict(headers)
+        connection = fields.get(b"connection", b"").lower()
+        keep_alive = connection != b"close" if version == "HTTP/1.1" else connection == b"keep-alive"
+
+        if fields.get(b"transfer-encoding", b"").lower() == b"chunked":
+            body = await self._read_chunked(reader)
+        else:
+            value = fields.get(b"content-length", b"0")
+            if not value.isdigit():  # digits only: no sign, no spaces
+                raise _BadRequest(400)
+            length = int(value)
+            if length > self.max_body:
+                raise _BadRequest(413)
+            body = await reader.readexactly(length) if length else b""
+
+        path, _, query = target.partition("?")
+        scope = {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": version[5:],
+            "method": method.upper(), "scheme": "http", "path": unquote(path),
+            "raw_path": path.encode("latin-1"), "query_string": query.encode("latin-1"),
+            "root_path": "", "headers": headers, "client": peer, "server": sock,
+        }
+        return scope, keep_alive, body
+
+    async def _read_chunked(self, reader: asyncio.StreamReader) -> bytes:
+        try:
+            return await self._read_chunks(reader)
+        except (asyncio.LimitOverrunError, asyncio.IncompleteReadError):
+            raise _BadRequest(400) from None  # size line past the stream limit, or body cut short
+
+    async def _read_chunks(self, reader: asyncio.StreamReader) -> bytes:
+        chunks, total = [], 0
+        while True:
+            size_line = await reader.readuntil(b"\r\n")
+            digits = size_line[:-2].split(b";", 1)[0]
+            if not digits or digits.strip(_HEX_DIGITS):  # hex digits only: no sign, no spaces
+                raise _BadRequest(400)
+            size = int(digits, 16)
+            if size == 0:
+                # trailers are not supported: expect the final CRLF
+                if await reader.readuntil(b"\r\n") != b"\r\n":
+                    raise _BadRequest(400)
+                return b"".join(chunks)
+            total += size
+            if total > self.max_body:
+                raise _BadRequest(413)
+            chunks.append(await reader.readexactly(size))
+            if await reader.readexactly(2) != b"\r\n":
+                raise _BadRequest(400)
+
+    async def _run_app(self, scope: Dict[str, Any], body: bytes,
+                       writer: asyncio.StreamWriter, keep_alive: bool) -> bool:
+        """Run one request through the app; ``False`` if the connection cannot be reused."""
+        received = False
+        state: Dict[str, Any] = {"headers_sent": False, "chunked": False, "done": False, "status": 200,
+                                 "headers": [], "close": not keep_alive}
+
+        async def receive() -> Dict[str, Any]:
+            nonlocal received
+            if not received:
+                received = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            await asyncio.Future()  # nothing else will arrive: wait until cancelled
+
+        async def send(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                state["status"] = message["status"]
+                state["headers"] = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                chunk = message.get("body", b"")
+                more = message.get("more_body", False)
+                if not state["headers_sent"]:
+                    headers = state["headers"]
+                    names = {name.lower() for name, _ in headers}
+                    if b"content-length" not in names:
+                        if not more:
+                            headers.append((b"content-length", str(len(chunk)).encode()))
+                        elif scope["http_version"] == "1.1":
+                            headers.append((b"transfer-encoding", b"chunked"))
+                            state["chunked"] = True
+                        else:
+                            # HTTP/1.0 has no chunked encoding: closing the connection ends the body
+                            state["close"] = True
+                    if state["close"]:
+                        headers.append((b"connection", b"close"))
+                    writer.write(_status_line(state["status"]) + b"".join(
+                        name + b": " + value + b"\r\n" for name, value in headers) + b"\r\n")
+                    state["headers_sent"] = True
+                if state["chunked"]:
+                    if chunk:
+                        writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                    if not more:
+                        writer.write(b"0\r\n\r\n")
+                else:
+                    writer.write(chunk)
+                if not more:
+                    state["done"] = True
+                await writer.drain()  # backpressure: wait while the socket buffer is full
+
+        try:
+            await self.app(scope, receive, send)
+        except Exception:
+            logger.exception("ASGI app raised")
+            if not state["headers_sent"]:
+                await _simple(writer, 500)
+            return False
+        return state["done"] and not state["close"]
+
+
+def _status_line(status: int) -> bytes:
+    try:
+        reason = HTTPStatus(status).phrase
+    except ValueError:
+        reason = ""
+    return f"HTTP/1.1 {status} {reason}\r\n".encode("latin-1")
+
+
+async def _simple(writer: asyncio.StreamWriter, status: int) -> None:
+    writer.write(_status_line(status) + b"content-length: 0\r\nconnection: close\r\n\r\n")
+    try:
+        await writer.drain()
+    except ConnectionError:
+        pass
+
+
+def run(app: Callable, host: str = "127.0.0.1", port: int = 8000, **kwargs: Any) -> None:
+    """Serve ``app`` until SIGINT/SIGTERM."""
+
+    async def main() -> None:
+        server = Server(app, host, port, **kwargs)
+        await server.start()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, lambda: loop.create_task(server.shutdown()))
+            except (NotImplementedError, RuntimeError):
+                pass
+        print(f"Servindo em http://{host}:{server.port}", file=sys.stderr)
+        try:
+            await server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+
+    asyncio.run(main())
+
+
+def load_app(target: str) -> Callable:
+    """``module:attr`` or ``path/to/file.py:attr`` -> the ASGI app."""
+    location, _, attr = target.partition(":")
+    attr = attr or "app"
+    if location.endswith(".py"):
+        path = Path(location).resolve()
+        sys.path.insert(0, str(path.parent))
+        spec = importlib.util.spec_from_file_location(path.stem, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[path.stem] = module
+        spec.loader.exec_module(module)
+    else:
+        module = importlib.import_module(location)
+    return getattr(module, attr)
+
+
+def main(argv: List[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve an ASGI app over HTTP/1.1.")
+    parser.add_argument("app", help="module:attr ou caminho/arquivo.py:attr")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--keepalive", type=float, default=KEEPALIVE)
+    args = parser.parse_args(argv)
+    run(load_app(args.app), args.host, args.port, keepalive=args.keepalive)
+
+
+__all__ = ["Server", "load_app", "run"]
+
+
+if __name__ == "__main__":
+    main()
@@ -3,90 +3,73 @@
 Only the behaviour required by the unit tests is implemented.  The test client
 invokes the in-memory handlers registered by :class:`fastapi.FastAPI` and
 returns lightweight response objects that mimic ``requests.Response`` enough
-for ``response.status_code`` and ``response.json()`` usages.
+for ``response.status_code``, ``response.content`` and ``response.json()``
+usages.  Results are encoded with the same streaming serializer the ASGI
+app uses, so tests see the bytes a real client would receive.
 """
 
 from __future__ import annotations
 
-import inspect
-from typing import Any, Dict, Iterable, Tuple
+import asyncio
+import json as _json
+from typing import Any, Dict
 
-from . import FastAPI
-from pydantic import BaseModel
+from . import FastAPI, Response
+from .encoders import dumps as _serialise
+from .routing import RequestValidationError, split_result
 
 
 class _Response:
     """Minimal response object returned by :class:`TestClient`."""
 
-    def __init__(self, status_code: int, data: Any):
+    def __init__(self, status_code: int, content: bytes):
         self.status_code = status_code
-        self._data = data
+        self.content = content
 
     def json(self) -> Any:
-        return self._data
+        return _json.loads(self.content)
 
 
 class TestClient:
     """Tiny subset of the real :class:`fastapi.testclient.TestClient`."""
 
+    __test__ = False  # not a pytest test class despite the name
+
     def __init__(self, app: FastAPI):
         self.app = app
 
     def get(self, path: str, **_: Any) -> _Response:
-        handler = self._resolve("GET", path)
-        if handler is None:
-            return _Response(404, {"detail": "Not Found"})
-        return self._execute(handler, ())
+        return self._request("GET", path, None)
 
     def post(self, path: str, json: Dict[str, Any] | None = None, **_: Any) -> _Response:
-        handler = self._resolve("POST", path)
-        if handler is None:
-            return _Response(404, {"detail": "Not Found"})
-        json_payload = json or {}
-        return self._execute(handler, (json_payload,))
+        return self._request("POST", path, json or {})
 
     # --- Internal helpers -------------------------------------------------
 
-    def _resolve(self, method: str, path: str):
-        return self.app._routes.get((method.upper(), path))
-
-    def _execute(self, handler, args: Iterable[Any]) -> _Response:
-        parameters = list(inspect.signature(handler).parameters.values())
-        call_args = []
-
-        for provided_arg, parameter in zip(args, parameters):
-            annotation = parameter.annotation
-            if isinstance(annotation, type) and issubclass(annotation, BaseModel):
-                call_args.append(annotation(**provided_arg))
-            else:
-                call_args.append(provided_arg)
-
-        # If handler expects more parameters than payload provided (e.g. depends
-        # injection) we simply fill with ``None`` to keep the stub predictable.
-        if len(parameters) > len(call_args):
-            call_args.extend([None] * (len(parameters) - len(call_args)))
-
-        result = handler(*call_args)
-        status_code = 200
-
-        # Normalise the result into a JSON-serialisable representation.
-        if isinstance(result, Tuple) and len(result) == 2 and isinstance(result[1], int):
-            payload, status_code = result
-        else:
-            payload = result
-
-        payload = _serialise(payload)
-        return _Response(status_code, payload)
-
-
-def _serialise(value: Any) -> Any:
-    if isinstance(value, BaseModel):
-        return value.dict()
-    if isinstance(value, list):
-        return [_serialise(item) for item in value]
-    if isinstance(value, dict):
-        return {key: _serialise(val) for key, val in value.items()}
-    return value
+    def _request(self, method: str, path: str, body: Any) -> _Response:
+        matched = self.app.match(method, path)
+        if matched is None:
+            if self.app.router.allowed_methods(path):
+                return _Response(405, _serialise({"detail": "Method Not Allowed"}))
+            return _Response(404, _serialise({"detail": "Not Found"}))
+        route, path_params = matched
+        # The route's call plan (built at registration) wires path
+        # parameters, the body model and injected defaults.
+        try:
+            result = route.call(path_params, body)
+            if route.is_async:
+                result = asyncio.run(result)
+        except RequestValidationError as exc:
+            return _Response(422, _serialise({"detail": str(exc)}))
+        return self._finish(result)
+
+    def _finish(self, result: Any) -> _Response:
+        status_code, payload = split_result(result)
+
+        # Raw responses carry bytes that are already encoded.
+        if isinstance(payload, Response):
+            return _Response(status_code, payload.body)
+        return _Response(status_code, _serialise(payload))
 
 
 __all__ = ["TestClient"]
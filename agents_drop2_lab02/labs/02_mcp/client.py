@@ -1,37 +1,209 @@
 #!/usr/bin/env python3
-import os, sys, subprocess, time, json
+import os, sys, subprocess, time, json, random, select, threading
+import http.client
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from urllib.request import urlopen, Request
-from urllib.error import URLError
+from urllib.parse import urlparse
 
 ROOT = Path(__file__).resolve().parents[2]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+if str(ROOT.parent) not in sys.path:
+    sys.path.append(str(ROOT.parent))  # raiz do repositório: shared/
+from shared.profiling import session, span
+
 OUT = ROOT / "labs" / "02_mcp" / "outputs"
-OUT.mkdir(parents=True, exist_ok=True)
 
 PORT = int(os.getenv("MCP_PORT","8765"))
 BASE = f"http://127.0.0.1:{PORT}"
 
+# status que valem nova tentativa (além de erros de conexão/timeout)
+RETRY_STATUS = {502, 503, 504}
+# métodos que podem rodar duas vezes sem efeito extra: só eles são repetidos
+# quando a falha vem depois de a requisição sair
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+class MCPError(Exception):
+    def __init__(self, status, payload):
+        super().__init__(f"HTTP {status}: {payload}")
+        self.status = status
+        self.payload = payload
+
+class PoolTimeout(TimeoutError):
+    """Nenhuma conexão do pool ficou livre dentro do timeout da chamada."""
+
+def _dropped(conn):
+    # conexão ociosa com algo para ler: o servidor fechou (ou mandou lixo)
+    try:
+        return bool(select.select([conn.sock], [], [], 0)[0])
+    except (OSError, ValueError):
+        return True
+
+class MCPClient:
+    """Cliente HTTP reutilizável para o servidor MCP.
+
+    Mantém até ``pool_size`` conexões keep-alive (``http.client``), cada uma
+    com uma requisição por vez (sem pipelining), e aplica o timeout da
+    chamada também à espera por uma conexão livre. Falhas ao conectar e 5xx
+    transitórios são refeitos com backoff exponencial; um erro de rede
+    depois de a requisição sair só é refeito em métodos idempotentes (um
+    POST pode ter sido executado). ``map``/``gather`` executam várias tools
+    em paralelo, limitadas pelo tamanho do pool.
+    """
+
+    def __init__(self, base=BASE, pool_size=8, timeout=10.0, retries=2, backoff=0.1):
+        url = urlparse(base)
+        self.host = url.hostname
+        self.port = url.port or 80
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._idle = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(pool_size)
+
+    # --- pool de conexões ---
+
+    def _acquire(self, timeout):
+        """``(conexão aberta, reaproveitada?)``; espera uma vaga por até ``timeout`` segundos."""
+        if not self._slots.acquire(timeout=timeout):
+            raise PoolTimeout(f"nenhuma das {self.pool_size} conexões ficou livre em {timeout}s")
+        try:
+            with self._lock:
+                idle, conn = self._idle, None
+                while idle and conn is None:
+                    conn = idle.pop()
+                    if _dropped(conn):
+                        conn.close()
+                        conn = None
+            reused = conn is not None
+            if reused:
+                conn.sock.settimeout(timeout)
+            else:
+                conn = http.client.HTTPConnection(self.host, self.port, timeout=timeout)
+                conn.connect()
+            conn.timeout = timeout
+            return conn, reused
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, conn, reusable):
+        if reusable:
+            with self._lock:
+                self._idle.append(conn)
+        else:
+            conn.close()
+        self._slots.release()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- requisições ---
+
+    def _once(self, conn, reused, method, path, body):
+        reusable = False
+        try:
+            headers = {"Content-Type": "application/json"} if body is not None else {}
+            with span("attempt", cat="http", reused=reused) as s:
+                conn.request(method, path, body=body, headers=headers)
+                r = conn.getresponse()
+                raw = r.read()
+                s.set(status=r.status, bytes=len(raw))
+            reusable = not r.will_close
+            return r.status, json.loads(raw.decode("utf-8") or "null")
+        finally:
+            self._release(conn, reusable)
+
+    def request(self, method, path, payload=None, timeout=None, retries=None):
+        body = json.dumps(payload).encode("utf-8") if payload is not None else None
+        timeout = self.timeout if timeout is None else timeout
+        retries = self.retries if retries is None else retries
+        with span(f"{method} {path}", cat="http"):
+            return self._request(method, path, body, timeout, retries)
+
+    def _request(self, method, path, body, timeout, retries):
+        for attempt in range(retries + 1):
+            try:
+                conn, reused = self._acquire(timeout)
+            except PoolTimeout:
+                raise
+            except OSError:
+                # não conectou: a requisição não saiu, pode repetir qualquer método
+                if attempt == retries:
+                    raise
+            else:
+                try:
+                    status, data = self._once(conn, reused, method, path, body)
+                except (OSError, http.client.HTTPException):
+                    if attempt == retries or method not in IDEMPOTENT_METHODS:
+                        raise
+                else:
+                    if status < 400:
+                        return data
+                    if status not in RETRY_STATUS or attempt == retries:
+                        raise MCPError(status, data)
+            time.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+
+    def get(self, path, **kw):
+        return self.request("GET", path, **kw)
+
+    def post(self, path, payload, **kw):
+        return self.request("POST", path, payload, **kw)
+
+    def call_tool(self, name, arguments=None, **kw):
+        return self.post(f"/tools/{name}", arguments or {}, **kw)
+
+    def gather(self, calls, concurrency=None, return_exceptions=False, **kw):
+        """Executa ``[(tool, arguments), ...]`` em paralelo; resultados na mesma ordem."""
+        calls = list(calls)
+        if not calls:
+            return []
+        workers = min(concurrency or self.pool_size, self.pool_size, len(calls))
+
+        def run(call):
+            name, arguments = call
+            try:
+                return self.call_tool(name, arguments, **kw)
+            except Exception as e:
+                if return_exceptions:
+                    return e
+                raise
+
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            return list(ex.map(run, calls))
+
+    def map(self, name, arguments_list, **kw):
+        return self.gather(((name, arguments) for arguments in arguments_list), **kw)
+
+_default = MCPClient()
+
 def http_get(path):
-    with urlopen(BASE+path) as r:
-        return json.loads(r.read().decode("utf-8"))
+    return _default.get(path)
 
 def http_post(path, payload):
-    data = json.dumps(payload).encode("utf-8")
-    req = Request(BASE+path, data=data, headers={"Content-Type":"application/json"})
-    with urlopen(req) as r:
-        return json.loads(r.read().decode("utf-8"))
+    return _default.post(path, payload)
 
-def main():
-    # start server
-    server = subprocess.Popen([sys.executable, str(ROOT / "labs" / "02_mcp" / "server.py")])
+def run(client, server):
     # wait for server
     ok=False
-    for _ in range(30):
-        try:
-            health = http_get("/health")
-            if health.get("ok"): ok=True; break
-        except URLError:
-            time.sleep(0.1)
+    with span("wait_server"):
+        for _ in range(30):
+            try:
+                health = client.get("/health", retries=0)
+                if health.get("ok"): ok=True; break
+            except (OSError, http.client.HTTPException):  # ex.: BadStatusLine durante o boot
+                time.sleep(0.1)
     if not ok:
         server.terminate()
         raise SystemExit("server did not start")
@@ -39,25 +211,41 @@ def main():
     # call tools
     log = []
     log.append({"type":"health", "data": health})
-    files = http_post("/tools/list_pdfs", {})
+    with span("list_pdfs"):
+        files = client.call_tool("list_pdfs")
     log.append({"type":"list_pdfs", "data": files})
-    # summarize first file
-    first = files["files"][0]
-    summ = http_post("/tools/summarize_pdf", {"path": f"labs/02_mcp/assets/pdfs/{first}", "max_words": 10})
-    log.append({"type":"summarize_pdf", "data": summ})
+    # summarize every file in parallel
+    with span("summarize_all", files=len(files["files"])):
+        summaries = client.map("summarize_pdf", [
+            {"path": f"labs/02_mcp/assets/pdfs/{name}", "max_words": 10} for name in files["files"]
+        ])
+    for summ in summaries:
+        log.append({"type":"summarize_pdf", "data": summ})
 
     # write outputs
     out = OUT / "session.jsonl"
-    with out.open("w", encoding="utf-8") as f:
+    with span("write_outputs"), out.open("w", encoding="utf-8") as f:
         for item in log:
             f.write(json.dumps(item, ensure_ascii=False)+"\n")
+    return out
 
-    # shutdown
-    try:
-        http_post("/shutdown", {})
-    except Exception:
-        pass
-    server.wait(timeout=2)
+def main():
+    # AGENTS_PROFILE=spans|cprofile: o servidor herda a variável e grava o seu
+    # próprio perfil (outputs/profile/server.*) ao receber /shutdown
+    OUT.mkdir(parents=True, exist_ok=True)
+    with session("client", OUT):
+        # start server
+        server = subprocess.Popen([sys.executable, str(ROOT / "labs" / "02_mcp" / "server.py")])
+        client = MCPClient()
+        out = run(client, server)
+
+        # shutdown
+        try:
+            client.post("/shutdown", {}, retries=0)
+        except Exception:
+            pass
+        client.close()
+        server.wait(timeout=2)
     print(str(out))
 
 if __name__ == "__main__":
@@ -1,13 +1,54 @@
 # py/server.py
-from fastapi import FastAPI
+import math
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+
+# Raiz do Drop 2: shims de fastapi/pydantic e o pacote mcp_stub
+ROOT = Path(__file__).resolve().parents[3]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+if str(ROOT.parent) not in sys.path:
+    sys.path.append(str(ROOT.parent))  # raiz do repositório: shared/
+
+from fastapi import FastAPI, Response
 from pydantic import BaseModel
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+
+from mcp_stub.analyzer import analyze_file, analyze_text
+from mcp_stub.calc import compile_expression
+from mcp_stub.dense import DenseIndex
+from mcp_stub.metrics import CONTENT_TYPE, HttpMetrics, MetricsMiddleware
+from mcp_stub.search import SearchIndex
+from mcp_stub.tools import ToolRegistry
+from shared.profiling import session, span
+
+ASSETS = Path(os.getenv("MCP_ASSETS") or ROOT / "labs" / "02_mcp" / "assets" / "pdfs")
+SEARCH = SearchIndex(ASSETS, os.getenv("MCP_SEARCH_INDEX") or ROOT / "labs" / "02_mcp" / "outputs" / "search.sqlite3")
+DENSE = DenseIndex(SEARCH, os.getenv("MCP_DENSE_DIR") or ROOT / "labs" / "02_mcp" / "outputs" / "dense")
 
 app = FastAPI(
     title="Servidor de Ferramentas MCP",
     description="Um servidor simples que expõe ferramentas para um agente de IA.",
 )
 
+# Métricas por rota e por tool, expostas em GET /metrics (formato Prometheus).
+# As rotas são medidas por ``asgi_app`` (o app servido); as tools, no /invoke.
+METRICS = HttpMetrics()
+
+@lru_cache(maxsize=1024)
+def _route_label(method: str, path: str) -> str:
+    """Modelo da rota (``/tools/{name}``), não o caminho, como rótulo."""
+    matched = app.match(method, path)
+    return matched[0].path if matched else "other"
+
+asgi_app = MetricsMiddleware(app, METRICS, _route_label)
+
 # --- Modelos de Dados (Pydantic) ---
 
 class ToolSchema(BaseModel):
@@ -15,6 +56,7 @@ class ToolSchema(BaseModel):
     name: str
     description: str
     parameters: Dict[str, Any]
+    required: List[str]
 
 class InvokeRequest(BaseModel):
     """Modelo para a requisição de invocação de ferramenta."""
@@ -25,76 +67,152 @@ class InvokeResponse(BaseModel):
     """Modelo para a resposta da invocação."""
     result: Any
 
-# --- Banco de Dados Simulado de Ferramentas ---
-
-TOOLS_DB = [
-    {
-        "name": "calculator",
-        "description": "Calcula uma expressão matemática. Suporta operações básicas: +, -, *, /, parênteses e potenciação (**)",
-        "parameters": {
-            "expression": {
-                "type": "string",
-                "description": "A expressão matemática a ser calculada (ex: '2 * (3 + 4)')"
-            }
-        }
-    },
-    {
-        "name": "text_analyzer",
-        "description": "Analisa um texto e retorna estatísticas básicas como número de palavras e caracteres.",
-        "parameters": {
-            "text": {
-                "type": "string",
-                "description": "O texto a ser analisado"
-            }
-        }
-    }
-]
+class BatchInvokeRequest(BaseModel):
+    """Várias invocações em uma requisição; ``max_concurrency`` é opcional."""
+    requests: List[InvokeRequest]
+    max_concurrency: Optional[int] = None
+
+class BatchItemResult(BaseModel):
+    """Resultado de um item do lote: ``error`` é ``None`` quando deu certo."""
+    result: Any
+    error: Optional[str]
+
+class BatchInvokeResponse(BaseModel):
+    """Resultados do lote, na mesma ordem das requisições."""
+    results: List[BatchItemResult]
+
+# --- Registro de Ferramentas ---
+
+# Schema (tipos da assinatura, descrições da docstring) e validador de cada
+# ferramenta são gerados uma vez, no registro. ``executor`` diz onde ela roda
+# no /invoke/batch: "thread" (I/O) ou "process" (CPU).
+TOOLS = ToolRegistry()
+tool = TOOLS.tool
 
 # --- Lógica das Ferramentas ---
 
-def calculator(expression: str) -> float:
-    """Executa uma expressão matemática."""
-    # CUIDADO: eval() não é seguro em produção! Usado aqui para simplicidade.
+# roda em microssegundos: mandar para outro processo custaria mais que a conta
+@tool
+def calculator(expression: str, variables: Dict[str, Any] = None) -> Any:
+    """Calcula uma expressão matemática. Suporta +, -, *, /, //, %, parênteses, potenciação (**), variáveis e funções (sqrt, log, sin, min, max...)
+
+    expression: A expressão matemática a ser calculada (ex: '2 * (3 + 4)' ou 'x**2 + y')
+    variables: Valores das variáveis; listas avaliam a expressão em lote (ex: {'x': [1, 2, 3], 'y': 1})
+    """
+    # Compilada uma vez (AST validada, sem eval do texto) e guardada em LRU
     try:
-        # Validação básica de segurança: permitir apenas caracteres seguros
-        allowed_chars = set("0123456789+-*/()%. ")
-        if not all(c in allowed_chars for c in expression):
-            return "Erro: Expressão contém caracteres não permitidos"
-        
-        # Avalia a expressão matemática
-        result = eval(expression)
-        return float(result)
-    except Exception as e:
+        compiled = compile_expression(expression)
+        variables = variables or {}
+        if any(isinstance(v, list) for v in variables.values()):
+            values = compiled.evaluate_batch(variables)
+            return [None if math.isnan(v) else v for v in values.tolist()]
+        return float(compiled.evaluate(variables))
+    except (ValueError, RuntimeError) as e:  # CalcError é um ValueError
         return f"Erro ao calcular: {e}"
 
-def text_analyzer(text: str) -> Dict[str, int]:
-    """Analisa um texto e retorna o número de palavras e caracteres."""
-    # Conta caracteres (incluindo espaços)
-    char_count = len(text)
-    
-    # Conta palavras (separadas por espaços)
-    word_count = len(text.split()) if text.strip() else 0
-    
-    return {
-        "word_count": word_count,
-        "char_count": char_count
-    }
-
-# Mapeamento de nomes de ferramentas para suas funções
-TOOL_FUNCTIONS = {
-    "calculator": calculator,
-    "text_analyzer": text_analyzer,
-}
+# thread: o analisador já divide o trabalho no seu próprio pool de processos
+@tool
+def text_analyzer(text: str = None, path: str = None, top_k: int = 10) -> Dict[str, Any]:
+    """Analisa um texto (ou um arquivo dos assets) e retorna número de palavras, caracteres e linhas, estimativa de palavras distintas e termos mais frequentes.
+
+    text: O texto a ser analisado
+    path: Arquivo da pasta de assets a analisar (alternativa a 'text')
+    top_k: Quantos termos mais frequentes retornar (padrão 10)
+    """
+    if path is not None:
+        fp = (ASSETS / path).resolve()
+        if ASSETS.resolve() not in fp.parents or not fp.is_file():
+            return f"Erro: arquivo '{path}' não encontrado nos assets"
+        return analyze_file(fp, top_k)
+    if text is None:
+        return "Erro: informe 'text' ou 'path'"
+    return analyze_text(text, top_k)
+
+@tool
+def search_pdfs(query: str, k: int = 5) -> Dict[str, Any]:
+    """Busca trechos (páginas/passagens) relevantes nos documentos da pasta de assets, ranqueados por BM25.
+
+    query: Termos de busca (ex: 'pressão arterial alvo')
+    k: Número máximo de trechos retornados (padrão 5)
+    """
+    return SEARCH.search(query, k)
+
+@tool
+def semantic_search(query: str = None, queries: List[str] = None, k: int = 5) -> Any:
+    """Busca por similaridade (embeddings locais) nos trechos dos documentos. Aceita uma consulta ou uma lista de consultas.
+
+    query: Consulta em linguagem natural
+    queries: Várias consultas pontuadas em um único lote (alternativa a 'query')
+    k: Número máximo de trechos por consulta (padrão 5)
+    """
+    if queries:
+        return DENSE.search([str(q) for q in queries], k)
+    if not query:
+        return "Erro: informe 'query' ou 'queries'"
+    return DENSE.search(query, k)
+
+# --- Execução em lote ---
+
+BATCH_MAX_ITEMS = int(os.getenv("MCP_BATCH_MAX_ITEMS", "64"))
+BATCH_THREADS = int(os.getenv("MCP_BATCH_THREADS", "8"))
+BATCH_PROCESSES = int(os.getenv("MCP_BATCH_PROCESSES", str(os.cpu_count() or 2)))
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+# Workers de processo nascem por fork, explicitamente: herdam este módulo já
+# importado, então ``spec.func`` vai por referência mesmo que o padrão seja
+# spawn/forkserver (Linux a partir do Python 3.14). O fork acontece com o
+# servidor já multi-thread, por isso executor="process" é só para funções
+# puras de CPU (sem locks, arquivos ou conexões herdados). Sem fork
+# (Windows), essas ferramentas rodam no pool de threads.
+_FORK = multiprocessing.get_context("fork") if "fork" in multiprocessing.get_all_start_methods() else None
+
+def _pool(kind: str):
+    """Pools criados sob demanda e reaproveitados entre lotes.
+
+    Um pool quebrado (processo do pool morreu: ``BrokenProcessPool``) recusa
+    toda submissão seguinte; é trocado por um novo na próxima chamada.
+    """
+    with _POOLS_LOCK:
+        pool = _POOLS.get(kind)
+        if pool is not None and getattr(pool, "_broken", False):
+            pool.shutdown(wait=False)
+            pool = None
+        if pool is None:
+            if kind == "process" and _FORK is not None:
+                _POOLS[kind] = ProcessPoolExecutor(max_workers=BATCH_PROCESSES, mp_context=_FORK)
+            else:
+                _POOLS[kind] = ThreadPoolExecutor(max_workers=BATCH_THREADS, thread_name_prefix="tool")
+        return _POOLS[kind]
 
 # --- Endpoints da API ---
 
+@app.get("/metrics")
+def metrics():
+    """Contadores, histogramas de latência e bytes em formato Prometheus."""
+    return Response(METRICS.render(), media_type=CONTENT_TYPE)
+
 @app.get("/tools", response_model=List[ToolSchema])
 def list_tools():
     """
     Endpoint de descoberta.
     Retorna a lista de ferramentas disponíveis neste servidor.
     """
-    return TOOLS_DB
+    # JSON serializado uma vez; refeito só quando o registro muda
+    return Response(TOOLS.payload(), media_type="application/json")
+
+@app.get("/tools/{name}", response_model=ToolSchema)
+def get_tool(name: str):
+    """Schema de uma ferramenta."""
+    spec = TOOLS.get(name)
+    if spec is None:
+        return {"detail": f"Ferramenta '{name}' não encontrada"}, 404
+    return spec.schema
+
+@app.post("/tools/{name}/invoke", response_model=InvokeResponse)
+def invoke_named_tool(name: str, arguments: Dict[str, Any]):
+    """Invoca a ferramenta do caminho; o corpo da requisição são os argumentos."""
+    return invoke_tool(InvokeRequest(tool_name=name, arguments=arguments))
 
 @app.post("/invoke", response_model=InvokeResponse)
 def invoke_tool(request: InvokeRequest):
@@ -106,23 +224,94 @@ def invoke_tool(request: InvokeRequest):
     arguments = request.arguments
 
     # Verifica se a ferramenta existe
-    if tool_name not in TOOL_FUNCTIONS:
+    spec = TOOLS.get(tool_name)
+    if spec is None:
         return InvokeResponse(
-            result=f"Erro: Ferramenta '{tool_name}' não encontrada. Ferramentas disponíveis: {list(TOOL_FUNCTIONS.keys())}"
+            result=f"Erro: Ferramenta '{tool_name}' não encontrada. Ferramentas disponíveis: {TOOLS.names()}"
         )
-    
-    # Obtém a função da ferramenta
-    tool_function = TOOL_FUNCTIONS[tool_name]
-    
-    try:
-        # Chama a função com os argumentos fornecidos
-        result = tool_function(**arguments)
-        return InvokeResponse(result=result)
-    except TypeError as e:
+
+    # Valida os argumentos antes de chamar a função
+    with span("validate", cat="tool", tool=tool_name):
+        error = spec.validate(arguments)
+    if error is not None:
+        METRICS.tool(tool_name, None, "invalid")
         return InvokeResponse(
-            result=f"Erro: Argumentos inválidos para a ferramenta '{tool_name}'. Detalhes: {e}"
+            result=f"Erro: Argumentos inválidos para a ferramenta '{tool_name}'. Detalhes: {error}"
         )
+
+    started = time.perf_counter()
+    try:
+        # Chama a função com os argumentos fornecidos
+        with span(f"tool:{tool_name}", cat="tool", executor=spec.executor):
+            result = spec.func(**arguments)
     except Exception as e:
+        METRICS.tool(tool_name, time.perf_counter() - started, "error")
         return InvokeResponse(
             result=f"Erro ao executar ferramenta '{tool_name}': {e}"
         )
+    METRICS.tool(tool_name, time.perf_counter() - started)
+    return InvokeResponse(result=result)
+
+@app.post("/invoke/batch", response_model=BatchInvokeResponse)
+def invoke_batch(request: BatchInvokeRequest):
+    """
+    Endpoint de invocação em lote.
+    Executa várias ferramentas em paralelo (threads para I/O, processos para
+    CPU, conforme o ``executor`` de cada uma) e devolve os resultados na ordem
+    recebida, com erros por item.
+    """
+    items = [r if isinstance(r, InvokeRequest) else InvokeRequest(**r) for r in request.requests]
+    if len(items) > BATCH_MAX_ITEMS:
+        return {"detail": f"Lote com {len(items)} itens excede o limite de {BATCH_MAX_ITEMS}"}, 413
+
+    # limita quantos itens deste lote rodam ao mesmo tempo
+    limit = max(1, request.max_concurrency or (BATCH_THREADS + BATCH_PROCESSES))
+    slots = threading.BoundedSemaphore(limit)
+    pending = []
+    for item in items:
+        spec = TOOLS.get(item.tool_name)
+        if spec is None:
+            pending.append(f"Ferramenta '{item.tool_name}' não encontrada")
+            continue
+        error = spec.validate(item.arguments)
+        if error is not None:
+            METRICS.tool(item.tool_name, None, "invalid")
+            pending.append(f"Argumentos inválidos para a ferramenta '{item.tool_name}'. Detalhes: {error}")
+            continue
+        slots.acquire()
+        try:
+            # a função vai por referência: processos precisam de funções de módulo
+            future = _pool(spec.executor).submit(spec.func, **item.arguments)
+        except Exception as e:
+            # sem future não há callback: a vaga é devolvida aqui
+            slots.release()
+            METRICS.tool(item.tool_name, None, "error")
+            pending.append(f"Erro ao executar ferramenta '{item.tool_name}': {e}")
+            continue
+
+        def done(f, name=item.tool_name, started=time.perf_counter()):
+            slots.release()
+            # tempo desde a submissão: inclui a espera na fila do pool
+            METRICS.tool(name, time.perf_counter() - started, "ok" if f.exception() is None else "error")
+
+        future.add_done_callback(done)
+        pending.append(future)
+
+    results = []
+    for item, future in zip(items, pending):
+        if isinstance(future, str):
+            results.append(BatchItemResult(result=None, error=future))
+            continue
+        try:
+            results.append(BatchItemResult(result=future.result(), error=None))
+        except Exception as e:
+            results.append(BatchItemResult(
+                result=None, error=f"Erro ao executar ferramenta '{item.tool_name}': {e}"))
+    return BatchInvokeResponse(results=results)
+
+if __name__ == "__main__":
+    # Servidor HTTP/1.1 do próprio shim (asyncio, sem uvicorn)
+    from fastapi.server import run
+    # AGENTS_PROFILE=spans|cprofile: perfil gravado em outputs/profile/ ao encerrar (Ctrl+C)
+    with session("server_py", ROOT / "labs" / "02_mcp" / "outputs"):
+        run(asgi_app, host=os.getenv("MCP_HOST", "127.0.0.1"), port=int(os.getenv("MCP_PORT", "8000")))
@@ -1,31 +1,148 @@
 #!/usr/bin/env python3
-import json, os
+import argparse, json, os, signal, socket, sys, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 from http.server import HTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[2]
-ASSETS = ROOT / "labs" / "02_mcp" / "assets" / "pdfs"
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+if str(ROOT.parent) not in sys.path:
+    sys.path.append(str(ROOT.parent))  # raiz do repositório: shared/
+from mcp_stub.assets import AssetIndex
+from mcp_stub.cache import SummaryCache
+from mcp_stub.pdf import PdfError, PdfTextStore, is_pdf
+from mcp_stub.dense import DenseIndex
+from mcp_stub.metrics import CONTENT_TYPE, HttpMetrics
+from mcp_stub.search import SearchIndex
+from mcp_stub.text import first_words
+from fastapi.encoders import CHUNK_SIZE, iter_json
+from shared.profiling import session, span
 
-def summarize_text(text, max_words):
-    words = text.split()
-    if len(words) <= max_words:
-        return " ".join(words)
-    return " ".join(words[:max_words])
+# MCP_ASSETS troca a pasta de assets (ex.: um corpus sintético de benchmark)
+ASSETS = Path(os.getenv("MCP_ASSETS") or ROOT / "labs" / "02_mcp" / "assets" / "pdfs")
+# listagem ordenada, refeita só quando o mtime do diretório muda
+ASSET_INDEX = AssetIndex(ASSETS)
+
+# MCP_MODE=single (padrão, HTTP/1.0 e uma requisição por vez) ou threaded
+# (HTTP/1.1 keep-alive com pool de threads limitado a MCP_MAX_WORKERS).
+MODE = os.getenv("MCP_MODE", "single")
+MAX_WORKERS = int(os.getenv("MCP_MAX_WORKERS", "32"))
+KEEPALIVE = float(os.getenv("MCP_KEEPALIVE", "5"))
+# MCP_WORKERS>1 pré-forka processos que compartilham o socket de escuta.
+WORKERS = int(os.getenv("MCP_WORKERS", "1"))
+
+# texto extraído de PDFs reais, por página (MCP_TEXT_STORE)
+PDF_TEXT = PdfTextStore(os.getenv("MCP_TEXT_STORE") or ROOT / "labs" / "02_mcp" / "outputs" / "pdf_text")
+# índice BM25 dos assets, atualizado incrementalmente (MCP_SEARCH_INDEX)
+SEARCH = SearchIndex(ASSETS, os.getenv("MCP_SEARCH_INDEX") or ROOT / "labs" / "02_mcp" / "outputs" / "search.sqlite3",
+                     text_store=PDF_TEXT)
+# embeddings locais (hashing) das mesmas passagens, em .npy mapeado em memória
+DENSE = DenseIndex(SEARCH, os.getenv("MCP_DENSE_DIR") or ROOT / "labs" / "02_mcp" / "outputs" / "dense")
+# respostas JSON são codificadas em blocos de MCP_JSON_CHUNK bytes
+JSON_CHUNK = int(os.getenv("MCP_JSON_CHUNK", str(CHUNK_SIZE)))
+# cache de resumos: MCP_CACHE_BYTES=0 desliga a memória; MCP_CACHE_DIR liga o
+# nível em disco (sobrevive a reinícios). Estatísticas em GET /stats.
+SUMMARIES = SummaryCache(int(os.getenv("MCP_CACHE_BYTES", str(16 * 1024 * 1024))),
+                         os.getenv("MCP_CACHE_DIR") or None)
+
+# métricas por rota e por tool em GET /metrics (formato Prometheus); rotas
+# desconhecidas viram "other" para não criar uma série por caminho
+METRICS = HttpMetrics()
+ROUTES = {"/health", "/stats", "/metrics", "/shutdown", "/tools/list_pdfs", "/tools/summarize_pdf",
+          "/tools/search_pdfs", "/tools/semantic_search"}
 
 class H(BaseHTTPRequestHandler):
-    def _json(self, code, payload):
+    def _json(self, code, payload, close=False, headers=None):
+        # o JSON sai em blocos direto para o socket: se couber em um bloco vai
+        # com Content-Length; senão, chunked (HTTP/1.1) ou até fechar (HTTP/1.0)
+        chunks = iter_json(payload, JSON_CHUNK)
+        first = next(chunks, b"")
+        second = next(chunks, None)
+        chunked = second is not None and self.request_version == "HTTP/1.1" == self.protocol_version
+        self._status = code
         self.send_response(code)
         self.send_header("Content-Type", "application/json; charset=utf-8")
+        if second is None:
+            self.send_header("Content-Length", str(len(first)))
+        elif chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            close = True
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if close or getattr(self.server, "draining", False):
+            self.send_header("Connection", "close")
+        self.end_headers()
+        if second is None:
+            self._sent += len(first)
+            self.wfile.write(first)
+            return
+        for chunk in chain((first, second), chunks):
+            self._sent += len(chunk)
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk) if chunked else chunk)
+        if chunked:
+            self.wfile.write(b"0\r\n\r\n")
+
+    def _text(self, code, text, content_type):
+        body = text.encode("utf-8")
+        self._status, self._sent = code, len(body)
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if getattr(self.server, "draining", False):
+            self.send_header("Connection", "close")
         self.end_headers()
-        self.wfile.write(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+        self.wfile.write(body)
+
+    def _not_modified(self, etag):
+        self._status = 304
+        self.send_response(304)
+        self.send_header("ETag", etag)
+        if getattr(self.server, "draining", False):
+            self.send_header("Connection", "close")
+        self.end_headers()
+
+    def _etag_matches(self, etag):
+        tags = [t.strip() for t in self.headers.get("If-None-Match", "").split(",")]
+        return etag in tags or "*" in tags
+
+    def _measured(self, method, handler):
+        route = self.path if self.path in ROUTES else "other"
+        self._status, self._sent = 500, 0
+        started = METRICS.begin(route)
+        try:
+            with span(f"{method} {route}", cat="http") as s:
+                handler()
+                s.set(status=self._status, bytes=self._sent)
+        finally:
+            try:
+                received = int(self.headers.get("Content-Length", "0"))
+            except ValueError:
+                received = 0
+            METRICS.end(method, route, self._status, started, received, self._sent)
+            if route.startswith("/tools/"):
+                # no servidor stdlib cada tool é uma rota: erro = status >= 400
+                METRICS.tool(route[7:], time.perf_counter() - started, "ok" if self._status < 400 else "error")
 
     def do_GET(self):
+        self._measured("GET", self._get)
+
+    def do_POST(self):
+        self._measured("POST", self._post)
+
+    def _get(self):
         if self.path == "/health":
             return self._json(200, {"ok": True})
+        if self.path == "/stats":
+            return self._json(200, {"summary_cache": SUMMARIES.stats()})
+        if self.path == "/metrics":
+            return self._text(200, METRICS.render(), CONTENT_TYPE)
         return self._json(404, {"error":"not found"})
 
-    def do_POST(self):
+    def _post(self):
         length = int(self.headers.get("Content-Length","0"))
         body = self.rfile.read(length).decode("utf-8") if length>0 else "{}"
         try:
@@ -33,8 +150,22 @@ class H(BaseHTTPRequestHandler):
         except:
             data = {}
         if self.path == "/tools/list_pdfs":
-            files = sorted([p.name for p in ASSETS.iterdir() if p.is_file()])
-            return self._json(200, {"files": files})
+            # filtros opcionais: prefix, glob; paginação: limit + cursor
+            limit = data.get("limit")
+            try:
+                limit = max(1, int(limit)) if limit is not None else None
+            except (TypeError, ValueError):
+                return self._json(400, {"error":"limit must be an integer"})
+            glob, cursor = data.get("glob"), data.get("cursor")
+            for name, value in (("glob", glob), ("cursor", cursor)):
+                if value is not None and not isinstance(value, str):
+                    return self._json(400, {"error":f"{name} must be a string"})
+            result = ASSET_INDEX.query(prefix=str(data.get("prefix") or ""), glob=glob,
+                                       cursor=cursor, limit=limit)
+            etag = result.pop("etag")
+            if self._etag_matches(etag):
+                return self._not_modified(etag)
+            return self._json(200, result, headers={"ETag": etag})
         if self.path == "/tools/summarize_pdf":
             path = data.get("path")
             max_words = int(data.get("max_words", 40))
@@ -43,23 +174,206 @@ class H(BaseHTTPRequestHandler):
             fp = ROOT / path
             if not fp.exists() or not fp.is_file():
                 return self._json(404, {"error":"file not found"})
-            text = fp.read_text(encoding="utf-8", errors="ignore")
-            return self._json(200, {"summary": summarize_text(text, max_words)})
+            # lê só o necessário para as primeiras max_words palavras
+            compute = PDF_TEXT.first_words if is_pdf(fp) else first_words
+            try:
+                with span("summary", path=path, max_words=max_words):
+                    summary = SUMMARIES.get_or_compute(fp, max_words, compute)
+            except PdfError as e:
+                return self._json(422, {"error": f"invalid pdf: {e}"})
+            return self._json(200, {"summary": summary})
+        if self.path == "/tools/search_pdfs":
+            query = data.get("query")
+            if not query:
+                return self._json(400, {"error":"query required"})
+            try:
+                k = int(data.get("k", 5))
+            except (TypeError, ValueError):
+                return self._json(400, {"error":"k must be an integer"})
+            return self._json(200, SEARCH.search(str(query), k))
+        if self.path == "/tools/semantic_search":
+            # "queries": [...] pontua várias consultas em um único lote
+            queries = data.get("queries") or data.get("query")
+            if not queries or not isinstance(queries, (str, list)):
+                return self._json(400, {"error":"query or queries required"})
+            try:
+                k = int(data.get("k", 5))
+                result = DENSE.search(queries if isinstance(queries, str) else [str(q) for q in queries], k)
+            except (TypeError, ValueError):
+                return self._json(400, {"error":"k must be an integer"})
+            except RuntimeError as e:
+                return self._json(501, {"error": str(e)})
+            return self._json(200, result if isinstance(queries, str) else {"batch": result})
         if self.path == "/shutdown":
-            self._json(200, {"ok": True})
+            self._json(200, {"ok": True}, close=True)
             # shutdown server gracefully
-            def stopper(httpd):
-                httpd.shutdown()
-            import threading
-            threading.Thread(target=stopper, args=(self.server,), daemon=True).start()
+            threading.Thread(target=stop_server, args=(self.server,), daemon=True).start()
             return
         return self._json(404, {"error":"not found"})
 
-def main():
+class H11(H):
+    """Handler HTTP/1.1: mantém a conexão aberta entre requisições (keep-alive)."""
+    protocol_version = "HTTP/1.1"
+    timeout = KEEPALIVE  # conexões ociosas são fechadas após esse tempo
+    # cabeçalho e corpo saem em writes separados; com Nagle o corpo esperaria
+    # o ACK atrasado do cliente (~40 ms por resposta em keep-alive)
+    disable_nagle_algorithm = True
+
+    def handle_one_request(self):
+        if not self.server.mark_idle(self.request, True):
+            self.close_connection = True
+            return
+        super().handle_one_request()
+
+    def parse_request(self):
+        self.server.mark_idle(self.request, False)
+        return super().parse_request()
+
+class ThreadedHTTPServer(HTTPServer):
+    """Atende cada conexão em um pool de threads limitado.
+
+    ``drain()`` para de aceitar conexões novas, fecha as conexões keep-alive
+    ociosas e deixa as requisições em andamento terminarem; ``server_close()``
+    espera o pool esvaziar.
+    """
+
+    def __init__(self, addr, handler, max_workers=MAX_WORKERS):
+        super().__init__(addr, handler)
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="mcp")
+        self.draining = False
+        self._lock = threading.Lock()
+        self._idle = set()
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._work, request, client_address)
+
+    def _work(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            with self._lock:
+                self._idle.discard(request)
+            self.shutdown_request(request)
+
+    def mark_idle(self, request, idle):
+        with self._lock:
+            if not idle:
+                self._idle.discard(request)
+                return True
+            if self.draining:
+                return False
+            self._idle.add(request)
+            return True
+
+    def drain(self):
+        with self._lock:
+            self.draining = True
+            idle = list(self._idle)
+        for sock in idle:
+            try:
+                sock.shutdown(socket.SHUT_RD)
+            except OSError:
+                pass
+        self.shutdown()
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=True)
+
+def stop_server(httpd):
+    master = getattr(httpd, "master_pid", None)
+    if master:
+        # worker de um pool: o master encerra todos os processos
+        os.kill(master, signal.SIGTERM)
+    else:
+        getattr(httpd, "drain", httpd.shutdown)()
+
+def make_server(port, mode=MODE):
+    if mode == "threaded":
+        return ThreadedHTTPServer(("127.0.0.1", port), H11)
+    if mode != "single":
+        raise SystemExit(f"MCP_MODE inválido: {mode!r} (use single ou threaded)")
+    return HTTPServer(("127.0.0.1", port), H)
+
+def _worker(httpd, master):
+    httpd.master_pid = master
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(
+        target=getattr(httpd, "drain", httpd.shutdown), daemon=True).start())
+    code = 0
+    try:
+        httpd.serve_forever()
+        httpd.server_close()
+    except BaseException:
+        code = 1
+    finally:
+        os._exit(code)
+
+def serve_workers(httpd, workers):
+    """Pré-fork de ``workers`` processos atendendo o mesmo socket de escuta.
+
+    O master só supervisiona: recria workers que morrem e, ao receber SIGTERM
+    (enviado por ``POST /shutdown`` em qualquer worker) ou SIGINT, repassa
+    SIGTERM para todos e espera que drenem.
+    """
+    if not hasattr(os, "fork"):
+        raise SystemExit("MCP_WORKERS>1 requer os.fork (POSIX)")
+    master = os.getpid()
+    children = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            _worker(httpd, master)
+        children[pid] = time.monotonic()
+
+    def stop(*_):
+        nonlocal stopping
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+    while children:
+        try:
+            pid, _status = os.wait()
+        except ChildProcessError:
+            break
+        started = children.pop(pid, None)
+        if started is None or stopping:
+            continue
+        print(f"[mcp-stub] worker {pid} morreu; reiniciando", file=sys.stderr, flush=True)
+        if time.monotonic() - started < 1:
+            time.sleep(1)  # evita loop de fork se o worker falha ao iniciar
+        if not stopping:
+            spawn()
+    httpd.socket.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="MCP stub server (stdlib)")
+    parser.add_argument("--workers", type=int, default=WORKERS,
+                        help="processos que compartilham o socket (padrão: MCP_WORKERS ou 1)")
+    args = parser.parse_args(argv)
     port = int(os.getenv("MCP_PORT","8765"))
-    httpd = HTTPServer(("127.0.0.1", port), H)
-    print(f"[mcp-stub] serving on http://127.0.0.1:{port}", flush=True)
-    httpd.serve_forever()
+    httpd = make_server(port)
+    print(f"[mcp-stub] serving on http://127.0.0.1:{port} ({MODE}, workers={args.workers})", flush=True)
+    if args.workers > 1:
+        return serve_workers(httpd, args.workers)
+    # AGENTS_PROFILE: perfil do processo até o /shutdown (só com um worker)
+    with session("server", ROOT / "labs" / "02_mcp" / "outputs"):
+        try:
+            httpd.serve_forever()
+        finally:
+            httpd.server_close()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,7 @@
+"""Support code shared by the Lab 02 MCP servers.
+
+``labs/02_mcp/server.py`` (stdlib) and ``labs/02_mcp/py/server.py`` (FastAPI
+shim) keep the HTTP surface students work on; the heavier machinery behind
+their tools lives here so both servers can share it.  Everything is pure
+standard library.
+"""
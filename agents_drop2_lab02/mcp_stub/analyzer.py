@@ -0,0 +1,218 @@
+"""Chunked, multi-process text statistics (``text_analyzer`` tool).
+
+``text.split()`` on a whole document doubles its memory and runs on one
+core.  Here the input — an inline string or a file — is cut into chunks at
+whitespace boundaries, each chunk is counted on its own (in a process pool
+when there is more than one, unless this already is a pool worker), and the
+partial results are merged:
+
+* words, characters and lines are plain sums;
+* the number of distinct terms is a :class:`~mcp_stub.sketch.HyperLogLog`
+  estimate;
+* the most frequent terms come from a :class:`~mcp_stub.sketch.CountMinSketch`
+  over candidate terms (each chunk's local leaders).
+
+Memory is bounded by the chunk size times the number of workers plus the
+fixed-size sketches.  A chunk is at most ``size + window`` long: input with
+no whitespace in that window is cut mid-word (files on a UTF-8 character
+boundary), and merging adjacent partials counts the cut word once.  File
+chunks are read by the workers themselves, so only byte offsets cross the
+process boundary.  Terms are lowercased words with surrounding punctuation
+stripped; ``word_count`` keeps the ``str.split()`` definition.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import re
+import string
+import threading
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+from .sketch import CountMinSketch, HyperLogLog, hash64
+
+CHUNK_CHARS = 1 << 20
+CHUNK_BYTES = 1 << 20
+TOP_K = 10
+_CANDIDATES = 256
+_PUNCT = string.punctuation + "“”‘’«»…–—¿¡"
+# ASCII whitespace bytes never occur inside a UTF-8 multi-byte sequence,
+# so cutting right after one is safe for both words and characters.
+_SPACE_BYTES = b" \t\n\r\x0b\x0c"
+_SPACE = re.compile(r"\s")  # str.isspace, like str.split()
+# How far past ``size`` a chunk may grow looking for whitespace.
+WINDOW = 4096
+
+_POOLS: Dict[int, ProcessPoolExecutor] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+class _Partial:
+    """Statistics of one chunk; :meth:`merge` folds another one in."""
+
+    __slots__ = ("words", "chars", "newlines", "first", "last", "hll", "cms", "candidates")
+
+    def __init__(self) -> None:
+        self.words = self.chars = self.newlines = 0
+        self.first = self.last = ""
+        self.hll = HyperLogLog()
+        self.cms = CountMinSketch()
+        self.candidates: Dict[str, int] = {}
+
+    def merge(self, other: "_Partial") -> "_Partial":
+        """Fold in the chunk that follows this one."""
+        self.words += other.words
+        if self.last and other.first and not self.last.isspace() and not other.first.isspace():
+            self.words -= 1  # a word cut between the two chunks
+        self.first = self.first or other.first
+        self.chars += other.chars
+        self.newlines += other.newlines
+        self.last = other.last or self.last
+        self.hll.merge(other.hll)
+        self.cms.merge(other.cms)
+        terms = set(self.candidates) | set(other.candidates)
+        ranked = sorted(((self.cms.estimate_hash(hash64(t)), t) for t in terms), reverse=True)
+        self.candidates = {t: n for n, t in ranked[:_CANDIDATES]}
+        return self
+
+    def result(self, top_k: int) -> Dict[str, Any]:
+        top = sorted(self.candidates.items(), key=lambda kv: (-kv[1], kv[0]))[:top_k]
+        return {
+            "word_count": self.words,
+            "char_count": self.chars,
+            "line_count": self.newlines + (1 if self.last and self.last != "\n" else 0),
+            "unique_words": self.hll.estimate() if self.words else 0,
+            "top_terms": [[term, count] for term, count in top],
+        }
+
+
+def _count(text: str) -> _Partial:
+    part = _Partial()
+    words = text.split()
+    part.words = len(words)
+    part.chars = len(text)
+    part.newlines = text.count("\n")
+    part.first = text[:1]
+    part.last = text[-1:]
+    terms = Counter(w.strip(_PUNCT).lower() for w in words)
+    del words
+    terms.pop("", None)
+    for term, n in terms.items():
+        h = hash64(term)
+        part.hll.add_hash(h)
+        part.cms.add_hash(h, n)
+    part.candidates = dict(terms.most_common(_CANDIDATES))
+    return part
+
+
+def _count_range(path: str, start: int, end: int) -> _Partial:
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+    return _count(data.decode("utf-8", "ignore"))
+
+
+def split_text(text: str, size: int = CHUNK_CHARS, window: int = WINDOW) -> List[Tuple[int, int]]:
+    """``(start, end)`` slices of about ``size`` chars, cut after whitespace.
+
+    No whitespace within ``window`` chars past ``size`` cuts at ``size``.
+    """
+    bounds, start = [], 0
+    while start < len(text):
+        end = min(start + size, len(text))
+        if end < len(text):
+            match = _SPACE.search(text, end - 1, min(end - 1 + window, len(text)))
+            if match is not None:
+                end = match.end()
+        bounds.append((start, end))
+        start = end
+    return bounds
+
+
+def split_file(path: str | Path, size: int = CHUNK_BYTES, window: int = WINDOW) -> List[Tuple[int, int]]:
+    """Byte ranges of about ``size`` bytes, each ending after ASCII whitespace.
+
+    No whitespace within ``window`` bytes past ``size`` cuts at ``size``,
+    moved forward to the end of a UTF-8 character.
+    """
+    total = os.path.getsize(path)
+    bounds, start = [], 0
+    with open(path, "rb") as f:
+        while start < total:
+            end = min(start + size, total)
+            if end < total:
+                f.seek(end - 1)
+                block = f.read(window)
+                cut = next((i for i, b in enumerate(block) if b in _SPACE_BYTES), None)
+                if cut is not None:
+                    end += cut
+                else:
+                    # skip the continuation bytes (10xxxxxx) of a character split at ``end``
+                    end += next((i for i, b in enumerate(block[1:4]) if b & 0xC0 != 0x80), 3)
+            end = min(end, total)
+            bounds.append((start, end))
+            start = end
+    return bounds
+
+
+def _pool(workers: int) -> ProcessPoolExecutor:
+    with _POOLS_LOCK:
+        if workers not in _POOLS:
+            _POOLS[workers] = ProcessPoolExecutor(max_workers=workers)
+        return _POOLS[workers]
+
+
+def _default_workers() -> int:
+    return int(os.getenv("MCP_ANALYZER_WORKERS", "0")) or os.cpu_count() or 1
+
+
+def _run(func, jobs: Iterator[tuple], workers: int | None) -> _Partial:
+    workers = workers or _default_workers()
+    if multiprocessing.parent_process() is not None:
+        workers = 1  # already a pool worker (e.g. a batch process tool): no nested pool
+    first, second = next(jobs, None), next(jobs, None)
+    if first is None:
+        return _Partial()
+    jobs = chain([first] if second is None else [first, second], jobs)
+    if second is None or workers <= 1:
+        parts = (func(*job) for job in jobs)
+    else:
+        parts = _bounded_map(_pool(workers), func, jobs, 2 * workers)
+    total = next(parts)
+    for part in parts:
+        total.merge(part)
+    return total
+
+
+def _bounded_map(pool: ProcessPoolExecutor, func, jobs: Iterator[tuple], window: int) -> Iterator[_Partial]:
+    # at most ``window`` chunks in flight, so memory stays bounded
+    pending = deque()
+    for job in jobs:
+        pending.append(pool.submit(func, *job))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def analyze_text(text: str, top_k: int = TOP_K, workers: int | None = None,
+                 chunk_chars: int = CHUNK_CHARS) -> Dict[str, Any]:
+    """Statistics of an inline string."""
+    jobs = ((text[a:b],) for a, b in split_text(text, chunk_chars))
+    return _run(_count, jobs, workers).result(top_k)
+
+
+def analyze_file(path: str | Path, top_k: int = TOP_K, workers: int | None = None,
+                 chunk_bytes: int = CHUNK_BYTES) -> Dict[str, Any]:
+    """Statistics of a UTF-8 file (invalid bytes are ignored)."""
+    jobs = ((str(path), a, b) for a, b in split_file(path, chunk_bytes))
+    return _run(_count_range, jobs, workers).result(top_k)
+
+
+__all__ = ["CHUNK_BYTES", "CHUNK_CHARS", "TOP_K", "WINDOW", "analyze_file", "analyze_text",
+           "split_file", "split_text"]
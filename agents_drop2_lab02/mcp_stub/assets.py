@@ -0,0 +1,85 @@
+"""Cached listing of the asset directory behind ``list_pdfs``.
+
+Listing, ``is_file`` checks and sorting used to run on every request.
+:class:`AssetIndex` keeps a sorted snapshot of the file names and rebuilds it
+only when the directory's ``st_mtime_ns`` changes (files added, removed or
+renamed) or when :meth:`AssetIndex.invalidate` is called, e.g. by a file
+watcher.  Queries are answered from the snapshot with ``bisect``: prefix
+filters and cursors cost ``O(log n)`` plus the page size.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import threading
+from bisect import bisect_left, bisect_right
+from fnmatch import fnmatchcase
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+
+class AssetIndex:
+    """Sorted, lazily refreshed snapshot of the regular files in ``directory``."""
+
+    def __init__(self, directory: str | Path):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._mtime_ns: int | None = None
+        self._names: List[str] = []
+        self._digest = ""
+        self.rebuilds = 0
+
+    def invalidate(self) -> None:
+        """Force the next query to rebuild the snapshot."""
+        with self._lock:
+            self._mtime_ns = None
+
+    def snapshot(self) -> Tuple[List[str], str]:
+        """Return ``(sorted names, listing digest)``, rebuilding if needed."""
+        mtime_ns = os.stat(self.directory).st_mtime_ns
+        with self._lock:
+            if mtime_ns != self._mtime_ns:
+                with os.scandir(self.directory) as it:
+                    names = sorted(entry.name for entry in it if entry.is_file())
+                self._names = names
+                self._digest = hashlib.sha1("\0".join(names).encode("utf-8")).hexdigest()
+                self._mtime_ns = mtime_ns
+                self.rebuilds += 1
+            return self._names, self._digest
+
+    def query(self, prefix: str = "", glob: str | None = None,
+              cursor: str | None = None, limit: int | None = None) -> Dict[str, Any]:
+        """List files matching ``prefix``/``glob``, optionally paginated.
+
+        ``cursor`` is the ``next_cursor`` of the previous page (the last name
+        returned); pages stay consistent while files are added or removed.
+        The result carries an ``etag`` that changes whenever the listing or
+        the query does.
+        """
+        names, digest = self.snapshot()
+        start = bisect_left(names, prefix) if prefix else 0
+        if cursor:
+            start = max(start, bisect_right(names, cursor))
+        end = bisect_left(names, prefix[:-1] + chr(ord(prefix[-1]) + 1)) if prefix else len(names)
+
+        files: List[str] = []
+        next_cursor = None
+        for i in range(start, end):
+            name = names[i]
+            if glob and not fnmatchcase(name, glob):
+                continue
+            if limit is not None and len(files) == limit:
+                next_cursor = files[-1] if files else None
+                break
+            files.append(name)
+
+        query = f"{prefix}\0{glob or ''}\0{cursor or ''}\0{limit if limit is not None else ''}"
+        etag = '"%s-%s"' % (digest[:16], hashlib.sha1(query.encode("utf-8")).hexdigest()[:8])
+        result: Dict[str, Any] = {"files": files, "etag": etag}
+        if limit is not None:
+            result["next_cursor"] = next_cursor
+        return result
+
+
+__all__ = ["AssetIndex"]
@@ -0,0 +1,151 @@
+"""Summary cache for ``summarize_pdf``.
+
+Agents ask for the same ``(path, max_words)`` summary over and over.  The
+:class:`SummaryCache` keeps results in an in-process LRU bounded by a byte
+budget, with an optional on-disk tier that survives restarts.
+
+Every entry is stamped with the file's size and ``st_mtime_ns``.  A lookup
+``stat``s the file first and treats an entry whose stamp differs as stale, so
+editing or replacing an asset invalidates its summaries without any explicit
+purge.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Dict, Tuple
+
+# Rough per-entry bookkeeping cost (key tuple, OrderedDict node, str header)
+# charged against the byte budget on top of the summary itself.
+ENTRY_OVERHEAD = 200
+
+Key = Tuple[str, int]
+Stamp = Tuple[int, int]
+
+
+class SummaryCache:
+    """Byte-budget LRU of summaries keyed on ``(resolved path, max_words)``.
+
+    ``max_bytes=0`` disables the memory tier; ``disk_dir`` enables the
+    persistent tier (one small JSON file per key).  Safe to share between
+    threads.
+    """
+
+    def __init__(self, max_bytes: int = 16 * 1024 * 1024, disk_dir: str | Path | None = None):
+        self.max_bytes = max_bytes
+        self.disk_dir = Path(disk_dir) if disk_dir else None
+        if self.disk_dir:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+        self._entries: "OrderedDict[Key, Tuple[Stamp, str, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.disk_hits = self.misses = self.stale = self.evictions = 0
+
+    def get_or_compute(self, path: str | Path, max_words: int,
+                       compute: Callable[[Path, int], str]) -> str:
+        """Return the cached summary for ``path`` or compute and store it."""
+        fp = Path(path).resolve()
+        st = fp.stat()
+        stamp = (st.st_size, st.st_mtime_ns)
+        key = (str(fp), max_words)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == stamp:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                self.stale += 1
+                self._drop(key)
+
+        summary = self._disk_get(key, stamp)
+        if summary is not None:
+            with self._lock:
+                self.disk_hits += 1
+        else:
+            summary = compute(fp, max_words)
+            with self._lock:
+                self.misses += 1
+            self._disk_put(key, stamp, summary)
+        self._put(key, stamp, summary)
+        return summary
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "stale": self.stale,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "disk": str(self.disk_dir) if self.disk_dir else None,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    # --- memory tier -------------------------------------------------------
+
+    def _put(self, key: Key, stamp: Stamp, summary: str) -> None:
+        size = len(summary.encode("utf-8")) + len(key[0]) + ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._drop(key)
+            self._entries[key] = (stamp, summary, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                old, _ = next(iter(self._entries.items()))
+                self._drop(old)
+                self.evictions += 1
+
+    def _drop(self, key: Key) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+    # --- disk tier ---------------------------------------------------------
+
+    def _disk_path(self, key: Key) -> Path:
+        digest = hashlib.sha256(f"{key[0]}\0{key[1]}".encode("utf-8")).hexdigest()
+        return self.disk_dir / digest[:2] / f"{digest}.json"
+
+    def _disk_get(self, key: Key, stamp: Stamp) -> str | None:
+        if not self.disk_dir:
+            return None
+        try:
+            record = json.loads(self._disk_path(key).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        if record.get("path") != key[0] or tuple(record.get("stamp", ())) != stamp:
+            return None
+        return record.get("summary")
+
+    def _disk_put(self, key: Key, stamp: Stamp, summary: str) -> None:
+        if not self.disk_dir:
+            return
+        target = self._disk_path(key)
+        target.parent.mkdir(exist_ok=True)
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        record = {"path": key[0], "max_words": key[1], "stamp": list(stamp), "summary": summary}
+        try:
+            tmp.write_text(json.dumps(record, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp, target)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+
+
+__all__ = ["SummaryCache"]
@@ -0,0 +1,273 @@
+"""Sandboxed arithmetic engine behind the ``calculator`` tool.
+
+The tool used to filter characters and call ``eval`` on the raw string, so
+every call re-parsed the expression and ``9**9**9**9`` could hang a worker.
+:func:`compile_expression` parses the text once with :mod:`ast`, rejects
+anything that is not arithmetic on numbers, whitelisted functions and plain
+variable names, rewrites ``**`` into a guarded helper and compiles the
+result to a code object.  Compiled expressions are kept in an LRU keyed
+by the expression text, so a repeated expression costs one dictionary lookup
+plus the evaluation of a small code object (expressions without variables
+are folded to their value once, at compile time).
+
+Limits (module constants):
+
+* ``MAX_LENGTH`` characters of source;
+* ``MAX_STEPS`` operations — the language has no loops, so the step count is
+  the node count and is checked at compile time;
+* ``MAX_EXPONENT`` on the absolute value of any exponent, plus a bit-length
+  estimate that rejects integer powers before they are computed;
+* ``MAX_NDIGITS`` on the ``ndigits`` of ``round`` — rounding an integer
+  computes ``10 ** abs(ndigits)``, so ``round(1, -99999999)`` would hang too;
+* ``MAX_MAGNITUDE`` on literals, on every power and on the result.  Sums and
+  products are not checked as they go: their operands are literals, powers
+  or other sums and products, so a value is at most the product of the
+  expression's ``MAX_STEPS`` leaves, each within ``MAX_MAGNITUDE`` — large
+  (about 150 000 digits at worst), but computed in milliseconds and then
+  rejected by the final check.
+
+:meth:`Expression.evaluate_batch` evaluates the same code over NumPy arrays,
+one element per variable binding; elements that overflow or are undefined
+come back as ``nan``.  NumPy is optional: scalar evaluation works without it.
+"""
+
+from __future__ import annotations
+
+import ast
+import math
+from functools import lru_cache, reduce
+from typing import Any, Dict, FrozenSet, Mapping, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+MAX_LENGTH = 1000
+MAX_STEPS = 500
+MAX_EXPONENT = 1000
+MAX_NDIGITS = 15
+MAX_MAGNITUDE = 10 ** 300
+CACHE_SIZE = 1024
+
+_MAX_BITS = MAX_MAGNITUDE.bit_length()
+
+_BINOPS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow)
+_UNARYOPS = (ast.UAdd, ast.USub)
+_NUMBERS = (int, float)
+_CONSTANTS = {"pi": math.pi, "e": math.e, "tau": math.tau}
+
+
+class CalcError(ValueError):
+    """Expression rejected at compile time or out of limits at run time."""
+
+
+def _check(value: Any) -> Any:
+    if isinstance(value, complex):
+        raise CalcError("resultado complexo não suportado")
+    if abs(value) > MAX_MAGNITUDE:
+        raise CalcError("resultado excede o limite de magnitude")
+    return value
+
+
+def _pow(base: Any, exponent: Any) -> Any:
+    if abs(exponent) > MAX_EXPONENT:
+        raise CalcError(f"expoente maior que {MAX_EXPONENT}")
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0 \
+            and (base.bit_length() - 1) * exponent > _MAX_BITS:
+        raise CalcError("resultado excede o limite de magnitude")
+    return _check(base ** exponent)
+
+
+def _ndigits(ndigits: Any) -> Any:
+    if ndigits is not None and (not isinstance(ndigits, int) or abs(ndigits) > MAX_NDIGITS):
+        raise CalcError(f"round aceita ndigits inteiro entre -{MAX_NDIGITS} e {MAX_NDIGITS}")
+    return ndigits
+
+
+def _round(number: Any, ndigits: Any = None) -> Any:
+    return round(number, _ndigits(ndigits))
+
+
+def _vround(values: Any, ndigits: Any = None) -> Any:
+    return np.round(values, _ndigits(ndigits) or 0)
+
+
+def _vpow(base: Any, exponent: Any) -> Any:
+    if np.max(np.abs(exponent)) > MAX_EXPONENT:
+        raise CalcError(f"expoente maior que {MAX_EXPONENT}")
+    return np.power(base, exponent)
+
+
+_SCALAR = {
+    "__builtins__": {}, "_pow": _pow,
+    "abs": abs, "round": _round, "min": min, "max": max,
+    "sqrt": math.sqrt, "exp": math.exp, "log": math.log, "log10": math.log10,
+    "sin": math.sin, "cos": math.cos, "tan": math.tan, "floor": math.floor, "ceil": math.ceil,
+    **_CONSTANTS,
+}
+_FUNCTIONS = frozenset(k for k in _SCALAR if not k.startswith("_") and k not in _CONSTANTS)
+_VECTOR: Dict[str, Any] | None = None
+
+
+def _vector_namespace() -> Dict[str, Any]:
+    global _VECTOR
+    if np is None:
+        raise RuntimeError("o modo em lote da calculadora requer numpy (pip install numpy)")
+    if _VECTOR is None:
+        _VECTOR = {
+            "__builtins__": {}, "_pow": _vpow,
+            "abs": np.abs, "round": _vround,
+            "min": lambda *a: reduce(np.minimum, a), "max": lambda *a: reduce(np.maximum, a),
+            "sqrt": np.sqrt, "exp": np.exp, "log": np.log, "log10": np.log10,
+            "sin": np.sin, "cos": np.cos, "tan": np.tan, "floor": np.floor, "ceil": np.ceil,
+            **_CONSTANTS,
+        }
+    return _VECTOR
+
+
+class _Guard(ast.NodeTransformer):
+    """Validate the tree and route ``**`` through the guarded helper."""
+
+    def __init__(self) -> None:
+        self.variables: set = set()
+
+    def visit(self, node: ast.AST) -> Any:
+        # one frame per level instead of NodeVisitor's two
+        return getattr(self, "visit_" + type(node).__name__, self.generic_visit)(node)
+
+    def generic_visit(self, node: ast.AST) -> Any:
+        raise CalcError(f"construção não permitida: {type(node).__name__}")
+
+    def visit_Expression(self, node: ast.Expression) -> Any:
+        node.body = self.visit(node.body)
+        return node
+
+    def visit_Constant(self, node: ast.Constant) -> Any:
+        if type(node.value) not in (int, float):
+            raise CalcError(f"constante não permitida: {node.value!r}")
+        if not math.isfinite(node.value) or abs(node.value) > MAX_MAGNITUDE:
+            raise CalcError("constante excede o limite de magnitude")
+        return node
+
+    def visit_Name(self, node: ast.Name) -> Any:
+        if node.id.startswith("_") or node.id in _FUNCTIONS:
+            raise CalcError(f"nome não permitido: {node.id}")
+        if node.id not in _CONSTANTS:
+            self.variables.add(node.id)
+        return node
+
+    def visit_UnaryOp(self, node: ast.UnaryOp) -> Any:
+        if not isinstance(node.op, _UNARYOPS):
+            raise CalcError(f"operador não permitido: {type(node.op).__name__}")
+        node.operand = self.visit(node.operand)
+        return node
+
+    def visit_BinOp(self, node: ast.BinOp) -> Any:
+        if not isinstance(node.op, _BINOPS):
+            raise CalcError(f"operador não permitido: {type(node.op).__name__}")
+        left, right = self.visit(node.left), self.visit(node.right)
+        if isinstance(node.op, ast.Pow):
+            # todo ``**`` passa pelo limite, mesmo com expoente pequeno: a base
+            # pode ser outra potência, e ``(x**4)**4...`` cresce sem fim
+            return ast.copy_location(ast.Call(ast.Name("_pow", ast.Load()), [left, right], []), node)
+        node.left, node.right = left, right
+        return node
+
+    def visit_Call(self, node: ast.Call) -> Any:
+        if not isinstance(node.func, ast.Name) or node.func.id not in _FUNCTIONS or node.keywords:
+            raise CalcError("só são permitidas as funções " + ", ".join(sorted(_FUNCTIONS)))
+        if any(isinstance(arg, ast.Starred) for arg in node.args):
+            raise CalcError("argumentos * não são permitidos")
+        node.args = [self.visit(arg) for arg in node.args]
+        return node
+
+
+class Expression:
+    """A validated, compiled expression; see :func:`compile_expression`."""
+
+    __slots__ = ("source", "variables", "_code", "_const")
+
+    def __init__(self, source: str):
+        if len(source) > MAX_LENGTH:
+            raise CalcError(f"expressão com mais de {MAX_LENGTH} caracteres")
+        try:
+            tree = ast.parse(source.strip(), mode="eval")
+        except (SyntaxError, ValueError) as e:
+            raise CalcError(f"sintaxe inválida: {e}") from None
+        except RecursionError:
+            raise CalcError("expressão aninhada demais") from None
+        # counted iteratively, before anything recurses over the tree
+        if sum(isinstance(n, ast.expr) for n in ast.walk(tree)) > MAX_STEPS:
+            raise CalcError(f"expressão com mais de {MAX_STEPS} passos")
+        guard = _Guard()
+        try:
+            tree = ast.fix_missing_locations(guard.visit(tree))
+            self._code = compile(tree, "<calculator>", "eval")
+        except RecursionError:
+            raise CalcError("expressão aninhada demais") from None
+        self.source = source
+        self.variables: FrozenSet[str] = frozenset(guard.variables)
+        # without variables the value never changes: fold it once
+        self._const: tuple | None = None
+        if not self.variables:
+            try:
+                self._const = (self._run({}), None)
+            except CalcError as e:
+                self._const = (None, e)
+
+    def _missing(self, names: Mapping[str, Any]) -> None:
+        missing = self.variables.difference(names)
+        if missing:
+            raise CalcError("variáveis sem valor: " + ", ".join(sorted(missing)))
+
+    def evaluate(self, variables: Mapping[str, Any] | None = None) -> Any:
+        """Value of the expression for one binding of its variables."""
+        if self._const is not None:
+            value, error = self._const
+            if error is not None:
+                raise error
+            return value
+        variables = variables or {}
+        for name in self.variables:
+            if type(variables.get(name)) not in _NUMBERS:
+                self._missing(variables)
+                raise CalcError(f"valor não numérico para {name}")
+        return self._run(variables)
+
+    def _run(self, variables: Mapping[str, Any]) -> Any:
+        try:
+            return _check(eval(self._code, _SCALAR, variables))
+        except (ArithmeticError, TypeError, ValueError) as e:
+            raise CalcError(str(e)) from None
+
+    def evaluate_batch(self, columns: Mapping[str, Sequence[float]]) -> "np.ndarray":
+        """Vectorized values over arrays of bindings (broadcast together).
+
+        Elements that overflow, exceed ``MAX_MAGNITUDE`` or are undefined
+        (division by zero, ``log`` of a negative) are ``nan``.
+        """
+        namespace = _vector_namespace()
+        self._missing(columns)
+        arrays = {name: np.asarray(columns[name], dtype=np.float64) for name in self.variables}
+        shape = np.broadcast_shapes(*(a.shape for a in arrays.values())) if arrays else ()
+        with np.errstate(all="ignore"):
+            out = np.asarray(eval(self._code, namespace, arrays), dtype=np.float64)
+            out = np.array(np.broadcast_to(out, shape), dtype=np.float64)
+            out[~(np.abs(out) <= float(MAX_MAGNITUDE))] = np.nan
+        return out
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_expression(source: str) -> Expression:
+    """Compiled :class:`Expression` for ``source``, memoised by text."""
+    return Expression(source)
+
+
+def evaluate(source: str, variables: Mapping[str, Any] | None = None) -> Any:
+    """Shortcut for ``compile_expression(source).evaluate(variables)``."""
+    return compile_expression(source).evaluate(variables)
+
+
+__all__ = ["CalcError", "Expression", "MAX_EXPONENT", "MAX_LENGTH", "MAX_MAGNITUDE", "MAX_NDIGITS",
+           "MAX_STEPS", "compile_expression", "evaluate"]
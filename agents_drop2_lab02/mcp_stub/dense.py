@@ -0,0 +1,269 @@
+"""Dense (semantic) retrieval over the asset passages, vectorized with NumPy.
+
+Lexical BM25 (:mod:`mcp_stub.search`) misses paraphrases; RAG flows also want
+a similarity score.  :class:`DenseIndex` embeds every passage of a
+:class:`~mcp_stub.search.SearchIndex` with local *hashed features* — signed
+feature hashing of unigrams and bigrams, sublinear TF, per-bucket IDF, L2
+normalisation — so no model download is needed.
+
+The embedding matrix is a float32 ``.npy`` file opened as a read-only
+``np.memmap``.  A query batch is one matrix product per block of
+``block_rows`` rows followed by ``argpartition`` top-k, so memory stays
+bounded by the block size even when the matrix is larger than RAM, and
+several queries are scored in the same pass.
+
+Several processes (pre-forked workers) may share ``directory``: a build
+holds an exclusive ``flock`` on ``build.lock`` and loading the files holds a
+shared one, every file is written to a temp name and swapped in with
+``os.replace``, and ``meta.json`` goes last as the commit point.  Where
+``fcntl`` is missing (Windows) only threads of one process are coordinated.
+
+NumPy is an optional dependency of the lab: importing this module works
+without it, but building or querying raises :class:`RuntimeError`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import zlib
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depends on the environment
+    np = None
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+from .search import SearchIndex, _snippet, tokenize
+
+DIM = 256
+BLOCK_ROWS = 32768
+_BUILD_BATCH = 1024
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise RuntimeError("a busca semântica requer numpy (pip install numpy)")
+
+
+def _features(text: str) -> List[str]:
+    tokens = tokenize(text)
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def hashed_counts(text: str, dim: int = DIM) -> "np.ndarray":
+    """Signed feature-hashing counts of ``text`` (float32, length ``dim``)."""
+    _require_numpy()
+    feats = _features(text)
+    if not feats:
+        return np.zeros(dim, dtype=np.float32)
+    hashes = np.fromiter((zlib.crc32(f.encode("utf-8")) for f in feats), dtype=np.uint32, count=len(feats))
+    signs = np.where(hashes & 0x80000000, 1.0, -1.0)
+    counts = np.bincount(hashes % dim, weights=signs, minlength=dim)
+    return (np.sign(counts) * np.log1p(np.abs(counts))).astype(np.float32)
+
+
+class DenseIndex:
+    """Hashed-feature embeddings of the passages of ``search``.
+
+    Files live in ``directory``: ``vectors.npy`` (rows × ``dim`` float32),
+    ``ids.npy`` (passage id per row), ``idf.npy`` and ``meta.json``.  The
+    matrix is rebuilt when the documents indexed by ``search`` change.
+    """
+
+    def __init__(self, search: SearchIndex, directory: str | Path,
+                 dim: int = DIM, block_rows: int = BLOCK_ROWS):
+        self.search_index = search
+        self.directory = Path(directory)
+        self.dim = dim
+        self.block_rows = block_rows
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._loaded: Dict[str, Any] | None = None
+        self._signatures: Tuple[int, str] | None = None  # (search generation, signature)
+
+    # --- build ---------------------------------------------------------------
+
+    def _signature(self) -> str:
+        # the docs table only changes with the search generation: scan it once per generation
+        generation = self.search_index.generation()
+        cached = self._signatures
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+        db = self.search_index._db()
+        digest = hashlib.sha1(str(self.dim).encode())
+        for row in db.execute("SELECT name, size, mtime_ns FROM docs ORDER BY name"):
+            digest.update(repr(row).encode("utf-8"))
+        self._signatures = (generation, digest.hexdigest())
+        return self._signatures[1]
+
+    @contextmanager
+    def _files_lock(self, exclusive: bool) -> Iterator[None]:
+        """``flock`` on ``build.lock``: exclusive to build, shared to load."""
+        if fcntl is None:
+            yield
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.directory / "build.lock", "a") as fh:
+            fcntl.flock(fh, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield  # closing the file releases the lock
+
+    def _read_meta(self) -> Dict[str, Any] | None:
+        try:
+            return json.loads((self.directory / "meta.json").read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+
+    def build(self) -> Dict[str, Any]:
+        """(Re)embed every passage; writes to temp files, then swaps them in."""
+        _require_numpy()
+        with self._build_lock, self._files_lock(exclusive=True):
+            return self._build()
+
+    def _build(self) -> Dict[str, Any]:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        db = self.search_index._db()
+        signature = self._signature()
+        rows = db.execute("SELECT COUNT(*) FROM passages").fetchone()[0]
+        suffix = f".{os.getpid()}.tmp"
+        vectors_tmp = self.directory / f"vectors.npy{suffix}"
+        ids_tmp = self.directory / f"ids.npy{suffix}"
+        vectors = np.lib.format.open_memmap(vectors_tmp, mode="w+", dtype=np.float32, shape=(rows, self.dim))
+        ids = np.lib.format.open_memmap(ids_tmp, mode="w+", dtype=np.int64, shape=(rows,))
+        df = np.zeros(self.dim, dtype=np.int64)
+
+        # pass 1: raw hashed counts + document frequency per bucket
+        cursor = db.execute("SELECT id, text FROM passages ORDER BY id")
+        row = 0
+        while row < rows:
+            batch = cursor.fetchmany(_BUILD_BATCH)
+            if not batch:
+                break
+            block = np.stack([hashed_counts(text, self.dim) for _, text in batch])
+            vectors[row:row + len(batch)] = block
+            ids[row:row + len(batch)] = [pid for pid, _ in batch]
+            df += np.count_nonzero(block, axis=0)
+            row += len(batch)
+        idf = np.log((1 + row) / (1 + df)).astype(np.float32) + 1.0
+
+        # pass 2: weight and L2-normalise in place, block by block
+        for start in range(0, row, self.block_rows):
+            block = vectors[start:start + self.block_rows] * idf
+            norms = np.linalg.norm(block, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            vectors[start:start + self.block_rows] = block / norms
+        vectors.flush()
+        ids.flush()
+        del vectors, ids
+
+        idf_tmp = self.directory / f"idf.npy{suffix}"
+        with open(idf_tmp, "wb") as fh:
+            np.save(fh, idf)
+        meta = {"dim": self.dim, "rows": row, "signature": signature}
+        meta_tmp = self.directory / f"meta.json{suffix}"
+        meta_tmp.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(vectors_tmp, self.directory / "vectors.npy")
+        os.replace(ids_tmp, self.directory / "ids.npy")
+        os.replace(idf_tmp, self.directory / "idf.npy")
+        os.replace(meta_tmp, self.directory / "meta.json")  # last: the new build is complete
+        with self._lock:
+            self._loaded = None
+        return meta
+
+    def _load(self) -> Dict[str, Any]:
+        """Open the matrix (memory-mapped), rebuilding it first if stale."""
+        _require_numpy()
+        self.search_index._maybe_refresh()
+        signature = self._signature()
+        with self._lock:
+            loaded = self._loaded
+            if loaded is not None and loaded["signature"] == signature:
+                return loaded
+        with self._build_lock:
+            # another process may have built it while this one waited for the lock
+            with self._files_lock(exclusive=True):
+                meta = self._read_meta()
+                if meta is None or meta.get("signature") != signature or meta.get("dim") != self.dim:
+                    meta = self._build()
+            with self._files_lock(exclusive=False):  # no build swaps files while they are opened
+                meta = self._read_meta() or meta
+                loaded = {
+                    "signature": meta["signature"],
+                    "vectors": np.load(self.directory / "vectors.npy", mmap_mode="r"),
+                    "ids": np.load(self.directory / "ids.npy", mmap_mode="r"),
+                    "idf": np.load(self.directory / "idf.npy"),
+                }
+        with self._lock:
+            self._loaded = loaded
+        return loaded
+
+    # --- query ---------------------------------------------------------------
+
+    def embed_queries(self, queries: Sequence[str], idf: "np.ndarray") -> "np.ndarray":
+        matrix = np.stack([hashed_counts(q, self.dim) for q in queries]) * idf
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return (matrix / norms).astype(np.float32)
+
+    def top_k(self, queries: Sequence[str], k: int = 5) -> List[List[tuple]]:
+        """``[(row, score), ...]`` best first, one list per query."""
+        return self._top_k(self._load(), queries, k)
+
+    def _top_k(self, loaded: Dict[str, Any], queries: Sequence[str], k: int) -> List[List[tuple]]:
+        vectors = loaded["vectors"]
+        rows = vectors.shape[0]
+        k = max(0, min(k, rows))
+        if not queries or not k:
+            return [[] for _ in queries]
+        q = self.embed_queries(queries, loaded["idf"])
+        best_scores = np.full((len(queries), 0), -np.inf, dtype=np.float32)
+        best_rows = np.zeros((len(queries), 0), dtype=np.int64)
+        for start in range(0, rows, self.block_rows):
+            block = np.asarray(vectors[start:start + self.block_rows])
+            scores = q @ block.T  # (queries × block) in one product
+            scores = np.concatenate([best_scores, scores], axis=1)
+            cand = np.concatenate([best_rows, np.broadcast_to(
+                np.arange(start, start + block.shape[0]), (len(queries), block.shape[0]))], axis=1)
+            if scores.shape[1] > k:
+                part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+                scores = np.take_along_axis(scores, part, axis=1)
+                cand = np.take_along_axis(cand, part, axis=1)
+            best_scores, best_rows = scores, cand
+        order = np.argsort(-best_scores, axis=1)
+        best_scores = np.take_along_axis(best_scores, order, axis=1)
+        best_rows = np.take_along_axis(best_rows, order, axis=1)
+        return [list(zip(r.tolist(), s.tolist())) for r, s in zip(best_rows, best_scores)]
+
+    def search(self, queries: str | Sequence[str], k: int = 5) -> Dict[str, Any] | List[Dict[str, Any]]:
+        """Top-``k`` passages per query; a list of queries is scored in one batch."""
+        single = isinstance(queries, str)
+        batch = [queries] if single else list(queries)
+        loaded = self._load()
+        ranked = self._top_k(loaded, batch, k)
+        ids = loaded["ids"]
+        db = self.search_index._db()
+        out = []
+        for query, hits in zip(batch, ranked):
+            terms = tokenize(query)
+            results = []
+            for row, score in hits:
+                found = db.execute(
+                    "SELECT d.name, p.page, p.text FROM passages p JOIN docs d ON d.id = p.doc_id WHERE p.id = ?",
+                    (int(ids[row]),)).fetchone()
+                if found is not None:
+                    results.append({"file": found[0], "page": found[1], "score": round(score, 4),
+                                    "snippet": _snippet(found[2], terms)})
+            out.append({"query": query, "results": results})
+        return out[0] if single else out
+
+
+__all__ = ["DIM", "DenseIndex", "hashed_counts"]
@@ -0,0 +1,371 @@
+"""Low-overhead metrics exposed in the Prometheus text format.
+
+Counters, gauges and fixed-bucket histograms, each keyed by a tuple of label
+values.  The hot path takes no lock: every thread updates its own *shard*
+(the per-thread dict of a ``threading.local``), so request threads never
+contend; :meth:`Registry.render` merges the shards when ``/metrics`` is
+scraped.  A thread registers its shard once, under the metric's lock.
+
+:class:`HttpMetrics` is the set both MCP servers record — requests, errors,
+latency, in-flight requests and body bytes per route, calls and latency per
+tool.  A finished request updates a single row (status, bytes, latency
+bucket) and every family is derived from those rows at scrape time, which
+keeps the per-request cost to two dict lookups.  :class:`MetricsMiddleware`
+records it around any ASGI app.
+
+With ``MCP_WORKERS>1`` each process has its own registry: ``/metrics``
+shows the worker that answered the scrape.
+"""
+
+from __future__ import annotations
+
+import abc
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# segundos: de 0,5 ms (rotas em cache) a 10 s (PDFs grandes, lotes)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[Any, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and not value.is_integer():
+        return repr(round(value, 9))
+    return str(int(value))
+
+
+def _labels(names: Sequence[str], values: Labels, extra: str = "") -> str:
+    pairs = [f'{k}="{_escape(str(v))}"' for k, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _header(name: str, help: str, kind: str) -> List[str]:
+    return [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+
+
+def _histogram(name: str, names: Sequence[str], rows: Dict[Labels, List[float]],
+               buckets: Sequence[float], offset: int, total: int) -> Iterable[str]:
+    """Lines of a histogram whose rows hold bucket counts from ``offset`` and the sum at ``total``."""
+    bounds = tuple(buckets) + (float("inf"),)
+    for labels in sorted(rows):
+        row = rows[labels]
+        running = 0
+        for i, bound in enumerate(bounds):
+            running += row[offset + i]
+            le = 'le="%s"' % _number(bound)
+            yield f"{name}_bucket{_labels(names, labels, le)} {running}"
+        yield f"{name}_sum{_labels(names, labels)} {_number(row[total])}"
+        yield f"{name}_count{_labels(names, labels)} {running}"
+
+
+class _Metric(abc.ABC):
+    """Sharded storage: one dict per thread, merged on read."""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._local = threading.local()
+        self._shards: List[Dict[Labels, Any]] = []
+        self._lock = threading.Lock()
+
+    def _register(self, shard: Dict[Labels, Any]) -> None:
+        # primeiro uso nesta thread: o dict dela passa a ser lido no render
+        with self._lock:
+            self._shards.append(shard)
+
+    def _snapshots(self) -> List[Dict[Labels, Any]]:
+        with self._lock:
+            shards = list(self._shards)
+        # dict(shard) copia em C, sem soltar o GIL: não vê um dict pela metade
+        return [dict(shard) for shard in shards]
+
+    def _merged(self) -> Dict[Labels, Any]:
+        totals: Dict[Labels, Any] = {}
+        for shard in self._snapshots():
+            for labels, value in shard.items():
+                if isinstance(value, list):
+                    total = totals.get(labels)
+                    if total is None:
+                        totals[labels] = list(value)
+                    else:
+                        for i, v in enumerate(value):
+                            total[i] += v
+                else:
+                    totals[labels] = totals.get(labels, 0) + value
+        return totals
+
+    @abc.abstractmethod
+    def render(self) -> str:
+        """The metric in the Prometheus text format."""
+
+
+class Counter(_Metric):
+    """Monotonic count per label set."""
+
+    kind = "counter"
+
+    def inc(self, labels: Labels = (), amount: float = 1) -> None:
+        shard = self._local.__dict__
+        if not shard:
+            self._register(shard)
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def value(self, labels: Labels = ()) -> float:
+        return self._merged().get(labels, 0)
+
+    def render(self) -> str:
+        totals = self._merged()
+        lines = _header(self.name, self.help, self.kind)
+        lines += [f"{self.name}{_labels(self.labels, k)} {_number(totals[k])}" for k in sorted(totals)]
+        return "\n".join(lines) + "\n"
+
+
+class Gauge(Counter):
+    """Up-down value per label set (``inc``/``dec``).
+
+    Shards may go negative when another thread decrements; only their sum
+    is meaningful.
+    """
+
+    kind = "gauge"
+
+    def dec(self, labels: Labels = (), amount: float = 1) -> None:
+        self.inc(labels, -amount)
+
+
+class Histogram(_Metric):
+    """Counts of observations per fixed bucket (``le``), plus their sum."""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # por rótulo: [contagem de cada balde..., acima do último, soma]
+        self._width = len(self.buckets) + 2
+
+    def observe(self, value: float, labels: Labels = ()) -> None:
+        shard = self._local.__dict__
+        row = shard.get(labels)
+        if row is None:
+            if not shard:
+                self._register(shard)
+            row = shard[labels] = [0] * (self._width - 1) + [0.0]
+        row[bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    def count(self, labels: Labels = ()) -> int:
+        row = self._merged().get(labels)
+        return sum(row[:-1]) if row else 0
+
+    def render(self) -> str:
+        lines = _header(self.name, self.help, "histogram")
+        lines += _histogram(self.name, self.labels, self._merged(), self.buckets, 0, self._width - 1)
+        return "\n".join(lines) + "\n"
+
+
+class Registry:
+    """The metrics of one process, rendered together for ``/metrics``."""
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def add(self, metric: Any) -> Any:
+        """Register anything with ``name`` and ``render()``."""
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric {metric.name!r} already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self.add(Counter(name, help, labels))
+
+    def gauge(self, name: str, help: str, labels: Sequence[str] = ()) -> Gauge:
+        return self.add(Gauge(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.add(Histogram(name, help, labels, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "".join(metric.render() for metric in metrics)
+
+
+class _RequestStats(_Metric):
+    # linha por (método, rota, status): [bytes in, bytes out, soma, baldes...]
+    # e por (rota,): requisições iniciadas, para o gauge de em andamento
+    def __init__(self, prefix: str, buckets: Sequence[float]):
+        super().__init__(f"{prefix}_requests", "")
+        self.prefix = prefix
+        self.buckets = tuple(sorted(buckets))
+
+    def render(self) -> str:
+        p = self.prefix
+        merged = self._merged()
+        rows = {k: v for k, v in merged.items() if len(k) == 3}
+        started = {k[0]: v for k, v in merged.items() if len(k) == 1}
+        finished: Dict[str, int] = {}
+        errors: Dict[Labels, int] = {}
+        by_route: Dict[Labels, List[float]] = {}
+        for (method, route, status), row in rows.items():
+            n = sum(row[3:])
+            finished[route] = finished.get(route, 0) + n
+            if status >= 400:
+                errors[(method, route)] = errors.get((method, route), 0) + n
+            total = by_route.setdefault((route,), [0] * len(row))
+            for i, v in enumerate(row):
+                total[i] += v
+        lines = _header(f"{p}_requests_total", "Requests answered.", "counter")
+        lines += [f"{p}_requests_total{_labels(('method', 'route', 'status'), k)} {sum(rows[k][3:])}"
+                  for k in sorted(rows)]
+        lines += _header(f"{p}_request_errors_total", "Requests answered with status >= 400.", "counter")
+        lines += [f"{p}_request_errors_total{_labels(('method', 'route'), k)} {errors[k]}" for k in sorted(errors)]
+        lines += _header(f"{p}_request_duration_seconds", "Request latency.", "histogram")
+        lines += _histogram(f"{p}_request_duration_seconds", ("route",), by_route, self.buckets, 3, 2)
+        lines += _header(f"{p}_requests_in_flight", "Requests being handled.", "gauge")
+        lines += [f"{p}_requests_in_flight{_labels(('route',), (r,))} {started[r] - finished.get(r, 0)}"
+                  for r in sorted(started)]
+        for name, help, i in (("request_bytes_total", "Request body bytes received.", 0),
+                              ("response_bytes_total", "Response body bytes sent.", 1)):
+            lines += _header(f"{p}_{name}", help, "counter")
+            lines += [f"{p}_{name}{_labels(('route',), k)} {_number(by_route[k][i])}" for k in sorted(by_route)]
+        return "\n".join(lines) + "\n"
+
+
+class _ToolStats(_Metric):
+    # linha por (tool, resultado): [chamadas, soma, baldes...]; chamadas sem
+    # tempo (argumentos inválidos) só contam
+    def __init__(self, prefix: str, buckets: Sequence[float]):
+        super().__init__(f"{prefix}_tools", "")
+        self.prefix = prefix
+        self.buckets = tuple(sorted(buckets))
+
+    def render(self) -> str:
+        p = self.prefix
+        rows = self._merged()
+        by_tool: Dict[Labels, List[float]] = {}
+        for (tool, _), row in rows.items():
+            total = by_tool.setdefault((tool,), [0] * len(row))
+            for i, v in enumerate(row):
+                total[i] += v
+        lines = _header(f"{p}_tool_calls_total", "Tool calls by outcome.", "counter")
+        lines += [f"{p}_tool_calls_total{_labels(('tool', 'outcome'), k)} {rows[k][0]}" for k in sorted(rows)]
+        lines += _header(f"{p}_tool_duration_seconds", "Tool execution time.", "histogram")
+        lines += _histogram(f"{p}_tool_duration_seconds", ("tool",), by_tool, self.buckets, 2, 1)
+        return "\n".join(lines) + "\n"
+
+
+class HttpMetrics:
+    """Per-route and per-tool metrics shared by both MCP servers.
+
+    ``begin(route)`` when a request starts, ``end(...)`` when it is answered;
+    ``tool(name, seconds, outcome)`` for each tool call.
+    """
+
+    def __init__(self, registry: Registry | None = None, prefix: str = "mcp",
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.registry = registry if registry is not None else Registry()
+        self.buckets = tuple(sorted(buckets))
+        self._requests = self.registry.add(_RequestStats(prefix, self.buckets))
+        self._tools = self.registry.add(_ToolStats(prefix, self.buckets))
+        self._width = len(self.buckets) + 1
+
+    def begin(self, route: str) -> float:
+        """Count a request on ``route`` as in flight; returns its start time."""
+        shard = self._requests._local.__dict__
+        if not shard:
+            self._requests._register(shard)
+        key = (route,)
+        shard[key] = shard.get(key, 0) + 1
+        return time.perf_counter()
+
+    def end(self, method: str, route: str, status: int, started: float,
+            bytes_in: int = 0, bytes_out: int = 0) -> None:
+        elapsed = time.perf_counter() - started
+        shard = self._requests._local.__dict__
+        key = (method, route, status)
+        row = shard.get(key)
+        if row is None:
+            row = shard[key] = [0, 0, 0.0] + [0] * self._width
+        row[0] += bytes_in
+        row[1] += bytes_out
+        row[2] += elapsed
+        row[3 + bisect_left(self.buckets, elapsed)] += 1
+
+    def tool(self, name: str, seconds: float | None, outcome: str = "ok") -> None:
+        """Record a call of tool ``name``; ``seconds=None`` only counts it."""
+        shard = self._tools._local.__dict__
+        if not shard:
+            self._tools._register(shard)
+        key = (name, outcome)
+        row = shard.get(key)
+        if row is None:
+            row = shard[key] = [0, 0.0] + [0] * self._width
+        row[0] += 1
+        if seconds is not None:
+            row[1] += seconds
+            row[2 + bisect_left(self.buckets, seconds)] += 1
+
+    def render(self) -> str:
+        return self.registry.render()
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording :class:`HttpMetrics` for every request.
+
+    ``route_of(method, path)`` maps a request to a bounded label — the route
+    template, not the raw path — so path parameters do not explode the
+    number of series.
+    """
+
+    def __init__(self, app: Callable, metrics: HttpMetrics, route_of: Callable[[str, str], str]):
+        self.app = app
+        self.metrics = metrics
+        self.route_of = route_of
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        route = self.route_of(method, scope["path"])
+        counts = [0, 0, 500]  # bytes recebidos, bytes enviados, status
+
+        async def counting_receive() -> Dict[str, Any]:
+            message = await receive()
+            counts[0] += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                counts[2] = message["status"]
+            else:
+                counts[1] += len(message.get("body", b""))
+            await send(message)
+
+        started = self.metrics.begin(route)
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            self.metrics.end(method, route, counts[2], started, counts[0], counts[1])
+
+
+__all__ = ["CONTENT_TYPE", "DEFAULT_BUCKETS", "Counter", "Gauge", "Histogram", "HttpMetrics",
+           "MetricsMiddleware", "Registry"]
@@ -0,0 +1,1025 @@
+"""Pure-Python PDF text extraction.
+
+``summarize_pdf`` used to read PDFs as if they were plain text, which only
+works for the ``.txt`` stand-ins shipped with the lab.  This module is a
+small, dependency-free reader for real files:
+
+* :class:`PdfDocument` memory-maps the file, reads the cross-reference data
+  (classic ``xref`` tables, xref streams and object streams, following
+  ``/Prev``; a linear object scan is the fallback for damaged files) and
+  resolves objects on demand.  Building the page list only touches the page
+  tree; a page's content streams are inflated with :mod:`zlib` (at most
+  ``MAX_STREAM_BYTES`` each) and decoded only when
+  :meth:`PdfDocument.page_text` asks for that page.
+* Text decoding understands ``/ToUnicode`` CMaps and the common simple-font
+  encodings (WinAnsi, MacRoman, ``/Differences``).  It aims at "good enough
+  words for search and summaries", not at layout fidelity.
+* :class:`PdfTextStore` persists extracted pages per document, so later
+  summaries and searches never parse the same PDF again.
+* :func:`build_pdf` writes small PDFs for tests and benchmarks.
+"""
+
+from __future__ import annotations
+
+import base64
+import codecs
+import hashlib
+import json
+import mmap
+import os
+import re
+import shutil
+import threading
+import unicodedata
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+WHITESPACE = b"\x00\t\n\x0c\r "
+DELIMITERS = b"()<>[]{}/%"
+_SEPARATORS = WHITESPACE + DELIMITERS
+_NUMBER = re.compile(rb"[+-]?(?:\d+\.?\d*|\.\d+)")
+_OBJ_HEADER = re.compile(rb"(\d+)\s+(\d+)\s+obj\b")
+_INLINE_IMAGE_END = re.compile(rb"\sEI(?=\s|$)")
+# Horizontal gap (in ems) between two glyph runs that counts as a space.
+WORD_GAP = 0.2
+# Largest decoded size of a single Flate stream.
+MAX_STREAM_BYTES = 64 * 1024 * 1024
+_ESCAPES = {ord("n"): b"\n", ord("r"): b"\r", ord("t"): b"\t", ord("b"): b"\b",
+            ord("f"): b"\f", ord("("): b"(", ord(")"): b")", ord("\\"): b"\\"}
+
+# Glyph names that cannot be derived from their spelling (see ``_glyph_char``).
+_GLYPHS = {
+    "space": " ", "exclam": "!", "quotedbl": '"', "numbersign": "#", "dollar": "$",
+    "percent": "%", "ampersand": "&", "quotesingle": "'", "quoteright": "’",
+    "quoteleft": "‘", "parenleft": "(", "parenright": ")", "asterisk": "*",
+    "plus": "+", "comma": ",", "hyphen": "-", "period": ".", "slash": "/",
+    "zero": "0", "one": "1", "two": "2", "three": "3", "four": "4", "five": "5",
+    "six": "6", "seven": "7", "eight": "8", "nine": "9", "colon": ":",
+    "semicolon": ";", "less": "<", "equal": "=", "greater": ">", "question": "?",
+    "at": "@", "bracketleft": "[", "backslash": "\\", "bracketright": "]",
+    "underscore": "_", "braceleft": "{", "bar": "|", "braceright": "}",
+    "endash": "–", "emdash": "—", "bullet": "•", "fi": "fi", "fl": "fl",
+    "quotedblleft": "“", "quotedblright": "”", "degree": "°",
+    "germandbls": "ß", "mu": "µ", "periodcentered": "·",
+}
+_ACCENTS = {"acute": "ACUTE", "grave": "GRAVE", "circumflex": "CIRCUMFLEX",
+            "tilde": "TILDE", "dieresis": "DIAERESIS", "cedilla": "CEDILLA", "ring": "RING ABOVE"}
+
+
+class PdfError(ValueError):
+    """Raised when a file cannot be parsed as a PDF."""
+
+
+# What a parser slip on malformed input can raise besides PdfError.
+_PARSE_ERRORS = (ValueError, KeyError, IndexError, TypeError, AttributeError, RecursionError, zlib.error)
+
+
+class Name(str):
+    """A PDF name without its slash (``/Type`` -> ``Name("Type")``).
+
+    Strings are returned as ``bytes``, so names and strings never compare equal.
+    """
+
+
+class Keyword(str):
+    """A bare keyword: ``obj``, ``R``, ``true`` or a content-stream operator."""
+
+
+class Ref(tuple):
+    """Indirect reference ``num gen R``."""
+
+    def __new__(cls, num: int, gen: int = 0):
+        return super().__new__(cls, (num, gen))
+
+    @property
+    def num(self) -> int:
+        return self[0]
+
+
+class Stream:
+    """A stream object: its dictionary plus the still-encoded bytes."""
+
+    __slots__ = ("dict", "raw")
+
+    def __init__(self, dictionary: Dict[str, Any], raw: bytes):
+        self.dict = dictionary
+        self.raw = raw
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.dict.get(key, default)
+
+
+_CLOSE = Keyword("]")
+_DICT_END = Keyword(">>")
+
+
+class _Lexer:
+    """Tokenizer/parser over a bytes-like buffer (``bytes`` or ``mmap``)."""
+
+    def __init__(self, data, pos: int = 0):
+        self.data = data
+        self.pos = pos
+
+    def _skip(self) -> None:
+        data, n = self.data, len(self.data)
+        pos = self.pos
+        while pos < n:
+            c = data[pos]
+            if c in WHITESPACE:
+                pos += 1
+            elif c == 0x25:  # % comment
+                while pos < n and data[pos] not in b"\r\n":
+                    pos += 1
+            else:
+                break
+        self.pos = pos
+
+    def token(self) -> Any:
+        """Return the next token, or ``None`` at end of input."""
+        self._skip()
+        data, pos = self.data, self.pos
+        if pos >= len(data):
+            return None
+        c = data[pos]
+        if c == 0x2F:  # /
+            end = pos + 1
+            while end < len(data) and data[end] not in _SEPARATORS:
+                end += 1
+            raw = bytes(data[pos + 1:end])
+            if b"#" in raw:
+                raw = re.sub(rb"#([0-9A-Fa-f]{2})", lambda m: bytes([int(m.group(1), 16)]), raw)
+            self.pos = end
+            return Name(raw.decode("latin-1"))
+        if c == 0x28:  # (
+            return self._literal()
+        if c == 0x3C:  # <
+            if data[pos + 1:pos + 2] == b"<":
+                self.pos = pos + 2
+                return Keyword("<<")
+            end = data.find(b">", pos)
+            if end < 0:
+                raise PdfError("unterminated hex string")
+            digits = re.sub(rb"[^0-9A-Fa-f]", b"", bytes(data[pos + 1:end]))
+            self.pos = end + 1
+            return bytes.fromhex((digits + b"0" * (len(digits) % 2)).decode("ascii"))
+        if c == 0x3E:  # >
+            self.pos = pos + (2 if data[pos + 1:pos + 2] == b">" else 1)
+            return _DICT_END
+        if c in b"[]{}":
+            self.pos = pos + 1
+            return Keyword(chr(c))
+        end = pos
+        while end < len(data) and data[end] not in _SEPARATORS:
+            end += 1
+        if end == pos:  # stray ')' or similar
+            self.pos = pos + 1
+            return Keyword(chr(c))
+        word = bytes(data[pos:end])
+        self.pos = end
+        if _NUMBER.fullmatch(word):
+            return float(word) if b"." in word else int(word)
+        return Keyword(word.decode("latin-1"))
+
+    def _literal(self) -> bytes:
+        data = self.data
+        pos, depth, out = self.pos + 1, 1, bytearray()
+        n = len(data)
+        while pos < n:
+            c = data[pos]
+            if c == 0x5C:  # backslash
+                pos += 1
+                if pos >= n:
+                    break
+                e = data[pos]
+                if e in _ESCAPES:
+                    out += _ESCAPES[e]
+                    pos += 1
+                elif 0x30 <= e <= 0x37:
+                    end = pos
+                    while end < min(pos + 3, n) and 0x30 <= data[end] <= 0x37:
+                        end += 1
+                    out.append(int(bytes(data[pos:end]), 8) & 0xFF)
+                    pos = end
+                elif e == 0x0D:  # line continuation
+                    pos += 2 if data[pos + 1:pos + 2] == b"\n" else 1
+                elif e == 0x0A:
+                    pos += 1
+                else:
+                    out.append(e)
+                    pos += 1
+                continue
+            if c == 0x28:
+                depth += 1
+            elif c == 0x29:
+                depth -= 1
+                if depth == 0:
+                    pos += 1
+                    break
+            out.append(c)
+            pos += 1
+        self.pos = pos
+        return bytes(out)
+
+    def parse(self, tok: Any = None) -> Any:
+        """Parse one object; ``int int R`` sequences become :class:`Ref`."""
+        if tok is None:
+            tok = self.token()
+        if tok == "[" and isinstance(tok, Keyword):
+            items = []
+            while True:
+                tok = self.token()
+                if tok is None or tok is _CLOSE or tok == "]" and isinstance(tok, Keyword):
+                    return items
+                items.append(self.parse(tok))
+        if tok == "<<" and isinstance(tok, Keyword):
+            result: Dict[str, Any] = {}
+            while True:
+                key = self.token()
+                if key is None or key is _DICT_END:
+                    return result
+                if not isinstance(key, Name):
+                    continue
+                result[key] = self.parse()
+        if isinstance(tok, int):
+            mark = self.pos
+            gen = self.token()
+            if isinstance(gen, int):
+                if self.token() == "R":
+                    return Ref(tok, gen)
+            self.pos = mark
+            return tok
+        if isinstance(tok, Keyword):
+            if tok == "true":
+                return True
+            if tok == "false":
+                return False
+            if tok == "null":
+                return None
+        return tok
+
+
+# --- stream filters ---------------------------------------------------------
+
+def _inflate(raw: bytes) -> bytes:
+    # Truncated or trailing-garbage streams are common: a decompressobj keeps
+    # what inflates.  The output is capped, so a small stream cannot expand
+    # into gigabytes (a zip bomb) before anyone looks at it.
+    d = zlib.decompressobj()
+    try:
+        data = d.decompress(raw, MAX_STREAM_BYTES)
+        more = len(data) == MAX_STREAM_BYTES and not d.eof and d.decompress(d.unconsumed_tail, 1)
+    except zlib.error:
+        return b""
+    if more:
+        raise PdfError(f"stream inflates past {MAX_STREAM_BYTES} bytes")
+    return data
+
+
+def _unpredict(data: bytes, params: Dict[str, Any]) -> bytes:
+    predictor = params.get("Predictor", 1)
+    if predictor < 10:
+        return data
+    colors = params.get("Colors", 1)
+    bpc = params.get("BitsPerComponent", 8)
+    columns = params.get("Columns", 1)
+    bpp = max(1, colors * bpc // 8)
+    row_len = (colors * bpc * columns + 7) // 8
+    out, prev = bytearray(), bytearray(row_len)
+    for start in range(0, len(data), row_len + 1):
+        kind, row = data[start], bytearray(data[start + 1:start + 1 + row_len])
+        for i in range(len(row)):
+            left = row[i - bpp] if i >= bpp else 0
+            up = prev[i]
+            if kind == 1:
+                row[i] = (row[i] + left) & 0xFF
+            elif kind == 2:
+                row[i] = (row[i] + up) & 0xFF
+            elif kind == 3:
+                row[i] = (row[i] + ((left + up) >> 1)) & 0xFF
+            elif kind == 4:
+                upleft = prev[i - bpp] if i >= bpp else 0
+                p = left + up - upleft
+                pa, pb, pc = abs(p - left), abs(p - up), abs(p - upleft)
+                row[i] = (row[i] + (left if pa <= pb and pa <= pc else up if pb <= pc else upleft)) & 0xFF
+        out += row
+        prev = row
+    return bytes(out)
+
+
+def _decode_stream(stream: Stream, resolve) -> bytes:
+    filters = resolve(stream.get("Filter"))
+    params = resolve(stream.get("DecodeParms"))
+    if filters is None:
+        return bytes(stream.raw)
+    if not isinstance(filters, list):
+        filters, params = [filters], [params]
+    elif not isinstance(params, list):
+        params = [params] * len(filters)
+    data = bytes(stream.raw)
+    for name, param in zip(filters, params):
+        param = resolve(param) or {}
+        if name in ("FlateDecode", "Fl"):
+            data = _unpredict(_inflate(data), param)
+        elif name in ("ASCIIHexDecode", "AHx"):
+            digits = re.sub(rb"[^0-9A-Fa-f]", b"", data.split(b">")[0])
+            data = bytes.fromhex((digits + b"0" * (len(digits) % 2)).decode("ascii"))
+        elif name in ("ASCII85Decode", "A85"):
+            data = base64.a85decode(data.strip().removesuffix(b"~>").removeprefix(b"<~"))
+        else:
+            raise PdfError(f"unsupported filter {name}")
+    return data
+
+
+# --- fonts --------------------------------------------------------------------
+
+def _glyph_char(name: str) -> str:
+    if name in _GLYPHS:
+        return _GLYPHS[name]
+    if len(name) == 1:
+        return name
+    if name.startswith("uni") and len(name) == 7:
+        try:
+            return chr(int(name[3:], 16))
+        except ValueError:
+            pass
+    if name.startswith("u") and 5 <= len(name) <= 7:
+        try:
+            return chr(int(name[1:], 16))
+        except ValueError:
+            pass
+    base, accent = name[:1], name[1:]
+    if accent in _ACCENTS and base.isalpha():
+        case = "CAPITAL" if base.isupper() else "SMALL"
+        try:
+            return unicodedata.lookup(f"LATIN {case} LETTER {base.upper()} WITH {_ACCENTS[accent]}")
+        except KeyError:
+            pass
+    return ""
+
+
+class _Font:
+    """Maps the byte strings shown by ``Tj``/``TJ`` to text."""
+
+    def __init__(self, doc: "PdfDocument", font: Dict[str, Any] | None):
+        font = font or {}
+        self.width = 1
+        self.cmap: Dict[int, str] | None = None
+        self.table: List[str] | None = None
+        resolve = doc.resolve
+        to_unicode = resolve(font.get("ToUnicode"))
+        if isinstance(to_unicode, Stream):
+            try:
+                self._parse_cmap(_decode_stream(to_unicode, resolve))
+            except PdfError:
+                self.cmap = None
+        if self.cmap is None and font.get("Subtype") == "Type0":
+            self.width = 2  # CIDs without a ToUnicode map: nothing reliable to show
+            self.cmap = {}
+        if self.cmap is None:
+            encoding = resolve(font.get("Encoding"))
+            base = encoding.get("BaseEncoding") if isinstance(encoding, dict) else encoding
+            codec = "mac_roman" if base == "MacRomanEncoding" else "cp1252"
+            table = [bytes([i]).decode(codec, errors="replace").replace("�", "") for i in range(256)]
+            if isinstance(encoding, dict):
+                code = 0
+                for item in resolve(encoding.get("Differences")) or []:
+                    if isinstance(item, int):
+                        code = item
+                    elif isinstance(item, Name) and code < 256:
+                        table[code] = _glyph_char(item)
+                        code += 1
+            self.table = table
+        self._read_widths(font, resolve)
+
+    def _read_widths(self, font: Dict[str, Any], resolve) -> None:
+        """Glyph advances (1/1000 em), used to tell word gaps from kerning."""
+        widths: Dict[int, float] = {}
+        self.default_width = 500.0
+        if font.get("Subtype") == "Type0":
+            descendants = resolve(font.get("DescendantFonts")) or [{}]
+            cid = resolve(descendants[0]) or {}
+            self.default_width = float(cid.get("DW", 1000))
+            w = resolve(cid.get("W")) or []
+            i = 0
+            while i + 1 < len(w):
+                first, nxt = w[i], resolve(w[i + 1])
+                if isinstance(nxt, list):
+                    for k, value in enumerate(nxt):
+                        widths[first + k] = float(resolve(value))
+                    i += 2
+                elif i + 2 < len(w) and isinstance(nxt, int) and nxt - first < 65536:
+                    for code in range(first, nxt + 1):
+                        widths[code] = float(resolve(w[i + 2]))
+                    i += 3
+                else:
+                    break
+        else:
+            first = resolve(font.get("FirstChar")) or 0
+            for k, value in enumerate(resolve(font.get("Widths")) or []):
+                widths[first + k] = float(resolve(value))
+        self.widths = widths
+
+    def _parse_cmap(self, data: bytes) -> None:
+        cmap: Dict[int, str] = {}
+        lexer = _Lexer(data)
+        operands: List[Any] = []
+        widths = []
+        while True:
+            tok = lexer.token()
+            if tok is None:
+                break
+            if tok == "beginbfchar" or tok == "beginbfrange" or tok == "begincodespacerange":
+                mode, operands = tok, []
+                while True:
+                    tok = lexer.token()
+                    if tok is None or (isinstance(tok, Keyword) and tok.startswith("end")):
+                        break
+                    operands.append(lexer.parse(tok))
+                if mode == "begincodespacerange":
+                    widths += [len(lo) for lo in operands[0::2] if isinstance(lo, bytes)]
+                elif mode == "beginbfchar":
+                    for src, dst in zip(operands[0::2], operands[1::2]):
+                        if isinstance(src, bytes) and isinstance(dst, bytes):
+                            cmap[int.from_bytes(src, "big")] = _utf16(dst)
+                            widths.append(len(src))
+                else:
+                    for lo, hi, dst in zip(operands[0::3], operands[1::3], operands[2::3]):
+                        if not isinstance(lo, bytes) or not isinstance(hi, bytes):
+                            continue
+                        start, stop = int.from_bytes(lo, "big"), int.from_bytes(hi, "big")
+                        widths.append(len(lo))
+                        if isinstance(dst, list):
+                            for code, item in zip(range(start, stop + 1), dst):
+                                if isinstance(item, bytes):
+                                    cmap[code] = _utf16(item)
+                        elif isinstance(dst, bytes) and stop - start < 65536:
+                            base = int.from_bytes(dst, "big")
+                            for offset in range(stop - start + 1):
+                                value = (base + offset).to_bytes(len(dst), "big")
+                                cmap[start + offset] = _utf16(value)
+        self.cmap = cmap
+        self.width = max(1, min(widths)) if widths else 1
+
+    def show(self, raw: bytes) -> Tuple[str, float]:
+        """Return the text of ``raw`` and its advance in ems."""
+        widths, default = self.widths, self.default_width
+        if self.table is not None:
+            table = self.table
+            return "".join(table[b] for b in raw), sum(widths.get(b, default) for b in raw) / 1000
+        cmap, width = self.cmap, self.width
+        codes = [int.from_bytes(raw[i:i + width], "big") for i in range(0, len(raw) - width + 1, width)]
+        return "".join(cmap.get(c, "") for c in codes), sum(widths.get(c, default) for c in codes) / 1000
+
+
+def _utf16(raw: bytes) -> str:
+    return raw.decode("utf-16-be", errors="ignore")
+
+
+# --- document -------------------------------------------------------------------
+
+class PdfDocument:
+    """Lazily parsed PDF file.
+
+    Objects are parsed on first use and cached; the page list is built from the
+    page tree on first access and page text is decoded per page on demand.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as fh:
+            try:
+                self.data = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # empty file
+                self.data = b""
+        if not self.data[:1024].lstrip().startswith(b"%PDF-"):
+            self.close()
+            raise PdfError(f"{self.path.name}: not a PDF file")
+        self._xref: Dict[int, Tuple[int, int, int]] = {}
+        self._objects: Dict[int, Any] = {}
+        self._objstm: Dict[int, Tuple[bytes, List[Tuple[int, int]], int]] = {}
+        self._fonts: Dict[int, _Font] = {}
+        self._pages: List[Tuple[Dict[str, Any], Dict[str, Any]]] | None = None
+        self.trailer: Dict[str, Any] = {}
+        try:
+            self._read_xref()
+        except (PdfError, ValueError, IndexError, TypeError):
+            self._xref, self.trailer = {}, {}
+        if not self._catalog():
+            self._scan()
+
+    def close(self) -> None:
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+
+    def __enter__(self) -> "PdfDocument":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
+
+    # --- cross-reference ---
+
+    def _read_xref(self) -> None:
+        tail = max(0, len(self.data) - 2048)
+        at = self.data.rfind(b"startxref", tail)
+        if at < 0:
+            raise PdfError("startxref not found")
+        offset = _Lexer(self.data, at + 9).token()
+        seen = set()
+        while isinstance(offset, int) and offset not in seen:
+            seen.add(offset)
+            lexer = _Lexer(self.data, offset)
+            tok = lexer.token()
+            if tok == "xref":
+                trailer = self._read_table(lexer)
+                if isinstance(trailer.get("XRefStm"), int):
+                    self._read_xref_stream(trailer["XRefStm"])
+            else:
+                trailer = self._read_xref_stream(offset)
+            for key, value in trailer.items():
+                self.trailer.setdefault(key, value)
+            offset = trailer.get("Prev")
+
+    def _read_table(self, lexer: _Lexer) -> Dict[str, Any]:
+        while True:
+            tok = lexer.token()
+            if tok == "trailer":
+                return lexer.parse()
+            if not isinstance(tok, int):
+                raise PdfError("malformed xref table")
+            start, count = tok, lexer.token()
+            for num in range(start, start + count):
+                off, gen, kind = lexer.token(), lexer.token(), lexer.token()
+                if kind == "n" and num not in self._xref and off:
+                    self._xref[num] = (1, off, gen)
+
+    def _read_xref_stream(self, offset: int) -> Dict[str, Any]:
+        stream = self._parse_at(offset)
+        if not isinstance(stream, Stream) or stream.get("Type") != "XRef":
+            raise PdfError("xref stream expected")
+        data = _decode_stream(stream, self.resolve)
+        widths = stream.get("W")
+        index = stream.get("Index") or [0, stream.get("Size", 0)]
+        row = sum(widths)
+        pos = 0
+        for start, count in zip(index[0::2], index[1::2]):
+            for num in range(start, start + count):
+                fields, p = [], pos
+                for w in widths:
+                    fields.append(int.from_bytes(data[p:p + w], "big") if w else None)
+                    p += w
+                pos += row
+                kind = 1 if fields[0] is None else fields[0]
+                if kind in (1, 2) and num not in self._xref:
+                    self._xref[num] = (kind, fields[1], fields[2] or 0)
+        return stream.dict
+
+    def _scan(self) -> None:
+        """Rebuild the xref by scanning for ``N G obj`` headers."""
+        self._objects.clear()
+        for match in _OBJ_HEADER.finditer(self.data):
+            self._xref[int(match.group(1))] = (1, match.start(), int(match.group(2)))
+        for num in list(self._xref):
+            try:
+                obj = self.get(num)
+                if isinstance(obj, Stream) and obj.get("Type") == "ObjStm":
+                    for i, (inner, _) in enumerate(self._load_objstm(num)[1]):
+                        self._xref.setdefault(inner, (2, num, i))
+            except (PdfError, ValueError, IndexError, TypeError):
+                continue
+        for num in list(self._xref):
+            try:
+                obj = self.get(num)
+            except (PdfError, ValueError, IndexError, TypeError):
+                continue
+            if isinstance(obj, dict) and obj.get("Type") == "Catalog":
+                self.trailer["Root"] = Ref(num, 0)
+        if not self._catalog():
+            raise PdfError(f"{self.path.name}: document catalog not found")
+
+    def _catalog(self) -> Dict[str, Any] | None:
+        try:
+            root = self.resolve(self.trailer.get("Root"))
+        except (PdfError, ValueError, IndexError, TypeError):
+            return None
+        return root if isinstance(root, dict) else None
+
+    # --- objects ---
+
+    def _parse_at(self, offset: int) -> Any:
+        lexer = _Lexer(self.data, offset)
+        if not (isinstance(lexer.token(), int) and isinstance(lexer.token(), int) and lexer.token() == "obj"):
+            raise PdfError(f"no object at offset {offset}")
+        obj = lexer.parse()
+        if isinstance(obj, dict):
+            mark = lexer.pos
+            if lexer.token() == "stream":
+                return Stream(obj, self._stream_data(obj, lexer.pos))
+            lexer.pos = mark
+        return obj
+
+    def _stream_data(self, dictionary: Dict[str, Any], pos: int) -> bytes:
+        data = self.data
+        if data[pos:pos + 2] == b"\r\n":
+            pos += 2
+        elif data[pos:pos + 1] in (b"\n", b"\r"):
+            pos += 1
+        length = dictionary.get("Length")
+        if isinstance(length, Ref):
+            try:
+                length = self.resolve(length)
+            except (PdfError, ValueError, IndexError, TypeError):
+                length = None
+        if isinstance(length, int) and data[pos + length:pos + length + 30].lstrip(WHITESPACE).startswith(b"endstream"):
+            return data[pos:pos + length]
+        end = data.find(b"endstream", pos)
+        if end < 0:
+            raise PdfError("unterminated stream")
+        return bytes(data[pos:end]).rstrip(b"\r\n")
+
+    def _load_objstm(self, num: int) -> Tuple[bytes, List[Tuple[int, int]], int]:
+        cached = self._objstm.get(num)
+        if cached is None:
+            stream = self.get(num)
+            data = _decode_stream(stream, self.resolve)
+            lexer = _Lexer(data)
+            pairs = [(lexer.token(), lexer.token()) for _ in range(stream.get("N", 0))]
+            cached = self._objstm[num] = (data, pairs, stream.get("First", 0))
+        return cached
+
+    def get(self, num: int) -> Any:
+        """Return object ``num`` (``None`` when it does not exist)."""
+        if num in self._objects:
+            return self._objects[num]
+        entry = self._xref.get(num)
+        obj = None
+        if entry is not None:
+            kind, a, b = entry
+            if kind == 1:
+                obj = self._parse_at(a)
+            else:
+                data, pairs, first = self._load_objstm(a)
+                obj = _Lexer(data, first + pairs[b][1]).parse()
+        self._objects[num] = obj
+        return obj
+
+    def resolve(self, obj: Any) -> Any:
+        depth = 0
+        while isinstance(obj, Ref) and depth < 32:
+            obj = self.get(obj.num)
+            depth += 1
+        return obj
+
+    # --- pages ---
+
+    @property
+    def pages(self) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """``(page dict, inherited resources)`` pairs in document order."""
+        if self._pages is None:
+            pages = []
+            root = self._catalog() or {}
+            stack = [(self.resolve(root.get("Pages")), {})]
+            seen = set()
+            while stack:
+                node, resources = stack.pop()
+                if not isinstance(node, dict) or id(node) in seen:
+                    continue
+                seen.add(id(node))
+                resources = self.resolve(node.get("Resources")) or resources
+                kids = self.resolve(node.get("Kids"))
+                if node.get("Type") == "Page" or kids is None:
+                    pages.append((node, resources))
+                else:
+                    stack.extend((self.resolve(kid), resources) for kid in reversed(kids))
+            self._pages = pages
+        return self._pages
+
+    @property
+    def page_count(self) -> int:
+        return len(self.pages)
+
+    def page_text(self, index: int) -> str:
+        """Decode the text of page ``index`` (0-based)."""
+        page, resources = self.pages[index]
+        contents = self.resolve(page.get("Contents"))
+        streams = contents if isinstance(contents, list) else [contents]
+        data = b"\n".join(_decode_stream(s, self.resolve)
+                          for s in map(self.resolve, streams) if isinstance(s, Stream))
+        return _normalize(self._show(data, resources, 0))
+
+    def iter_pages(self) -> Iterator[str]:
+        for index in range(self.page_count):
+            yield self.page_text(index)
+
+    def _font(self, ref: Any) -> _Font:
+        key = ref.num if isinstance(ref, Ref) else id(ref)
+        font = self._fonts.get(key)
+        if font is None:
+            font = self._fonts[key] = _Font(self, self.resolve(ref))
+        return font
+
+    def _show(self, content: bytes, resources: Dict[str, Any], depth: int) -> str:
+        """Run the text operators of a content stream and collect the text.
+
+        Only positions along the current line are tracked: a vertical move
+        starts a new line and a horizontal gap wider than ``WORD_GAP`` ems
+        between the end of the last shown string and the next one becomes a
+        space.  That is enough to rebuild words from PDFs that place every
+        glyph run separately.
+        """
+        resolve = self.resolve
+        fonts = resolve((resources or {}).get("Font")) or {}
+        xobjects = resolve((resources or {}).get("XObject")) or {}
+        font = _Font(self, None)
+        size = 1.0
+        x = y = advance = 0.0  # line origin and text advance since it
+        out: List[str] = []
+        operands: List[Any] = []
+        lexer = _Lexer(content)
+
+        def move(dx: float, dy: float) -> None:
+            nonlocal x, y, advance
+            if abs(dy) > 0.01:
+                out.append("\n")
+            elif dx - advance > WORD_GAP * abs(size) or dx < 0:
+                out.append(" ")
+            x, y, advance = x + dx, y + dy, 0.0
+
+        def show(raw: Any) -> None:
+            nonlocal advance
+            if isinstance(raw, bytes):
+                text, ems = font.show(raw)
+                out.append(text)
+                advance += ems * size
+
+        while True:
+            tok = lexer.token()
+            if tok is None:
+                break
+            if not isinstance(tok, Keyword) or tok in ("[", "<<", "true", "false", "null"):
+                operands.append(lexer.parse(tok))
+                continue
+            nums = [v for v in operands if isinstance(v, (int, float))]
+            if tok == "Tj" and operands:
+                show(operands[-1])
+            elif tok == "TJ" and operands and isinstance(operands[-1], list):
+                for item in operands[-1]:
+                    if isinstance(item, (int, float)):
+                        advance -= item / 1000 * size
+                        if item < -WORD_GAP * 1000:
+                            out.append(" ")
+                    else:
+                        show(item)
+            elif tok in ("'", '"') and operands:
+                move(0.0, -1.0)
+                show(operands[-1])
+            elif tok == "T*":
+                move(0.0, -1.0)
+            elif tok in ("Td", "TD") and len(nums) >= 2:
+                move(nums[-2], nums[-1])
+            elif tok == "Tm" and len(nums) >= 6:
+                scale = nums[0] or 1.0
+                move((nums[4] - x) / scale, nums[5] - y)
+                x, y = nums[4], nums[5]
+            elif tok in ("BT", "ET"):
+                x = y = advance = 0.0
+                if tok == "ET":
+                    out.append("\n")
+            elif tok == "Tf" and len(operands) >= 2 and isinstance(operands[-2], Name):
+                font = self._font(fonts.get(operands[-2])) if operands[-2] in fonts else _Font(self, None)
+                size = nums[-1] if nums else 1.0
+            elif tok == "Do" and operands and depth < 8:
+                xobject = resolve(xobjects.get(operands[-1]))
+                if isinstance(xobject, Stream) and xobject.get("Subtype") == "Form":
+                    inner = resolve(xobject.get("Resources")) or resources
+                    out.append("\n" + self._show(_decode_stream(xobject, resolve), inner, depth + 1) + "\n")
+            elif tok == "BI":
+                end = _INLINE_IMAGE_END.search(content, lexer.pos)
+                lexer.pos = end.end() if end else len(content)
+            operands = []
+        return "".join(out)
+
+
+def _normalize(text: str) -> str:
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+# --- persistent text store ---------------------------------------------------------
+
+@contextmanager
+def _as_pdf_error(fp: Path) -> Iterator[None]:
+    try:
+        yield
+    except PdfError:
+        raise
+    except _PARSE_ERRORS as e:
+        raise PdfError(f"{fp.name}: {type(e).__name__}: {e}") from e
+
+
+class PdfTextStore:
+    """Per-document store of extracted page text.
+
+    Each PDF gets a directory named after the hash of its resolved path, with a
+    ``meta.json`` (size/mtime stamp and page count) and one UTF-8 file per
+    extracted page.  Pages are extracted lazily the first time they are asked
+    for; a changed file (different stamp) wipes its directory.  Parsed
+    documents are kept open in a small LRU while pages are being filled in.
+    Whatever a malformed file makes the parser raise comes out as
+    :class:`PdfError`.
+    """
+
+    def __init__(self, root: str | Path, open_documents: int = 4):
+        self.root = Path(root)
+        self.open_documents = open_documents
+        self._docs: "OrderedDict[str, Tuple[Tuple[int, int], PdfDocument]]" = OrderedDict()
+        self._metas: Dict[str, Tuple[Path, Dict[str, Any]]] = {}
+        self._lock = threading.RLock()
+        self.extracted = 0
+
+    def _dir(self, fp: Path) -> Path:
+        return self.root / hashlib.sha256(str(fp).encode("utf-8")).hexdigest()[:32]
+
+    def _meta(self, fp: Path) -> Tuple[Path, Dict[str, Any]]:
+        st = fp.stat()
+        stamp = [st.st_size, st.st_mtime_ns]
+        known = self._metas.get(str(fp))
+        if known is not None and known[1]["stamp"] == stamp:
+            return known
+        directory = self._dir(fp)
+        meta_path = directory / "meta.json"
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            meta = None
+        if meta is None or meta.get("stamp") != stamp or meta.get("path") != str(fp):
+            shutil.rmtree(directory, ignore_errors=True)
+            with _as_pdf_error(fp):
+                pages = self._document(fp, tuple(stamp)).page_count
+            meta = {"path": str(fp), "stamp": stamp, "pages": pages}
+            directory.mkdir(parents=True, exist_ok=True)
+            _write_atomic(meta_path, json.dumps(meta))
+        self._metas[str(fp)] = (directory, meta)
+        return directory, meta
+
+    def _document(self, fp: Path, stamp: Tuple[int, int]) -> PdfDocument:
+        with self._lock:
+            cached = self._docs.pop(str(fp), None)
+            if cached is not None and cached[0] == stamp:
+                self._docs[str(fp)] = cached
+                return cached[1]
+            if cached is not None:
+                cached[1].close()
+            doc = PdfDocument(fp)
+            self._docs[str(fp)] = (stamp, doc)
+            while len(self._docs) > self.open_documents:
+                _, (_, old) = self._docs.popitem(last=False)
+                old.close()
+            return doc
+
+    def page_count(self, path: str | Path) -> int:
+        return self._meta(Path(path).resolve())[1]["pages"]
+
+    def page_text(self, path: str | Path, index: int) -> str:
+        fp = Path(path).resolve()
+        directory, meta = self._meta(fp)
+        if not 0 <= index < meta["pages"]:
+            raise IndexError(f"page {index} out of range")
+        page_file = directory / f"{index + 1:06d}.txt"
+        try:
+            return page_file.read_text(encoding="utf-8")
+        except OSError:
+            pass
+        with self._lock, _as_pdf_error(fp):
+            text = self._document(fp, tuple(meta["stamp"])).page_text(index)
+            self.extracted += 1
+        _write_atomic(page_file, text)
+        return text
+
+    def iter_pages(self, path: str | Path) -> Iterator[str]:
+        for index in range(self.page_count(path)):
+            yield self.page_text(path, index)
+
+    def text(self, path: str | Path) -> str:
+        return "\n\n".join(self.iter_pages(path))
+
+    def first_words(self, path: str | Path, max_words: int) -> str:
+        """First ``max_words`` words of the document, extracting pages as needed."""
+        words: List[str] = []
+        if max_words > 0:
+            for page in self.iter_pages(path):
+                words.extend(page.split()[:max_words - len(words)])
+                if len(words) >= max_words:
+                    break
+        return " ".join(words)
+
+    def close(self) -> None:
+        with self._lock:
+            for _, doc in self._docs.values():
+                doc.close()
+            self._docs.clear()
+
+
+def _write_atomic(target: Path, text: str) -> None:
+    tmp = target.with_name(f"{target.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        tmp.write_text(text, encoding="utf-8")
+        os.replace(tmp, target)
+    except OSError:
+        tmp.unlink(missing_ok=True)
+
+
+def is_pdf(path: str | Path) -> bool:
+    """``True`` when ``path`` starts with the ``%PDF-`` signature."""
+    try:
+        with open(path, "rb") as fh:
+            return fh.read(1024).lstrip().startswith(b"%PDF-")
+    except OSError:
+        return False
+
+
+# --- writer (tests and benchmarks) ---------------------------------------------------
+
+def _pdf_string(text: str) -> bytes:
+    raw = text.encode("cp1252", errors="replace")
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+def build_pdf(pages: List[str], compress: bool = True, object_streams: bool = False) -> bytes:
+    """Return a minimal PDF with one Helvetica text block per page.
+
+    ``object_streams=True`` stores the non-stream objects in an object stream
+    and writes an xref stream instead of a classic xref table (PDF 1.5 style).
+    """
+    font, pages_num = 3, 2
+    objects: Dict[int, bytes] = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        font: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+    }
+    streams: Dict[int, bytes] = {}
+    kids = []
+    num = 4
+    for text in pages:
+        ops = [b"BT /F1 11 Tf 72 770 Td 14 TL"]
+        for line in text.splitlines() or [""]:
+            ops.append(_pdf_string(line) + b" Tj T*")
+        ops.append(b"ET")
+        content = b"\n".join(ops)
+        if compress:
+            content = zlib.compress(content)
+        page_num, content_num = num, num + 1
+        num += 2
+        kids.append(page_num)
+        objects[page_num] = (b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                             b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (font, content_num))
+        filt = b" /Filter /FlateDecode" if compress else b""
+        streams[content_num] = b"<< /Length %d%s >>\nstream\n" % (len(content), filt) + content + b"\nendstream"
+    objects[pages_num] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids))
+
+    out = bytearray(b"%PDF-1.5\n%\xe2\xe3\xcf\xd3\n")
+    offsets: Dict[int, Tuple[int, int, int]] = {}
+    size = num
+    if not object_streams:
+        for n in sorted({**objects, **streams}):
+            offsets[n] = (1, len(out), 0)
+            out += b"%d 0 obj\n%s\nendobj\n" % (n, objects.get(n) or streams[n])
+        xref_at = len(out)
+        out += b"xref\n0 %d\n0000000000 65535 f \n" % size
+        for n in range(1, size):
+            out += b"%010d 00000 n \n" % offsets[n][1]
+        out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref_at)
+        return bytes(out)
+
+    for n in sorted(streams):
+        offsets[n] = (1, len(out), 0)
+        out += b"%d 0 obj\n%s\nendobj\n" % (n, streams[n])
+    objstm_num, xref_num = num, num + 1
+    size = num + 2
+    header, body = [], bytearray()
+    for i, n in enumerate(sorted(objects)):
+        header.append(b"%d %d" % (n, len(body)))
+        body += objects[n] + b"\n"
+        offsets[n] = (2, objstm_num, i)
+    head = b" ".join(header) + b"\n"
+    payload = zlib.compress(head + bytes(body))
+    offsets[objstm_num] = (1, len(out), 0)
+    out += (b"%d 0 obj\n<< /Type /ObjStm /N %d /First %d /Length %d /Filter /FlateDecode >>\nstream\n"
+            % (objstm_num, len(objects), len(head), len(payload)) + payload + b"\nendstream\nendobj\n")
+    offsets[xref_num] = (1, len(out), 0)
+    rows = bytearray(b"\x00\x00\x00\x00\x00\xff\xff")
+    for n in range(1, size):
+        kind, a, b = offsets[n]
+        rows += bytes([kind]) + a.to_bytes(4, "big") + b.to_bytes(2, "big")
+    rows = zlib.compress(bytes(rows))
+    xref_at = len(out)
+    out += (b"%d 0 obj\n<< /Type /XRef /Size %d /W [1 4 2] /Root 1 0 R /Length %d /Filter /FlateDecode >>\n"
+            b"stream\n" % (xref_num, size, len(rows)) + rows + b"\nendstream\nendobj\n")
+    out += b"startxref\n%d\n%%%%EOF\n" % xref_at
+    return bytes(out)
+
+
+__all__ = ["MAX_STREAM_BYTES", "PdfDocument", "PdfError", "PdfTextStore", "build_pdf", "is_pdf"]
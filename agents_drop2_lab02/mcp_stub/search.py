@@ -0,0 +1,278 @@
+"""BM25 search over the asset directory (``search_pdfs`` tool).
+
+Without search an agent has to ``list_pdfs`` and ``summarize_pdf`` every file
+to find anything.  :class:`SearchIndex` keeps an inverted index on disk (one
+SQLite file, standard library only) at passage granularity: one passage per
+PDF page (text from :class:`~mcp_stub.pdf.PdfTextStore`) and one per
+``PASSAGE_WORDS`` words of plain-text assets.
+
+The index is updated incrementally: :meth:`SearchIndex.refresh` compares each
+file's size and mtime with what was indexed and only re-indexes files that
+were added or changed, dropping the ones that disappeared.  Text is extracted
+outside any lock; each document is then written in its own immediate
+(write-locked) transaction that re-checks the document first, so pre-forked
+workers sharing the file take turns instead of inserting the same documents,
+and none of them waits for a whole initial indexing run.  Every committed
+change bumps a generation counter stored in the file; per-process caches
+(corpus statistics here, the dense matrix signature) are keyed on it, so a
+refresh done by another worker is seen by all.  Queries read the postings of
+the query terms only and rank passages with BM25.
+
+Nothing touches the disk until the first query or refresh: creating a
+:class:`SearchIndex` at import time is free.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import Counter
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+from .pdf import PdfError, PdfTextStore, is_pdf
+from .text import iter_words
+
+PASSAGE_WORDS = 200
+SNIPPET_CHARS = 240
+_TOKEN = re.compile(r"\w+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS passages (
+    id INTEGER PRIMARY KEY,
+    doc_id INTEGER NOT NULL,
+    page INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS passages_doc ON passages(doc_id);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    passage_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    PRIMARY KEY (term, passage_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_passage ON postings(passage_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase, accent-folded word tokens (``Pressão`` -> ``pressao``)."""
+    folded = unicodedata.normalize("NFKD", text.lower())
+    folded = "".join(c for c in folded if not unicodedata.combining(c))
+    return _TOKEN.findall(folded)
+
+
+class SearchIndex:
+    """Incrementally maintained BM25 index of the files in ``assets``.
+
+    ``refresh_interval`` bounds how often a query re-checks the directory
+    (``0`` checks on every query); :meth:`refresh` can always be called
+    explicitly, e.g. from a file watcher.
+    """
+
+    def __init__(self, assets: str | Path, index_path: str | Path,
+                 text_store: PdfTextStore | None = None,
+                 refresh_interval: float = 2.0, k1: float = 1.2, b: float = 0.75):
+        self.assets = Path(assets)
+        self.index_path = Path(index_path)
+        self.text_store = text_store or PdfTextStore(self.index_path.parent / "pdf_text")
+        self.refresh_interval = refresh_interval
+        self.k1, self.b = k1, b
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._checked = 0.0
+        self._stats: Tuple[int, int, float] | None = None  # (generation, passages, avgdl)
+
+    def _connect(self) -> sqlite3.Connection:
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        db = sqlite3.connect(self.index_path, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        with db:
+            db.executescript(_SCHEMA)
+        return db
+
+    def _db(self) -> sqlite3.Connection:
+        # one connection per thread and per process (never reused across fork)
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            local.db, local.pid = self._connect(), os.getpid()
+        return local.db
+
+    # --- indexing ----------------------------------------------------------
+
+    def generation(self) -> int:
+        """Counter bumped by every committed change, by any process sharing the file."""
+        row = self._db().execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        return row[0] if row else 0
+
+    def _passages(self, fp: Path) -> Iterator[Tuple[int, str]]:
+        if is_pdf(fp):
+            for page, text in enumerate(self.text_store.iter_pages(fp), 1):
+                yield page, text
+            return
+        words = iter_words(fp)
+        page = 1
+        while True:
+            chunk = list(islice(words, PASSAGE_WORDS))
+            if not chunk:
+                return
+            yield page, " ".join(chunk)
+            page += 1
+
+    def refresh(self) -> Dict[str, int]:
+        """Bring the index in line with the directory; return what changed."""
+        with self._write_lock:
+            db = self._db()
+            indexed = {name: (size, mtime) for name, size, mtime in db.execute("SELECT name, size, mtime_ns FROM docs")}
+            current = {}
+            with os.scandir(self.assets) as it:
+                for entry in it:
+                    if entry.is_file():
+                        st = entry.stat()
+                        current[entry.name] = (st.st_size, st.st_mtime_ns)
+            changes = {"added": 0, "updated": 0, "removed": 0}
+            for name in sorted(indexed.keys() | current.keys()):
+                stamp = current.get(name)
+                if indexed.get(name) == stamp:
+                    continue
+                passages = self._extract(name) if stamp is not None else []
+                change = self._apply(db, name, stamp, passages)
+                if change is not None:
+                    changes[change] += 1
+            self._checked = time.monotonic()
+            return changes
+
+    def _extract(self, name: str) -> List[Tuple[int, str, Counter]]:
+        try:
+            passages = list(self._passages(self.assets / name))
+        except (OSError, PdfError):
+            return []  # unreadable: the doc row is kept so it is not retried until it changes
+        return [(page, text, Counter(tokenize(text))) for page, text in passages]
+
+    def _apply(self, db: sqlite3.Connection, name: str, stamp: Tuple[int, int] | None,
+               passages: List[Tuple[int, str, Counter]]) -> str | None:
+        """Write one document in its own transaction; ``None`` if nothing changed."""
+        # trava de escrita antes de reler o documento: outro processo com o
+        # mesmo arquivo espera e depois vê o que este já gravou
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            row = db.execute("SELECT id, size, mtime_ns FROM docs WHERE name = ?", (name,)).fetchone()
+            if (row[1:] if row else None) == stamp:
+                db.rollback()
+                return None
+            if row is not None:
+                self._drop(db, row[0])
+            if stamp is not None:
+                self._add(db, name, *stamp, passages)
+            db.execute("INSERT INTO meta (key, value) VALUES ('generation', 1) "
+                       "ON CONFLICT(key) DO UPDATE SET value = value + 1")
+        except BaseException:
+            db.rollback()
+            raise
+        db.commit()
+        return "added" if row is None else "removed" if stamp is None else "updated"
+
+    def _drop(self, db: sqlite3.Connection, doc_id: int) -> None:
+        db.execute("DELETE FROM postings WHERE passage_id IN (SELECT id FROM passages WHERE doc_id = ?)", (doc_id,))
+        db.execute("DELETE FROM passages WHERE doc_id = ?", (doc_id,))
+        db.execute("DELETE FROM docs WHERE id = ?", (doc_id,))
+
+    def _add(self, db: sqlite3.Connection, name: str, size: int, mtime: int,
+             passages: List[Tuple[int, str, Counter]]) -> None:
+        doc_id = db.execute("INSERT INTO docs (name, size, mtime_ns) VALUES (?, ?, ?)",
+                            (name, size, mtime)).lastrowid
+        for page, text, terms in passages:
+            length = sum(terms.values())
+            if not length:
+                continue
+            passage_id = db.execute("INSERT INTO passages (doc_id, page, length, text) VALUES (?, ?, ?, ?)",
+                                    (doc_id, page, length, text)).lastrowid
+            db.executemany("INSERT INTO postings (term, passage_id, tf, length) VALUES (?, ?, ?, ?)",
+                           [(term, passage_id, tf, length) for term, tf in terms.items()])
+
+    # --- querying ----------------------------------------------------------
+
+    def _maybe_refresh(self) -> None:
+        if time.monotonic() - self._checked >= self.refresh_interval:
+            self.refresh()
+
+    def _corpus_stats(self, db: sqlite3.Connection) -> Tuple[int, float]:
+        generation = self.generation()
+        stats = self._stats
+        if stats is None or stats[0] != generation:
+            count, total = db.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM passages").fetchone()
+            stats = self._stats = (generation, count, total / count if count else 0.0)
+        return stats[1], stats[2]
+
+    def search(self, query: str, k: int = 5) -> Dict[str, Any]:
+        """Top-``k`` passages for ``query`` ranked by BM25."""
+        start = time.perf_counter()
+        self._maybe_refresh()
+        db = self._db()
+        n, avgdl = self._corpus_stats(db)
+        terms = list(dict.fromkeys(tokenize(query)))
+        # BM25 summed inside SQLite: only the top-k rows cross into Python.
+        k1, b = self.k1, self.b
+        parts, params = [], []
+        for term in terms:
+            df = db.execute("SELECT COUNT(*) FROM postings WHERE term = ?", (term,)).fetchone()[0]
+            if not df:
+                continue
+            idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+            parts.append("SELECT passage_id, ? * tf / (tf + ? + ? * length) AS s FROM postings WHERE term = ?")
+            params += [idf * (k1 + 1), k1 * (1 - b), k1 * b / avgdl, term]
+        top = []
+        if parts and k > 0:
+            top = db.execute(f"SELECT passage_id, SUM(s) AS score FROM ({' UNION ALL '.join(parts)}) "
+                             "GROUP BY passage_id ORDER BY score DESC LIMIT ?", params + [k]).fetchall()
+
+        results = []
+        for passage_id, score in top:
+            name, page, text = db.execute(
+                "SELECT d.name, p.page, p.text FROM passages p JOIN docs d ON d.id = p.doc_id WHERE p.id = ?",
+                (passage_id,)).fetchone()
+            results.append({"file": name, "page": page, "score": round(score, 4),
+                            "snippet": _snippet(text, terms)})
+        return {"results": results, "passages": n, "took_ms": round((time.perf_counter() - start) * 1000, 3)}
+
+    def close(self) -> None:
+        if getattr(self._local, "pid", None) == os.getpid():
+            self._local.db.close()
+            self._local.pid = None
+
+
+def _snippet(text: str, terms: List[str]) -> str:
+    """``SNIPPET_CHARS`` characters of ``text`` around the first query term."""
+    if len(text) <= SNIPPET_CHARS:
+        return text
+    wanted = set(terms)
+    at = 0
+    for match in _TOKEN.finditer(text):  # positions must refer to the original text
+        if wanted.intersection(tokenize(match.group())):
+            at = match.start()
+            break
+    begin = max(0, at - SNIPPET_CHARS // 4)
+    snippet = text[begin:begin + SNIPPET_CHARS]
+    return ("…" if begin else "") + snippet + ("…" if begin + SNIPPET_CHARS < len(text) else "")
+
+
+__all__ = ["PASSAGE_WORDS", "SearchIndex", "tokenize"]
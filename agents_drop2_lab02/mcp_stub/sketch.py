@@ -0,0 +1,99 @@
+"""Mergeable probabilistic sketches for streaming text statistics.
+
+:class:`HyperLogLog` estimates the number of distinct items and
+:class:`CountMinSketch` estimates per-item frequencies, both in fixed memory
+whatever the input size.  Two sketches with the same parameters merge
+exactly (register max / counter sum), which is what lets
+:mod:`mcp_stub.analyzer` count chunks in separate processes and combine the
+partial results.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+from array import array
+
+
+def hash64(item: str) -> int:
+    """Stable 64-bit hash (``hash()`` is salted per process)."""
+    return int.from_bytes(hashlib.blake2b(item.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HyperLogLog:
+    """Distinct-count estimator with ``2**p`` one-byte registers.
+
+    The standard error is about ``1.04 / sqrt(2**p)`` (1.6% for ``p=12``).
+    """
+
+    def __init__(self, p: int = 12):
+        if not 4 <= p <= 18:
+            raise ValueError("p must be between 4 and 18")
+        self.p = p
+        self.registers = bytearray(1 << p)
+
+    def add(self, item: str) -> None:
+        self.add_hash(hash64(item))
+
+    def add_hash(self, h: int) -> None:
+        index = h >> (64 - self.p)
+        rest = h & ((1 << (64 - self.p)) - 1)
+        rank = (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog") -> None:
+        if other.p != self.p:
+            raise ValueError("cannot merge sketches with different precision")
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def estimate(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if raw <= 2.5 * m and zeros:
+            return round(m * math.log(m / zeros))  # linear counting for small sets
+        return round(raw)
+
+
+class CountMinSketch:
+    """Frequency estimator: ``depth`` rows of ``width`` counters.
+
+    Estimates never undercount; they overcount by at most ``e / width`` of
+    the total with probability ``1 - exp(-depth)``.
+    """
+
+    def __init__(self, width: int = 2048, depth: int = 4):
+        self.width = width
+        self.depth = depth
+        self.rows = [array("q", bytes(8 * width)) for _ in range(depth)]
+        self.total = 0
+
+    def _cells(self, h: int):
+        # double hashing: the two 32-bit halves give ``depth`` independent columns
+        h1, h2 = h & 0xFFFFFFFF, (h >> 32) | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, item: str, count: int = 1) -> None:
+        self.add_hash(hash64(item), count)
+
+    def add_hash(self, h: int, count: int = 1) -> None:
+        for row, col in zip(self.rows, self._cells(h)):
+            row[col] += count
+        self.total += count
+
+    def estimate(self, item: str) -> int:
+        return self.estimate_hash(hash64(item))
+
+    def estimate_hash(self, h: int) -> int:
+        return min(row[col] for row, col in zip(self.rows, self._cells(h)))
+
+    def merge(self, other: "CountMinSketch") -> None:
+        if (other.width, other.depth) != (self.width, self.depth):
+            raise ValueError("cannot merge sketches with different dimensions")
+        self.rows = [array("q", map(int.__add__, a, b)) for a, b in zip(self.rows, other.rows)]
+        self.total += other.total
+
+
+__all__ = ["CountMinSketch", "HyperLogLog", "hash64"]
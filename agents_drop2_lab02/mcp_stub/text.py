@@ -0,0 +1,87 @@
+"""Streaming word tokenizer for large text assets.
+
+``summarize_pdf`` only needs the first ``max_words`` words of a document, so
+reading and splitting the whole file is wasted work on big inputs.
+:func:`iter_words` decodes the file in fixed-size chunks and yields words
+lazily, which keeps memory flat and lets callers stop early.
+"""
+
+from __future__ import annotations
+
+import codecs
+import re
+from itertools import islice
+from pathlib import Path
+from typing import Iterator
+
+CHUNK_SIZE = 8192
+# palavras maiores saem em pedaços deste tamanho: um arquivo sem espaços não
+# vira uma palavra do tamanho do arquivo na memória
+MAX_WORD_LENGTH = 1024
+
+# ``\s`` follows ``str.isspace`` for ``str`` patterns, so words match
+# ``str.split()`` exactly.
+_WORD = re.compile(r"\S+")
+
+
+def _pieces(word: str) -> Iterator[str]:
+    if len(word) <= MAX_WORD_LENGTH:
+        yield word
+        return
+    for start in range(0, len(word), MAX_WORD_LENGTH):
+        yield word[start:start + MAX_WORD_LENGTH]
+
+
+def iter_words(path: str | Path, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Yield the whitespace-separated words of ``path`` one at a time.
+
+    The file is read in ``chunk_size`` byte blocks through an incremental
+    UTF-8 decoder, so multi-byte sequences split across blocks are decoded
+    correctly and invalid bytes are dropped (like ``errors="ignore"``).  A
+    word cut by a block boundary is carried over to the next block.  Words
+    longer than ``MAX_WORD_LENGTH`` come out in pieces of that length, the
+    same pieces whatever the block size.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+    pending = ""  # início de palavra que pode continuar no próximo bloco
+    with open(path, "rb") as fh:
+        while True:
+            raw = fh.read(chunk_size)
+            # só o texto novo é varrido: ``pending`` nunca é relido
+            text = decoder.decode(raw, final=not raw)
+            if pending and text[:1].isspace():
+                yield from _pieces(pending)
+                pending = ""
+            for match in _WORD.finditer(text):
+                word = match.group()
+                if pending and match.start() == 0:
+                    word, pending = pending + word, ""
+                if raw and match.end() == len(text):
+                    # guarda só o resto que não fecha um pedaço inteiro
+                    whole = len(word) - len(word) % MAX_WORD_LENGTH
+                    if whole:
+                        yield from _pieces(word[:whole])
+                    pending = word[whole:]
+                else:
+                    yield from _pieces(word)
+            if not raw:
+                if pending:
+                    yield from _pieces(pending)
+                return
+
+
+def first_words(path: str | Path, max_words: int, chunk_size: int = CHUNK_SIZE) -> str:
+    """Return the first ``max_words`` words of ``path`` joined by spaces.
+
+    Reading stops as soon as enough words were seen.
+    """
+    if max_words <= 0:
+        return ""
+    words = iter_words(path, chunk_size)
+    try:
+        return " ".join(islice(words, max_words))
+    finally:
+        words.close()
+
+
+__all__ = ["CHUNK_SIZE", "MAX_WORD_LENGTH", "first_words", "iter_words"]
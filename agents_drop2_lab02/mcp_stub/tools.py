@@ -0,0 +1,211 @@
+"""Decorator-based tool registry for the FastAPI MCP server.
+
+Tools used to live in two parallel structures (a list of hand-written
+schemas and a name → function dict), and bad arguments were only noticed
+when ``func(**arguments)`` raised ``TypeError``.  :class:`ToolRegistry`
+keeps one :class:`Tool` per function and does the work once, at
+registration:
+
+* the schema comes from the signature — JSON types from the annotations,
+  ``required`` from parameters without defaults, descriptions from the
+  docstring (first paragraph for the tool, ``name: text`` lines for the
+  parameters);
+* a validator is generated as straight-line Python for that signature, so a
+  call is checked with a few ``type(...) is`` tests before dispatch;
+* the ``/tools`` listing is serialised to JSON bytes once and reused until a
+  tool is registered or unregistered.
+
+Tools can be added and removed while the server runs; readers always see a
+consistent snapshot because every change swaps in new immutable state.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import threading
+import typing
+from typing import Any, Callable, Dict, List, Tuple
+
+EXECUTORS = ("thread", "process")
+
+# annotation -> (JSON type, check emitted into the validator)
+_JSON_TYPES: Dict[Any, Tuple[str, str]] = {
+    str: ("string", "type(v) is not str"),
+    int: ("integer", "type(v) is not int"),
+    float: ("number", "type(v) not in (int, float)"),
+    bool: ("boolean", "type(v) is not bool"),
+    dict: ("object", "type(v) is not dict"),
+    list: ("array", "type(v) is not list"),
+}
+_MISSING = object()
+
+
+class ToolError(ValueError):
+    """Invalid tool definition (unsupported annotation, bad executor...)."""
+
+
+def _json_type(annotation: Any) -> Tuple[str | None, str | None, bool]:
+    """``(json type, validator check, accepts None)`` for an annotation."""
+    if annotation is inspect.Parameter.empty or annotation is Any:
+        return None, None, True
+    nullable = False
+    origin = typing.get_origin(annotation)
+    if origin is typing.Union:
+        args = [a for a in typing.get_args(annotation) if a is not type(None)]
+        nullable = len(args) < len(typing.get_args(annotation))
+        if len(args) != 1:
+            return None, None, True
+        annotation, origin = args[0], typing.get_origin(args[0])
+    base = origin or annotation
+    if base not in _JSON_TYPES:
+        raise ToolError(f"unsupported annotation: {annotation!r}")
+    json_type, check = _JSON_TYPES[base]
+    return json_type, check, nullable
+
+
+def _doc_parts(func: Callable) -> Tuple[str, Dict[str, str]]:
+    doc = inspect.getdoc(func) or ""
+    head, _, rest = doc.partition("\n\n")
+    params = {}
+    for line in rest.splitlines():
+        name, sep, text = line.strip().partition(":")
+        if sep and name.isidentifier():
+            params[name] = text.strip()
+    return " ".join(head.split()), params
+
+
+def _compile_validator(name: str, params: List[inspect.Parameter], checks: Dict[str, Tuple[str | None, bool]],
+                       open_kwargs: bool) -> Callable[[Any], str | None]:
+    """Generate ``validate(args) -> error message or None`` for one signature."""
+    allowed = {p.name for p in params}
+    lines = ["def validate(args):",
+             "    if type(args) is not dict:",
+             "        return 'os argumentos devem ser um objeto JSON'"]
+    if not open_kwargs:
+        lines += [f"    extra = args.keys() - {allowed!r}" if allowed else "    extra = args.keys()",
+                  "    if extra:",
+                  "        return 'argumentos desconhecidos: ' + ', '.join(sorted(extra))"]
+    for p in params:
+        check, nullable = checks[p.name]
+        if p.default is inspect.Parameter.empty:
+            lines += [f"    if {p.name!r} not in args:",
+                      f"        return 'argumento obrigatório ausente: {p.name}'"]
+        if check is None:
+            continue
+        if p.default is None:
+            nullable = True
+        lines.append(f"    v = args.get({p.name!r}, _MISSING)")
+        guard = "v is not _MISSING" + (" and v is not None" if nullable else "")
+        lines += [f"    if {guard} and {check}:",
+                  f"        return {p.name!r} + ': tipo inválido (' + type(v).__name__ + ')'"]
+    lines.append("    return None")
+    namespace: Dict[str, Any] = {"_MISSING": _MISSING}
+    exec(compile("\n".join(lines), f"<validator {name}>", "exec"), namespace)
+    return namespace["validate"]
+
+
+class Tool:
+    """A registered tool: function, schema, validator and executor kind."""
+
+    __slots__ = ("name", "func", "schema", "validate", "executor")
+
+    def __init__(self, func: Callable, name: str | None = None,
+                 description: str | None = None, executor: str = "thread"):
+        if executor not in EXECUTORS:
+            raise ToolError(f"executor must be one of {EXECUTORS}")
+        self.name = name or func.__name__
+        self.func = func
+        self.executor = executor
+        summary, param_docs = _doc_parts(func)
+        hints = typing.get_type_hints(func)
+        params, checks, properties, required = [], {}, {}, []
+        open_kwargs = False
+        for p in inspect.signature(func).parameters.values():
+            if p.kind is p.VAR_KEYWORD:
+                open_kwargs = True
+                continue
+            if p.kind in (p.VAR_POSITIONAL, p.POSITIONAL_ONLY):
+                raise ToolError(f"{self.name}: only keyword-compatible parameters are supported")
+            json_type, check, nullable = _json_type(hints.get(p.name, p.annotation))
+            params.append(p)
+            checks[p.name] = (check, nullable)
+            prop: Dict[str, Any] = {}
+            if json_type:
+                prop["type"] = json_type
+            prop["description"] = param_docs.get(p.name, "")
+            properties[p.name] = prop
+            if p.default is p.empty:
+                required.append(p.name)
+        self.schema = {"name": self.name, "description": description or summary,
+                       "parameters": properties, "required": required}
+        self.validate = _compile_validator(self.name, params, checks, open_kwargs)
+
+
+class ToolRegistry:
+    """Name → :class:`Tool` map with a cached, pre-serialised listing."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._tools: Dict[str, Tool] = {}
+        self._payload: bytes | None = None
+        self.version = 0
+
+    def tool(self, func: Callable | None = None, *, name: str | None = None,
+             description: str | None = None, executor: str = "thread"):
+        """Decorator form of :meth:`register` (``@tool`` or ``@tool(...)``)."""
+        def decorator(f: Callable) -> Callable:
+            self.register(f, name=name, description=description, executor=executor)
+            return f
+        return decorator(func) if func is not None else decorator
+
+    def register(self, func: Callable, name: str | None = None,
+                 description: str | None = None, executor: str = "thread") -> Tool:
+        """Add (or replace) a tool; takes effect for the next request."""
+        spec = Tool(func, name=name, description=description, executor=executor)
+        with self._lock:
+            self._tools = {**self._tools, spec.name: spec}
+            self._changed()
+        return spec
+
+    def unregister(self, name: str) -> bool:
+        """Remove a tool; returns ``False`` if it was not registered."""
+        with self._lock:
+            if name not in self._tools:
+                return False
+            self._tools = {k: v for k, v in self._tools.items() if k != name}
+            self._changed()
+            return True
+
+    def _changed(self) -> None:
+        self._payload = None
+        self.version += 1
+
+    def get(self, name: str) -> Tool | None:
+        return self._tools.get(name)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tools
+
+    def names(self) -> List[str]:
+        return list(self._tools)
+
+    def schemas(self) -> List[Dict[str, Any]]:
+        return [spec.schema for spec in self._tools.values()]
+
+    def payload(self) -> bytes:
+        """``/tools`` as UTF-8 JSON bytes, rebuilt only after a change."""
+        payload = self._payload
+        if payload is None:
+            with self._lock:
+                payload = self._payload
+                if payload is None:
+                    payload = self._payload = json.dumps(self.schemas(), ensure_ascii=False).encode("utf-8")
+        return payload
+
+    def etag(self) -> str:
+        return '"%s"' % hashlib.sha1(self.payload()).hexdigest()[:16]
+
+
+__all__ = ["EXECUTORS", "Tool", "ToolError", "ToolRegistry"]
@@ -1,30 +1,287 @@
 """Lightweight stub of :mod:`pydantic` for the educational labs.
 
-Only the :class:`BaseModel` class with a tiny subset of its behaviour is
-implemented.  The goal is to provide enough structure so type annotations and
-``.dict()`` calls used inside the lab work without installing the real
-dependency.
+Only the :class:`BaseModel` class with a small subset of its behaviour is
+implemented.  The goal is to provide enough structure so type annotations,
+validation and ``.dict()`` calls used inside the lab work without installing
+the real dependency.
+
+Each model class is prepared once, when it is created: its annotated fields
+become ``__slots__`` (no per-instance ``__dict__``), and ``__init__``,
+``dict()``/``model_dump()`` and the field validators are generated as
+straight-line Python for exactly those fields.  Supported annotations are
+``str``, ``int``, ``float``, ``bool``, ``Any``, ``Dict[K, V]``/``dict``,
+``List[T]``/``list``, ``Optional[T]`` and nested models (built from dicts);
+anything else is stored unchecked.  Unknown keyword arguments are ignored,
+as in pydantic's default configuration.
 """
 
 from __future__ import annotations
 
-from typing import Any
+import copy
+import typing
+from typing import Any, Callable, Dict, List, Tuple
+
+_MISSING = object()
+_IMMUTABLE = (type(None), bool, int, float, str, bytes, tuple, frozenset)
+
+
+class ValidationError(ValueError):
+    """Raised by a model ``__init__`` with every field error at once."""
+
+    def __init__(self, model: str, errors: List[Tuple[str, str]]):
+        self.model = model
+        self._errors = errors
+        lines = "\n".join(f"{loc}\n  {msg}" for loc, msg in errors)
+        super().__init__(f"{len(errors)} validation error(s) for {model}\n{lines}")
+
+    def errors(self) -> List[Dict[str, Any]]:
+        return [{"loc": (loc,), "msg": msg} for loc, msg in self._errors]
+
+
+class _Invalid(Exception):
+    pass
+
+
+def _type_name(value: Any) -> str:
+    return type(value).__name__
+
+
+def _check_str(value: Any) -> Any:
+    if type(value) is not str:
+        raise _Invalid(f"esperado str, recebido {_type_name(value)}")
+    return value
+
+
+def _check_bool(value: Any) -> Any:
+    if type(value) is not bool:
+        raise _Invalid(f"esperado bool, recebido {_type_name(value)}")
+    return value
+
+
+# validators simple enough to emit as one test in the generated __init__
+_INLINE = {_check_str: "type({0}) is not str", _check_bool: "type({0}) is not bool"}
+
+
+def _validator(annotation: Any) -> Tuple[Callable[[Any], Any] | None, bool]:
+    """``(convert, nested)`` for an annotation.
+
+    ``convert(value)`` returns the (possibly converted) value or raises
+    :class:`_Invalid`; ``None`` means "accept as-is".  ``nested`` tells
+    ``dict()`` whether values may contain models to dump.
+    """
+    if annotation is Any or annotation is object:
+        return None, False
+    origin = typing.get_origin(annotation)
+    args = typing.get_args(annotation)
+
+    if origin is typing.Union:
+        options = [a for a in args if a is not type(None)]
+        nullable = len(options) < len(args)
+        converters = [_validator(a) for a in options]
+        nested = any(n for _, n in converters)
+        if any(c is None for c, _ in converters):
+            return None, nested
 
+        def union(value: Any) -> Any:
+            if value is None and nullable:
+                return None
+            for convert, _ in converters:
+                try:
+                    return convert(value)
+                except _Invalid:
+                    continue
+            raise _Invalid(f"nenhum tipo aceito em {annotation!r} para {_type_name(value)}")
+        return union, nested
 
-class BaseModel:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        model = annotation
+
+        def nested_model(value: Any) -> Any:
+            if isinstance(value, model):
+                return value
+            if isinstance(value, dict):
+                try:
+                    return model(**value)
+                except ValidationError as exc:
+                    raise _Invalid(str(exc)) from None
+            raise _Invalid(f"esperado objeto {model.__name__}, recebido {_type_name(value)}")
+        return nested_model, True
+
+    base = origin or annotation
+    if base is str:
+        return _check_str, False
+    if base is bool:
+        return _check_bool, False
+    if base is int:
+        def check_int(value: Any) -> Any:
+            if type(value) is int:
+                return value
+            if type(value) is float and value.is_integer():
+                return int(value)
+            raise _Invalid(f"esperado int, recebido {_type_name(value)}")
+        return check_int, False
+    if base is float:
+        def check_float(value: Any) -> Any:
+            if type(value) in (int, float):
+                return float(value)
+            raise _Invalid(f"esperado float, recebido {_type_name(value)}")
+        return check_float, False
+    if base in (list, List):
+        item, nested = _validator(args[0]) if args else (None, False)
+
+        def check_list(value: Any) -> Any:
+            if type(value) not in (list, tuple):
+                raise _Invalid(f"esperado list, recebido {_type_name(value)}")
+            if item is None:
+                return list(value)
+            out = []
+            for i, v in enumerate(value):
+                try:
+                    out.append(item(v))
+                except _Invalid as exc:
+                    raise _Invalid(f"[{i}]: {exc}") from None
+            return out
+        return check_list, nested
+    if base in (dict, Dict):
+        key, _ = _validator(args[0]) if args else (None, False)
+        val, nested = _validator(args[1]) if len(args) > 1 else (None, False)
+        if key is _check_str and val is None:  # the common JSON object: check keys, keep the dict
+            def check_str_keys(value: Any) -> Any:
+                if type(value) is not dict:
+                    raise _Invalid(f"esperado dict, recebido {_type_name(value)}")
+                for k in value:
+                    if type(k) is not str:
+                        raise _Invalid(f"chave do dict: esperado str, recebido {_type_name(k)}")
+                return value
+            return check_str_keys, False
+
+        def check_dict(value: Any) -> Any:
+            if type(value) is not dict:
+                raise _Invalid(f"esperado dict, recebido {_type_name(value)}")
+            if key is None and val is None:
+                return value
+            try:
+                return {(key(k) if key else k): (val(v) if val else v) for k, v in value.items()}
+            except _Invalid as exc:
+                raise _Invalid(f"valor do dict: {exc}") from None
+        return check_dict, nested
+    return None, False  # unsupported annotation: stored unchecked
+
+
+def _why(convert: Callable[[Any], Any], value: Any) -> str:
+    try:
+        convert(value)
+    except _Invalid as exc:
+        return str(exc)
+    return "valor inválido"
+
+
+def _dump(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.dict()
+    if isinstance(value, list):
+        return [_dump(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _dump(v) for k, v in value.items()}
+    return value
+
+
+def _build(cls: type, fields: Dict[str, Any], defaults: Dict[str, Any]) -> None:
+    """Generate ``__init__`` and ``dict`` for ``cls`` from its fields."""
+    namespace: Dict[str, Any] = {"_M": _MISSING, "_Invalid": _Invalid, "_VE": ValidationError,
+                                 "_copy": copy.deepcopy, "_dump": _dump, "_why": _why, "_model": cls.__name__}
+    params = "*, " + "".join(f"{f}=_M, " for f in fields) if fields else ""
+    init = [f"def __init__(__self, {params}**__extra):",
+            "    __errors = None"]
+    dump = []
+    for name, annotation in fields.items():
+        convert, nested = _validator(annotation)
+        default = defaults.get(name, _MISSING)
+        init.append(f"    if {name} is _M:")
+        if default is _MISSING:
+            init += ["        __errors = (__errors or []) + [(" + repr(name) + ", 'campo obrigatório')]"]
+        elif isinstance(default, _IMMUTABLE):
+            namespace[f"_d_{name}"] = default
+            init.append(f"        {name} = _d_{name}")
+        else:
+            namespace[f"_d_{name}"] = default
+            init.append(f"        {name} = _copy(_d_{name})")
+        if convert in _INLINE:
+            namespace[f"_v_{name}"] = convert
+            init += [f"    elif {_INLINE[convert].format(name)}:",
+                     f"        __errors = (__errors or []) + [({name!r}, _why(_v_{name}, {name}))]"]
+        elif convert is not None:
+            namespace[f"_v_{name}"] = convert
+            init += ["    else:",
+                     "        try:",
+                     f"            {name} = _v_{name}({name})",
+                     "        except _Invalid as __exc:",
+                     f"            __errors = (__errors or []) + [({name!r}, str(__exc))]"]
+        init.append(f"    __self.{name} = {name}")
+        dump.append(f"{name!r}: _dump(self.{name})" if nested else f"{name!r}: self.{name}")
+    init += ["    if __errors:", "        raise _VE(_model, __errors)"]
+    source = "\n".join(init) + "\n\ndef dict(self):\n    return {" + ", ".join(dump) + "}\n"
+    exec(compile(source, f"<model {cls.__qualname__}>", "exec"), namespace)
+    cls.__init__ = namespace["__init__"]
+    cls.dict = namespace["dict"]
+
+
+class _ModelMeta(type):
+    """Turns annotated fields into ``__slots__`` and generates the methods."""
+
+    def __new__(mcs, name: str, bases: tuple, namespace: Dict[str, Any], **kwargs: Any):
+        own = [f for f, a in namespace.get("__annotations__", {}).items()
+               if not f.startswith("_") and "ClassVar" not in str(a)]
+        inherited_defaults: Dict[str, Any] = {}
+        for base in reversed(bases):
+            inherited_defaults.update(getattr(base, "__field_defaults__", {}))
+        defaults = dict(inherited_defaults)
+        for field in own:
+            if field in namespace:
+                defaults[field] = namespace.pop(field)  # a class attribute would shadow the slot
+        inherited: List[str] = []
+        for base in bases:
+            inherited += [f for f in getattr(base, "__fields__", {}) if f not in inherited]
+        names = inherited + [f for f in own if f not in inherited]
+        namespace["__slots__"] = tuple(f for f in own if f not in inherited)
+        namespace["__field_defaults__"] = defaults
+        cls = super().__new__(mcs, name, bases, namespace, **kwargs)
+
+        try:
+            hints = typing.get_type_hints(cls)
+        except Exception:  # forward references that cannot be resolved yet: store unchecked
+            hints = {}
+        fields = {f: hints.get(f, Any) for f in names}
+        cls.__fields__ = fields
+        cls.model_fields = fields
+        _build(cls, fields, defaults)
+        return cls
+
+
+class BaseModel(metaclass=_ModelMeta):
     """Very small stand-in for :class:`pydantic.BaseModel`."""
 
-    def __init__(self, **data: Any):
-        for key, value in data.items():
-            setattr(self, key, value)
+    __slots__ = ()
+
+    def __init__(self, **data: Any):  # replaced per subclass by the generated one
+        pass
 
-    def dict(self) -> dict[str, Any]:
-        return dict(self.__dict__)
+    def dict(self) -> dict[str, Any]:  # replaced per subclass by the generated one
+        return {}
 
     # ``model_dump`` mirrors the modern Pydantic API and keeps parity with the
     # public surface in case student code prefers that spelling.
     def model_dump(self) -> dict[str, Any]:
         return self.dict()
 
+    def __eq__(self, other: Any) -> bool:
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.dict() == other.dict()
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{k}={v!r}" for k, v in self.dict().items())
+        return f"{type(self).__name__}({fields})"
+
 
-__all__ = ["BaseModel"]
+__all__ = ["BaseModel", "ValidationError"]
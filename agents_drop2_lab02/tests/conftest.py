@@ -1,9 +1,33 @@
 """Pytest configuration helpers for the labs."""
 
 import os
+import shutil
 import sys
+import tempfile
 
 
 PROJECT_ROOT = os.path.dirname(os.path.dirname(__file__))
 if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
+# raiz do repositório: o perfilamento vem de shared/profiling.py
+REPO_ROOT = os.path.dirname(os.path.abspath(PROJECT_ROOT))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
+
+
+_STATE_DIR = None
+
+
+def pytest_configure(config):
+    # índices e textos extraídos dos servidores vão para um diretório temporário,
+    # não para labs/02_mcp/outputs (definido antes de os testes importarem os servidores)
+    global _STATE_DIR
+    _STATE_DIR = tempfile.mkdtemp(prefix="mcp-tests-")
+    for var, name in (("MCP_SEARCH_INDEX", "search.sqlite3"), ("MCP_DENSE_DIR", "dense"),
+                      ("MCP_TEXT_STORE", "pdf_text")):
+        os.environ.setdefault(var, os.path.join(_STATE_DIR, name))
+
+
+def pytest_unconfigure(config):
+    if _STATE_DIR:
+        shutil.rmtree(_STATE_DIR, ignore_errors=True)
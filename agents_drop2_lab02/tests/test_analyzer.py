@@ -0,0 +1,88 @@
+# tests/test_analyzer.py
+"""Testes do analisador de texto em blocos e dos sketches (mcp_stub.analyzer/sketch)."""
+import random
+from collections import Counter
+
+from mcp_stub.analyzer import analyze_file, analyze_text, split_file, split_text
+from mcp_stub.sketch import CountMinSketch, HyperLogLog
+
+
+def _corpus(words=60_000, seed=3):
+    rng = random.Random(seed)
+    vocab = [f"termo{i}" for i in range(3000)] + ["Ação,", "coração", "pressão."]
+    picked = [vocab[min(int(rng.paretovariate(1.2)), len(vocab) - 1)] for _ in range(words)]
+    return "\n".join(" ".join(picked[i:i + 9]) + rng.choice(["", " ", "\t"]) for i in range(0, words, 9))
+
+
+def test_chunks_end_at_whitespace_and_cover_everything(tmp_path):
+    text = _corpus(5000) + " ação"
+    bounds = split_text(text, 997)
+    assert "".join(text[a:b] for a, b in bounds) == text
+    assert all(text[b - 1].isspace() for _, b in bounds[:-1])
+    fp = tmp_path / "doc.txt"
+    fp.write_text(text, encoding="utf-8")
+    data = fp.read_bytes()
+    ranges = split_file(fp, 1001, window=7)
+    assert b"".join(data[a:b] for a, b in ranges) == data
+    assert all(data[b - 1:b].isspace() for _, b in ranges[:-1])
+
+
+def test_chunked_counts_match_exact_counts(tmp_path):
+    text = _corpus()
+    exact = {"word_count": len(text.split()), "char_count": len(text), "line_count": len(text.splitlines())}
+    one = analyze_text(text, workers=1)
+    chunked = analyze_text(text, workers=1, chunk_chars=4096)
+    fp = tmp_path / "doc.txt"
+    fp.write_text(text, encoding="utf-8")
+    parallel = analyze_file(fp, workers=2, chunk_bytes=8192)
+    for result in (one, chunked, parallel):
+        assert {k: result[k] for k in exact} == exact
+    assert chunked == parallel
+
+
+def test_unique_and_top_terms_are_close_to_exact():
+    text = _corpus()
+    terms = Counter(w.strip(",.").lower() for w in text.split())
+    result = analyze_text(text, top_k=5, workers=1, chunk_chars=4096)
+    assert abs(result["unique_words"] - len(terms)) <= 0.05 * len(terms)
+    assert result["top_terms"] == [[t, n] for t, n in terms.most_common(5)]
+
+
+def test_small_inputs():
+    assert analyze_text("")["word_count"] == 0
+    result = analyze_text("Olá mundo, olá!")
+    assert result["line_count"] == 1 and result["unique_words"] == 2
+    assert result["top_terms"][0] == ["olá", 2]
+
+
+def test_sketches_merge_exactly():
+    a, b, whole = HyperLogLog(10), HyperLogLog(10), HyperLogLog(10)
+    ca, cb, cwhole = CountMinSketch(256, 3), CountMinSketch(256, 3), CountMinSketch(256, 3)
+    for i in range(5000):
+        item = f"x{i % 1500}"
+        (a if i % 2 else b).add(item)
+        (ca if i % 2 else cb).add(item)
+        whole.add(item)
+        cwhole.add(item)
+    a.merge(b)
+    ca.merge(cb)
+    assert a.registers == whole.registers and ca.rows == cwhole.rows
+    assert ca.estimate("x7") >= 3
+
+
+def test_input_without_whitespace_is_cut_into_bounded_chunks(tmp_path):
+    text = "abc " + "ação" * 1_000_000 + " fim"  # uma "palavra" de 4 milhões de caracteres
+    bounds = split_text(text, 4096, window=512)
+    assert "".join(text[a:b] for a, b in bounds) == text
+    assert max(b - a for a, b in bounds) <= 4096 + 512
+    fp = tmp_path / "doc.txt"
+    fp.write_text(text, encoding="utf-8")
+    data = fp.read_bytes()
+    ranges = split_file(fp, 4096, window=512)
+    assert b"".join(data[a:b] for a, b in ranges) == data
+    assert max(b - a for a, b in ranges) <= 4096 + 512
+    for a, b in ranges:
+        data[a:b].decode("utf-8")  # nenhum caractere partido ao meio
+    expected = {"word_count": 3, "char_count": len(text), "line_count": 1}
+    for result in (analyze_text(text, workers=1, chunk_chars=1 << 16), analyze_file(fp, workers=2, chunk_bytes=1 << 16)):
+        assert {k: result[k] for k in expected} == expected
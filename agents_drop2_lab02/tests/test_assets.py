@@ -0,0 +1,40 @@
+# tests/test_assets.py
+"""Testes do índice de assets (mcp_stub.assets)."""
+from mcp_stub.assets import AssetIndex
+
+
+def _make(tmp_path, names):
+    for name in names:
+        (tmp_path / name).write_text("x", encoding="utf-8")
+    (tmp_path / "subdir").mkdir(exist_ok=True)
+    return AssetIndex(tmp_path)
+
+
+def test_index_rebuilds_only_when_directory_changes(tmp_path):
+    index = _make(tmp_path, ["b.txt", "a.txt"])
+    assert index.query()["files"] == ["a.txt", "b.txt"]
+    etag = index.query()["etag"]
+    assert index.rebuilds == 1
+    (tmp_path / "c.txt").write_text("x", encoding="utf-8")
+    index.invalidate()  # mtime pode ter granularidade grosseira no FS
+    result = index.query()
+    assert result["files"] == ["a.txt", "b.txt", "c.txt"]
+    assert result["etag"] != etag and index.rebuilds == 2
+
+
+def test_index_prefix_glob_and_cursor_pagination(tmp_path):
+    names = [f"abc_{i:02d}.txt" for i in range(7)] + ["abd.txt", "xyz.pdf", "abc_99.pdf"]
+    index = _make(tmp_path, names)
+    assert index.query(prefix="abd")["files"] == ["abd.txt"]
+    assert index.query(glob="*.pdf")["files"] == ["abc_99.pdf", "xyz.pdf"]
+
+    pages, cursor = [], None
+    while True:
+        page = index.query(prefix="abc_", glob="*.txt", cursor=cursor, limit=3)
+        pages.append(page["files"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert pages == [["abc_00.txt", "abc_01.txt", "abc_02.txt"],
+                     ["abc_03.txt", "abc_04.txt", "abc_05.txt"],
+                     ["abc_06.txt"]]
@@ -0,0 +1,57 @@
+# tests/test_cache.py
+"""Testes do cache de resumos (mcp_stub.cache)."""
+import os
+
+from mcp_stub.cache import SummaryCache
+from mcp_stub.text import first_words
+
+
+def _counting(calls):
+    def compute(fp, max_words):
+        calls.append((fp.name, max_words))
+        return first_words(fp, max_words)
+    return compute
+
+
+def test_cache_hits_and_invalidates_on_change(tmp_path):
+    fp = tmp_path / "doc.txt"
+    fp.write_text("um dois três quatro", encoding="utf-8")
+    cache, calls = SummaryCache(), []
+    assert cache.get_or_compute(fp, 2, _counting(calls)) == "um dois"
+    assert cache.get_or_compute(fp, 2, _counting(calls)) == "um dois"
+    assert cache.get_or_compute(fp, 3, _counting(calls)) == "um dois três"
+    assert len(calls) == 2
+
+    fp.write_text("cinco seis sete", encoding="utf-8")
+    st = fp.stat()
+    os.utime(fp, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert cache.get_or_compute(fp, 2, _counting(calls)) == "cinco seis"
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["stale"]) == (1, 3, 1)
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    files = []
+    for i in range(3):
+        fp = tmp_path / f"doc{i}.txt"
+        fp.write_text(f"palavra{i} " * 10, encoding="utf-8")
+        files.append(fp)
+    one = len(str(files[0].resolve())) + 200 + len("palavra0")
+    cache, calls = SummaryCache(max_bytes=2 * one), []
+    cache.get_or_compute(files[0], 1, _counting(calls))
+    cache.get_or_compute(files[1], 1, _counting(calls))
+    cache.get_or_compute(files[0], 1, _counting(calls))  # doc0 vira o mais recente
+    cache.get_or_compute(files[2], 1, _counting(calls))  # expulsa doc1
+    assert cache.stats()["evictions"] == 1
+    cache.get_or_compute(files[0], 1, _counting(calls))
+    assert [name for name, _ in calls] == ["doc0.txt", "doc1.txt", "doc2.txt"]
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    fp = tmp_path / "doc.txt"
+    fp.write_text("persistente entre processos", encoding="utf-8")
+    calls = []
+    SummaryCache(disk_dir=tmp_path / "cache").get_or_compute(fp, 1, _counting(calls))
+    fresh = SummaryCache(disk_dir=tmp_path / "cache")
+    assert fresh.get_or_compute(fp, 1, _counting(calls)) == "persistente"
+    assert len(calls) == 1 and fresh.stats()["disk_hits"] == 1
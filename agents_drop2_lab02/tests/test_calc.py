@@ -0,0 +1,65 @@
+# tests/test_calc.py
+"""Testes do motor da calculadora (mcp_stub.calc)."""
+import math
+import time
+
+import pytest
+
+from mcp_stub.calc import CalcError, compile_expression, evaluate
+
+
+def test_arithmetic_matches_python():
+    for expr in ("2 * (3 + 4)", "7 / 2", "7 // 2", "-7 % 3", "2 ** 10", "2 ** -2", "1.5e3 - +4"):
+        assert evaluate(expr) == eval(expr)
+
+
+def test_variables_functions_and_constants():
+    assert evaluate("x ** 2 + sqrt(y)", {"x": 3, "y": 16}) == 13.0
+    assert evaluate("round(pi, 2) + max(1, x, 3)", {"x": 5}) == pytest.approx(8.14)
+    assert compile_expression("a * b + pi").variables == {"a", "b"}
+    with pytest.raises(CalcError, match="sem valor"):
+        evaluate("x + y", {"x": 1})
+    with pytest.raises(CalcError, match="não numérico"):
+        evaluate("x * 2", {"x": "aaaa"})
+
+
+@pytest.mark.parametrize("expr", [
+    "__import__('os')", "().__class__", "x.real", "[1, 2]", "'a' * 3", "True + 1",
+    "lambda: 1", "f(1)", "sqrt(*[4])", "_pow(2, 2)", "1 if 1 else 2", "1 << 2", "2 +* 3",
+])
+def test_rejects_anything_but_arithmetic(expr):
+    with pytest.raises(CalcError):
+        compile_expression(expr)
+
+
+def test_limits_stop_runaway_expressions_quickly():
+    start = time.perf_counter()
+    nested = "9**299" + ")**4" * 10
+    for expr in ("9**9**9**9", "(" * 10 + nested, "(10**150)**4", "10**299 * 10**299", "2.0 ** 5000", "(-8) ** 0.5", "1/0",
+                 "round(1, -99999999)", "round(3, 10**9)", "round(2, 0.5)"):
+        with pytest.raises(CalcError):
+            evaluate(expr)
+    with pytest.raises(CalcError, match="passos"):
+        compile_expression("+".join(["1"] * 400))
+    with pytest.raises(CalcError, match="caracteres"):
+        compile_expression("1" + " " * 2000)
+    assert time.perf_counter() - start < 1.0
+
+
+def test_compiled_expressions_are_cached():
+    compile_expression.cache_clear()
+    first = compile_expression("x * 2 + 1")
+    assert compile_expression("x * 2 + 1") is first
+    assert compile_expression.cache_info().hits == 1
+
+
+def test_batch_mode_over_many_bindings():
+    np = pytest.importorskip("numpy")
+    expr = compile_expression("x ** 2 / y + c")
+    out = expr.evaluate_batch({"x": [1, 2, 3, 4], "y": [1, 0, 2, -1], "c": 1})
+    assert out[0] == 2.0 and math.isnan(out[1]) and out[2] == 5.5 and out[3] == -15.0
+    xs = np.linspace(-5, 5, 10_000)
+    np.testing.assert_allclose(compile_expression("sin(x) * exp(x)").evaluate_batch({"x": xs}),
+                               np.sin(xs) * np.exp(xs))
+    with pytest.raises(CalcError, match="expoente"):
+        compile_expression("2 ** x").evaluate_batch({"x": [1, 5000]})
@@ -0,0 +1,88 @@
+# tests/test_dense.py
+"""Testes da busca densa (mcp_stub.dense); requer numpy."""
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from mcp_stub.dense import DenseIndex  # noqa: E402
+from mcp_stub.search import SearchIndex  # noqa: E402
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    assets = tmp_path / "assets"
+    assets.mkdir()
+    texts = {
+        "renal.txt": "controle da pressão arterial na doença renal crônica",
+        "diabetes.txt": "insulina basal e glicemia de jejum no diabetes tipo 2",
+        "asma.txt": "corticoide inalatório para asma persistente moderada",
+    }
+    for name, text in texts.items():
+        (assets / name).write_text(text, encoding="utf-8")
+    search = SearchIndex(assets, tmp_path / "search.sqlite3", refresh_interval=0)
+    return assets, DenseIndex(search, tmp_path / "dense", dim=128, block_rows=2)
+
+
+def test_dense_search_batches_queries_and_memmaps(corpus):
+    _, dense = corpus
+    batch = dense.search(["doença renal crônica", "glicemia no diabetes"], k=2)
+    assert [r["results"][0]["file"] for r in batch] == ["renal.txt", "diabetes.txt"]
+    assert all(len(r["results"]) == 2 for r in batch)
+    assert isinstance(dense._load()["vectors"], np.memmap)
+    assert dense._load()["vectors"].dtype == np.float32
+
+
+def test_dense_index_rebuilds_when_assets_change(corpus):
+    assets, dense = corpus
+    assert dense.search("asma")["results"][0]["file"] == "asma.txt"
+    (assets / "asma.txt").unlink()
+    (assets / "gota.txt").write_text("colchicina na crise de gota", encoding="utf-8")
+    files = [hit["file"] for hit in dense.search("gota colchicina", k=5)["results"]]
+    assert files[0] == "gota.txt" and "asma.txt" not in files
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="workers pré-forkados requerem os.fork")
+def test_workers_sharing_the_directory_build_once_and_atomically(corpus, tmp_path):
+    import multiprocessing
+    assets, _ = corpus
+    ctx = multiprocessing.get_context("fork")
+    barrier, results = ctx.Barrier(4), ctx.Queue()
+    builds = tmp_path / "builds.log"
+
+    def worker():
+        # um DenseIndex por processo, com o mesmo diretório e o mesmo índice BM25
+        dense = DenseIndex(SearchIndex(assets, tmp_path / "search.sqlite3"), tmp_path / "dense", dim=128)
+        build = dense._build
+
+        def counted():
+            with open(builds, "a") as fh:
+                fh.write("build\n")
+            return build()
+
+        dense._build = counted
+        barrier.wait()
+        results.put(dense.search("doença renal")["results"][0]["file"])
+
+    procs = [ctx.Process(target=worker) for _ in range(4)]
+    for p in procs:
+        p.start()
+    found = sorted(results.get(timeout=30) for _ in procs)
+    for p in procs:
+        p.join(timeout=30)
+    assert found == ["renal.txt"] * 4
+    assert builds.read_text().count("build") == 1  # os outros esperaram a trava e acharam meta.json em dia
+    assert not list((tmp_path / "dense").glob("*.tmp"))
+
+
+def test_signature_is_cached_per_search_generation(corpus):
+    assets, dense = corpus
+    first = dense._signature()
+    scans = []
+    db = dense.search_index._db()
+    db.set_trace_callback(lambda sql: scans.append(sql) if "FROM docs ORDER BY" in sql else None)
+    assert dense._signature() == first and scans == []
+    (assets / "gota.txt").write_text("colchicina na crise de gota", encoding="utf-8")
+    dense.search_index.refresh()
+    assert dense._signature() != first and len(scans) == 1
@@ -0,0 +1,194 @@
+# tests/test_fastapi_asgi.py
+"""Testes do app ASGI do shim de FastAPI e do servidor HTTP/1.1 em asyncio."""
+import asyncio
+import http.client
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from fastapi import FastAPI
+from fastapi.server import Server
+from fastapi.testclient import TestClient
+
+
+def _app():
+    app = FastAPI(max_workers=8)
+
+    @app.get("/async")
+    async def async_handler():
+        await asyncio.sleep(0.01)
+        return {"kind": "async"}
+
+    @app.get("/sync")
+    def sync_handler():
+        time.sleep(0.1)
+        return {"kind": "sync", "thread": threading.current_thread().name}
+
+    @app.post("/echo/{n}")
+    def echo(n: int, body):
+        return {"n": n, "body": body}
+
+    @app.get("/boom")
+    def boom():
+        raise RuntimeError("falhou")
+
+    return app
+
+
+def _serve(app):
+    server = Server(app, port=0, keepalive=2.0)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(server.start())
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    return server, loop, thread
+
+
+@pytest.fixture
+def served():
+    def start(app):
+        started.append(_serve(app))
+        return started[-1][0].port
+    started = []
+    yield start
+    for server, loop, thread in started:
+        asyncio.run_coroutine_threadsafe(server.shutdown(), loop).result(timeout=5)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+        loop.close()
+
+
+def _get(conn, method, path, body=None, headers=None):
+    conn.request(method, path, body=body, headers=headers or {})
+    response = conn.getresponse()
+    return response, response.read()
+
+
+def test_async_and_sync_handlers_over_http(served):
+    port = served(_app())
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    response, body = _get(conn, "GET", "/async")
+    assert response.status == 200 and json.loads(body) == {"kind": "async"}
+    sock = conn.sock
+    response, body = _get(conn, "GET", "/sync")
+    assert json.loads(body)["thread"].startswith("fastapi")
+    assert conn.sock is sock, "keep-alive deveria reutilizar a conexão"
+    response, body = _get(conn, "POST", "/echo/3", json.dumps({"a": 1}), {"Content-Type": "application/json"})
+    assert json.loads(body) == {"n": 3, "body": {"a": 1}}
+    for path, status in (("/nada", 404), ("/echo/x", 405), ("/boom", 500)):
+        assert _get(conn, "GET", path)[0].status == status
+    conn.close()
+
+
+def test_sync_handlers_run_concurrently(served):
+    port = served(_app())
+
+    def call(_):
+        conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+        return _get(conn, "GET", "/sync")[0].status
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(8) as pool:
+        assert list(pool.map(call, range(8))) == [200] * 8
+    assert time.perf_counter() - start < 0.6  # 8 x 100 ms em série levaria 0.8 s
+
+
+def test_chunked_request_and_streamed_response(served):
+    async def streaming(scope, receive, send):
+        message = await receive()
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/plain")]})
+        for part in (b"eco:", message["body"], b"!"):
+            await send({"type": "http.response.body", "body": part, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    port = served(streaming)
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    conn.putrequest("POST", "/")
+    conn.putheader("Transfer-Encoding", "chunked")
+    conn.endheaders()
+    conn.send(b"3\r\nola\r\n4\r\n mun\r\n2\r\ndo\r\n0\r\n\r\n")
+    response = conn.getresponse()
+    assert response.getheader("Transfer-Encoding") == "chunked"
+    assert response.read() == b"eco:ola mundo!"
+    conn.close()
+
+
+def test_streamed_response_to_http10_ends_with_close(served):
+    async def streaming(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        for part in (b"um ", b"dois"):
+            await send({"type": "http.response.body", "body": part, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    port = served(streaming)
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        # mesmo pedindo keep-alive, o fim do corpo HTTP/1.0 é o fechamento da conexão
+        sock.sendall(b"GET / HTTP/1.0\r\nConnection: keep-alive\r\n\r\n")
+        raw = b""
+        while chunk := sock.recv(65536):
+            raw += chunk
+    head, _, body = raw.partition(b"\r\n\r\n")
+    assert b"transfer-encoding" not in head.lower() and b"connection: close" in head.lower()
+    assert body == b"um dois"
+
+
+@pytest.mark.parametrize("length", [b"-1", b"+3", b"1_0"])
+def test_malformed_content_length_is_rejected(served, length):
+    port = served(_app())
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        sock.sendall(b"POST /echo/1 HTTP/1.1\r\nContent-Length: " + length + b"\r\n\r\nabc")
+        assert sock.recv(65536).startswith(b"HTTP/1.1 400 ")
+
+
+
+@pytest.mark.parametrize("body", [
+    b"3\r\nolaXY0\r\n\r\n",            # sem CRLF depois do pedaço
+    b"3\r\nola\r\n0\r\nX-Trailer: 1\r\n\r\n",  # trailers não são aceitos
+    b"-3\r\nola\r\n0\r\n\r\n",
+    b"1" * (1 << 17),                  # linha de tamanho maior que o limite do stream
+    b"3\r\nol",                       # corpo cortado (o cliente só fecha a escrita)
+], ids=["no-crlf", "trailer", "negative", "long-size-line", "truncated"])
+def test_malformed_chunked_body_is_rejected(served, body):
+    port = served(_app())
+    with socket.create_connection(("127.0.0.1", port), timeout=5) as sock:
+        sock.sendall(b"POST /echo/1 HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n" + body)
+        sock.shutdown(socket.SHUT_WR)
+        assert sock.recv(65536).startswith(b"HTTP/1.1 400 ")
+
+def test_large_json_results_are_sent_chunked(served):
+    app = FastAPI()
+    rows = [{"name": f"doc{i}.pdf", "size": i} for i in range(20000)]
+    app.get("/big")(lambda: {"items": rows})
+    app.get("/small")(lambda: {"ok": True})
+    port = served(app)
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    response, body = _get(conn, "GET", "/big")
+    assert response.getheader("Transfer-Encoding") == "chunked"
+    assert json.loads(body) == {"items": rows}
+    response, body = _get(conn, "GET", "/small")
+    assert response.getheader("Content-Length") == str(len(body)) and json.loads(body) == {"ok": True}
+    conn.close()
+
+
+def test_testclient_awaits_async_handlers():
+    client = TestClient(_app())
+    assert client.get("/async").json() == {"kind": "async"}
+
+
+def test_lab_server_app_over_http(served):
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "labs", "02_mcp", "py"))
+    from server import app
+
+    conn = http.client.HTTPConnection("127.0.0.1", served(app), timeout=5)
+    response, body = _get(conn, "GET", "/tools")
+    assert response.getheader("Content-Type") == "application/json"
+    assert "calculator" in [t["name"] for t in json.loads(body)]
+    response, body = _get(conn, "POST", "/tools/calculator/invoke", json.dumps({"expression": "6 * 7"}))
+    assert json.loads(body) == {"result": 42.0}
+    conn.close()
@@ -0,0 +1,118 @@
+# tests/test_fastapi_shim.py
+"""Testes do roteamento do shim de FastAPI (rotas com parâmetros e planos de chamada)."""
+import json
+from typing import List
+
+import pytest
+
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import compile_path
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+
+class Item(BaseModel):
+    name: str
+
+
+def _app():
+    app = FastAPI()
+
+    @app.get("/items")
+    def list_items():
+        return ["static"]
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int, verbose: bool = True):
+        return {"id": item_id, "verbose": verbose}
+
+    @app.post("/items/{item_id}/rename")
+    def rename(item_id: int, item: Item):
+        return {"id": item_id, "name": item.name}
+
+    @app.get("/files/{path:path}")
+    def get_file(path: str):
+        return {"path": path}
+
+    @app.post("/echo")
+    def echo(body, extra=None):
+        return {"body": body, "extra": extra}
+
+    return app
+
+
+def test_compile_path():
+    assert compile_path("/tools/{name}/invoke") == (r"/tools/(?P<name>[^/]+)/invoke", ["name"])
+    assert compile_path("/a/{rest:path}")[1] == ["rest"]
+
+
+def test_static_and_parameter_routes():
+    client = TestClient(_app())
+    assert client.get("/items").json() == ["static"]
+    assert client.get("/items/7").json() == {"id": 7, "verbose": True}
+    assert client.post("/items/3/rename", json={"name": "novo"}).json() == {"id": 3, "name": "novo"}
+    assert client.get("/files/a/b/c.txt").json() == {"path": "a/b/c.txt"}
+    assert client.post("/echo", json={"x": 1}).json() == {"body": {"x": 1}, "extra": None}
+
+
+def test_errors():
+    client = TestClient(_app())
+    assert client.get("/items/abc").status_code == 422
+    assert client.get("/items/1/2").status_code == 404
+    assert client.get("/nada").status_code == 404
+    assert client.post("/items/1").status_code == 405
+
+
+def test_call_plan_is_built_at_registration():
+    app = _app()
+    route, params = app.match("POST", "/items/5/rename")
+    assert params == {"item_id": "5"}
+    assert [(kind, name) for kind, name, _ in route.plan] == [("path", "item_id"), ("model", "item")]
+    route, _ = app.match("GET", "/items/5")
+    assert route.plan[1] == ("inject", "verbose", True)
+
+
+def test_streaming_encoder_matches_json_dumps():
+    from fastapi.encoders import dumps, iter_json
+
+    class Item(BaseModel):
+        name: str
+        tags: List[str]
+
+    payload = {"a": [1, 2.5, "ç\n\"", None, True, {}], 1: float("inf"), None: (1, 2),
+               "items": [Item(name="x", tags=["t"])] * 50}
+    expected = json.dumps(jsonable_encoder(payload), ensure_ascii=False).encode("utf-8")
+    assert dumps(payload) == expected
+    chunks = list(iter_json(payload, chunk_size=64))
+    assert len(chunks) > 1 and b"".join(chunks) == expected
+    assert max(len(c) for c in chunks) < 64 + 200
+    with pytest.raises(TypeError):
+        dumps({"x": object()})
+
+
+def test_streaming_encoder_keys_and_circular_references():
+    import enum
+    from fastapi.encoders import dumps
+
+    class Color(str, enum.Enum):
+        RED = "red"
+
+    class Level(enum.IntEnum):
+        HIGH = 3
+
+    class Tag(str):
+        pass
+
+    payload = {Color.RED: 1, Tag("t"): Color.RED, Level.HIGH: [False], True: None}
+    assert dumps(payload) == json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+    shared = [1]
+    assert dumps({"a": shared, "b": shared}) == b'{"a": [1], "b": [1]}'  # repetido não é ciclo
+    nested = {"x": []}
+    nested["x"].append(nested)
+    itself = []
+    itself.append(itself)
+    for value in (nested, itself):
+        with pytest.raises(ValueError, match="Circular reference"):
+            dumps(value)
@@ -97,3 +97,161 @@ def test_invoke_calculator_with_invalid_expression():
     assert "result" in response_data
     assert "erro" in str(response_data["result"]).lower() or \
            "error" in str(response_data["result"]).lower()
+
+
+def test_invoke_search_pdfs_tool():
+    """Testa a busca BM25 sobre os assets do lab."""
+    request_data = {
+        "tool_name": "search_pdfs",
+        "arguments": {"query": "list_pdfs", "k": 3}
+    }
+    response = client.post("/invoke", json=request_data)
+    assert response.status_code == 200
+    result = response.json()["result"]
+    assert result["results"][0]["file"] == "guideline_xyz.txt"
+
+
+def test_invoke_batch_runs_items_in_order_with_errors():
+    """Testa o lote: resultados na ordem, com erro por item."""
+    request_data = {
+        "requests": [
+            {"tool_name": "calculator", "arguments": {"expression": "6 * 7"}},
+            {"tool_name": "text_analyzer", "arguments": {"text": "um dois três"}},
+            {"tool_name": "non_existent_tool", "arguments": {}},
+            {"tool_name": "text_analyzer", "arguments": {"texto": "argumento errado"}},
+            {"tool_name": "search_pdfs", "arguments": {"query": "guideline", "k": 1}},
+        ],
+        "max_concurrency": 2,
+    }
+    response = client.post("/invoke/batch", json=request_data)
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == 5
+    assert results[0] == {"result": 42.0, "error": None}
+    assert results[1]["result"]["word_count"] == 3
+    assert results[2]["result"] is None and "não encontrada" in results[2]["error"]
+    assert "Argumentos inválidos" in results[3]["error"]
+    assert len(results[4]["result"]["results"]) == 1
+
+
+def test_invoke_batch_rejects_oversized_batches():
+    """Testa o limite de itens por lote."""
+    import server
+    items = [{"tool_name": "calculator", "arguments": {"expression": "1"}}] * (server.BATCH_MAX_ITEMS + 1)
+    response = client.post("/invoke/batch", json={"requests": items})
+    assert response.status_code == 413
+
+
+def test_invoke_batch_runs_process_tools_in_forked_workers(monkeypatch):
+    """Testa que o pool de processos usa fork mesmo com spawn como padrão (Python 3.14)
+    e com a ferramenta num módulo que só existe em sys.modules (como via importlib)."""
+    import multiprocessing
+    import types
+    import server
+    module = types.ModuleType("mcp_tools_em_memoria")
+    exec('import os\ndef worker_pid(tag: str = ""):\n    """Pid do processo que executou."""\n'
+         '    return os.getpid()\n', module.__dict__)
+    monkeypatch.setitem(sys.modules, module.__name__, module)
+    previous = multiprocessing.get_start_method(allow_none=True)
+    multiprocessing.set_start_method("spawn", force=True)
+    monkeypatch.setattr(server, "_POOLS", {})
+    server.TOOLS.register(module.worker_pid, executor="process")
+    try:
+        response = client.post("/invoke/batch", json={"requests": [{"tool_name": "worker_pid", "arguments": {}}]})
+        result = response.json()["results"][0]
+        assert result["error"] is None and result["result"] != os.getpid()
+    finally:
+        server.TOOLS.unregister("worker_pid")
+        multiprocessing.set_start_method(previous, force=True)
+        for pool in server._POOLS.values():
+            pool.shutdown()
+
+
+def test_invoke_batch_replaces_a_broken_process_pool():
+    """Testa que um processo morto no pool não quebra os lotes seguintes."""
+    import server
+    server._pool("process").submit(os._exit, 1).exception()
+    assert server._pool("process").submit(abs, -42).result(timeout=30) == 42
+
+
+def test_invoke_batch_releases_slot_when_submit_fails(monkeypatch):
+    """Testa que uma falha ao submeter vira erro do item e devolve a vaga."""
+    import threading
+    import server
+
+    class Refuses:
+        def submit(self, *args, **kwargs):
+            raise RuntimeError("pool encerrado")
+
+    monkeypatch.setattr(server, "_pool", lambda kind: Refuses())
+    item = {"tool_name": "calculator", "arguments": {"expression": "1"}}
+    responses = []
+    # com uma vaga só, a segunda submissão travaria se a primeira não a devolvesse
+    worker = threading.Thread(target=lambda: responses.append(
+        client.post("/invoke/batch", json={"requests": [item] * 3, "max_concurrency": 1})))
+    worker.start()
+    worker.join(timeout=10)
+    assert not worker.is_alive()
+    results = responses[0].json()["results"]
+    assert [r["result"] for r in results] == [None] * 3
+    assert all("pool encerrado" in r["error"] for r in results)
+
+
+def test_invoke_calculator_with_variables_and_limits():
+    """Testa variáveis, modo em lote e os limites da calculadora."""
+    response = client.post("/invoke", json={
+        "tool_name": "calculator", "arguments": {"expression": "x ** 2 + y", "variables": {"x": 3, "y": 1}}})
+    assert response.json()["result"] == 10.0
+    response = client.post("/invoke", json={"tool_name": "calculator", "arguments": {"expression": "9**9**9**9"}})
+    assert "erro" in str(response.json()["result"]).lower()
+    response = client.post("/invoke", json={"tool_name": "calculator", "arguments": {"expression": "round(1, -99999999)"}})
+    assert response.json()["result"] == "Erro ao calcular: round aceita ndigits inteiro entre -15 e 15"
+    pytest.importorskip("numpy")
+    response = client.post("/invoke", json={
+        "tool_name": "calculator", "arguments": {"expression": "1 / x", "variables": {"x": [1, 0, 4]}}})
+    assert response.json()["result"] == [1.0, None, 0.25]
+
+
+def test_invoke_text_analyzer_on_asset_path():
+    """Testa o text_analyzer lendo um arquivo dos assets."""
+    response = client.post("/invoke", json={
+        "tool_name": "text_analyzer", "arguments": {"path": "guideline_abc.txt", "top_k": 3}})
+    result = response.json()["result"]
+    assert result["word_count"] > 0 and result["line_count"] >= 1
+    assert len(result["top_terms"]) <= 3 and result["unique_words"] > 0
+    response = client.post("/invoke", json={"tool_name": "text_analyzer", "arguments": {"path": "../py/server.py"}})
+    assert "erro" in str(response.json()["result"]).lower()
+
+
+def test_tools_registered_at_runtime_are_listed_and_invoked():
+    """Testa registro e remoção de ferramentas com o servidor no ar."""
+    import server
+
+    def eco(texto: str) -> str:
+        """Repete o texto.
+
+        texto: o que repetir
+        """
+        return texto
+
+    server.TOOLS.register(eco)
+    try:
+        names = [t["name"] for t in client.get("/tools").json()]
+        assert "eco" in names
+        response = client.post("/invoke", json={"tool_name": "eco", "arguments": {"texto": "oi"}})
+        assert response.json()["result"] == "oi"
+        response = client.post("/invoke", json={"tool_name": "eco", "arguments": {"texto": 1}})
+        assert "Argumentos inválidos" in response.json()["result"]
+    finally:
+        server.TOOLS.unregister("eco")
+    assert "eco" not in [t["name"] for t in client.get("/tools").json()]
+
+
+def test_path_parameter_routes():
+    """Testa /tools/{name} e /tools/{name}/invoke."""
+    assert client.get("/tools/calculator").json()["name"] == "calculator"
+    assert client.get("/tools/nao_existe").status_code == 404
+    response = client.post("/tools/calculator/invoke", json={"expression": "6 * 7"})
+    assert response.status_code == 200
+    assert response.json()["result"] == 42.0
+    assert client.get("/tools/calculator/invoke").status_code == 405
@@ -0,0 +1,326 @@
+# tests/test_mcp_stub.py
+"""Testes do servidor stdlib do Lab 02 (labs/02_mcp/server.py)."""
+import http.client
+import importlib.util
+import json
+import os
+import threading
+import time
+
+import pytest
+
+SERVER_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'labs', '02_mcp', 'server.py'))
+spec = importlib.util.spec_from_file_location("mcp_stub_server", SERVER_PATH)
+stub = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(stub)
+
+CLIENT_PATH = os.path.join(os.path.dirname(SERVER_PATH), 'client.py')
+spec = importlib.util.spec_from_file_location("mcp_stub_client", CLIENT_PATH)
+mcp_client = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(mcp_client)
+
+
+@pytest.fixture
+def threaded_server():
+    httpd = stub.ThreadedHTTPServer(("127.0.0.1", 0), stub.H11, max_workers=4)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield httpd
+    if thread.is_alive():
+        httpd.drain()
+        thread.join(timeout=5)
+    httpd.server_close()
+
+
+def _request(conn, method, path, payload=None):
+    body = json.dumps(payload).encode("utf-8") if payload is not None else None
+    conn.request(method, path, body=body, headers={"Content-Type": "application/json"})
+    response = conn.getresponse()
+    return response, json.loads(response.read().decode("utf-8"))
+
+
+def test_threaded_keep_alive_reuses_connection(threaded_server):
+    conn = http.client.HTTPConnection("127.0.0.1", threaded_server.server_address[1], timeout=5)
+    response, data = _request(conn, "GET", "/health")
+    assert response.status == 200 and data == {"ok": True}
+    assert response.version == 11
+    sock = conn.sock
+    response, data = _request(conn, "POST", "/tools/list_pdfs", {})
+    assert "guideline_abc.txt" in data["files"]
+    assert conn.sock is sock, "a conexão keep-alive deveria ser reutilizada"
+    conn.close()
+
+
+def test_threaded_idle_connection_does_not_block_others(threaded_server):
+    port = threaded_server.server_address[1]
+    idle = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    _request(idle, "GET", "/health")
+    other = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    response, data = _request(other, "GET", "/health")
+    assert data == {"ok": True}
+    idle.close()
+    other.close()
+
+
+def test_threaded_shutdown_drains_idle_connections(threaded_server):
+    port = threaded_server.server_address[1]
+    idle = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    _request(idle, "GET", "/health")
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    response, data = _request(conn, "POST", "/shutdown", {})
+    assert data == {"ok": True}
+    assert response.getheader("Connection") == "close"
+    threaded_server.server_close()  # espera o pool esvaziar
+    assert threaded_server.draining
+
+
+def test_list_pdfs_etag_returns_304(threaded_server):
+    conn = http.client.HTTPConnection("127.0.0.1", threaded_server.server_address[1], timeout=5)
+    response, data = _request(conn, "POST", "/tools/list_pdfs", {"limit": 1})
+    assert data == {"files": ["guideline_abc.txt"], "next_cursor": "guideline_abc.txt"}
+    etag = response.getheader("ETag")
+    conn.request("POST", "/tools/list_pdfs", body=json.dumps({"limit": 1}),
+                 headers={"Content-Type": "application/json", "If-None-Match": etag})
+    response = conn.getresponse()
+    assert response.status == 304 and response.read() == b""
+    _, data = _request(conn, "POST", "/tools/list_pdfs", {"limit": 1, "cursor": "guideline_abc.txt"})
+    assert data["files"] == ["guideline_xyz.txt"]
+    conn.close()
+
+
+
+@pytest.mark.parametrize("payload", [{"glob": 1}, {"cursor": []}, {"glob": ["*.txt"]}, {"cursor": {"a": 1}}])
+def test_list_pdfs_rejects_non_string_filters(threaded_server, payload):
+    conn = http.client.HTTPConnection("127.0.0.1", threaded_server.server_address[1], timeout=5)
+    response, data = _request(conn, "POST", "/tools/list_pdfs", payload)
+    assert response.status == 400 and data["error"] == f"{next(iter(payload))} must be a string"
+    _, data = _request(conn, "POST", "/tools/list_pdfs", {"glob": "*xyz*", "cursor": None})
+    assert data["files"] == ["guideline_xyz.txt"]
+    conn.close()
+
+def test_search_pdfs_tool(threaded_server):
+    conn = http.client.HTTPConnection("127.0.0.1", threaded_server.server_address[1], timeout=5)
+    response, data = _request(conn, "POST", "/tools/search_pdfs", {"query": "guideline ABC", "k": 1})
+    assert response.status == 200
+    assert [hit["file"] for hit in data["results"]] == ["guideline_abc.txt"]
+    response, _ = _request(conn, "POST", "/tools/search_pdfs", {})
+    assert response.status == 400
+    conn.close()
+
+
+def test_stats_endpoint_reports_summary_cache(threaded_server):
+    conn = http.client.HTTPConnection("127.0.0.1", threaded_server.server_address[1], timeout=5)
+    payload = {"path": "labs/02_mcp/assets/pdfs/guideline_abc.txt", "max_words": 2}
+    _, before = _request(conn, "GET", "/stats")
+    _request(conn, "POST", "/tools/summarize_pdf", payload)
+    _request(conn, "POST", "/tools/summarize_pdf", payload)
+    _, after = _request(conn, "GET", "/stats")
+    assert after["summary_cache"]["hits"] >= before["summary_cache"]["hits"] + 1
+    conn.close()
+
+
+def test_large_json_responses_are_streamed_chunked(threaded_server, monkeypatch):
+    monkeypatch.setattr(stub, "JSON_CHUNK", 16)
+    conn = http.client.HTTPConnection("127.0.0.1", threaded_server.server_address[1], timeout=5)
+    response, data = _request(conn, "POST", "/tools/list_pdfs", {})
+    assert response.getheader("Transfer-Encoding") == "chunked"
+    assert response.getheader("Content-Length") is None
+    assert "guideline_abc.txt" in data["files"]
+    response, data = _request(conn, "GET", "/health")  # a conexão segue utilizável
+    assert data == {"ok": True} and response.getheader("Content-Length") == "12"
+    conn.close()
+
+
+def test_client_gather_reuses_pooled_connections(threaded_server):
+    base = f"http://127.0.0.1:{threaded_server.server_address[1]}"
+    with mcp_client.MCPClient(base, pool_size=2) as client:
+        files = client.call_tool("list_pdfs")["files"]
+        calls = [("summarize_pdf", {"path": f"labs/02_mcp/assets/pdfs/{name}", "max_words": 3})
+                 for name in files * 5]
+        results = client.gather(calls)
+        assert [len(r["summary"].split()) for r in results] == [3] * len(calls)
+        assert len(client._idle) <= 2
+
+
+def test_client_gather_reports_per_call_errors(threaded_server):
+    base = f"http://127.0.0.1:{threaded_server.server_address[1]}"
+    with mcp_client.MCPClient(base, retries=0) as client:
+        ok, missing = client.gather([
+            ("list_pdfs", {}),
+            ("summarize_pdf", {"path": "labs/02_mcp/assets/pdfs/nao_existe.txt"}),
+        ], return_exceptions=True)
+        assert "files" in ok
+        assert isinstance(missing, mcp_client.MCPError) and missing.status == 404
+
+
+def test_client_retries_connection_errors():
+    client = mcp_client.MCPClient(f"http://127.0.0.1:{_free_port()}", retries=2, backoff=0.01)
+    with pytest.raises(OSError):
+        client.get("/health", timeout=0.5)
+
+
+def test_client_waits_through_broken_responses(monkeypatch):
+    """Resposta HTTP quebrada no boot (BadStatusLine) conta como "ainda não subiu"."""
+    class Booting:
+        calls = 0
+
+        def get(self, path, retries=None):
+            Booting.calls += 1
+            raise http.client.BadStatusLine("")
+
+    class Server:
+        terminated = False
+
+        def terminate(self):
+            Server.terminated = True
+
+    monkeypatch.setattr(mcp_client.time, "sleep", lambda seconds: None)
+    with pytest.raises(SystemExit, match="did not start"):
+        mcp_client.run(Booting(), Server())
+    assert Booting.calls == 30 and Server.terminated
+
+
+
+def _raw_server(respond):
+    """Servidor de uma linha por conexão: lê a requisição e chama ``respond(sock, n)``."""
+    import socket
+    listener = socket.create_server(("127.0.0.1", 0))
+    requests = []
+
+    def serve():
+        while True:
+            try:
+                sock, _ = listener.accept()
+            except OSError:
+                return
+            with sock:
+                while True:
+                    head = b""
+                    while b"\r\n\r\n" not in head:
+                        chunk = sock.recv(65536)
+                        if not chunk:
+                            break
+                        head += chunk
+                    if not head:
+                        break
+                    requests.append(head.split(b" ", 1)[0].decode())
+                    if not respond(sock, len(requests)):
+                        break
+
+    threading.Thread(target=serve, daemon=True).start()
+    return listener, requests
+
+
+def test_client_does_not_resend_a_post_after_it_left():
+    # o servidor recebe a requisição e cai sem responder: um POST pode ter rodado
+    listener, requests = _raw_server(lambda sock, n: False)
+    with listener:
+        client = mcp_client.MCPClient(f"http://127.0.0.1:{listener.getsockname()[1]}", retries=2, backoff=0.01)
+        with pytest.raises(http.client.RemoteDisconnected):
+            client.call_tool("list_pdfs")
+        assert requests == ["POST"]
+        with pytest.raises(http.client.RemoteDisconnected):
+            client.get("/health")
+        assert requests == ["POST", "GET", "GET", "GET"]
+
+
+def test_client_replaces_pooled_connection_closed_by_server():
+    ok = b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: 12\r\n\r\n{\"ok\": true}"
+
+    def once(sock, n):
+        sock.sendall(ok)
+        return False  # fecha a conexão keep-alive logo depois de responder
+
+    listener, requests = _raw_server(once)
+    with listener, mcp_client.MCPClient(f"http://127.0.0.1:{listener.getsockname()[1]}", retries=0) as client:
+        assert client.get("/health") == {"ok": True}
+        time.sleep(0.1)  # o fechamento chega ao cliente com a conexão ociosa no pool
+        assert client.call_tool("list_pdfs") == {"ok": True}
+        assert requests == ["GET", "POST"]
+
+
+def test_client_times_out_waiting_for_a_free_connection():
+    client = mcp_client.MCPClient(f"http://127.0.0.1:{_free_port()}", pool_size=1)
+    assert client._slots.acquire(timeout=1)  # a única conexão está ocupada
+    start = time.monotonic()
+    with pytest.raises(mcp_client.PoolTimeout):
+        client.get("/health", timeout=0.2)
+    assert time.monotonic() - start < 2
+
+def _free_port():
+    import socket
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="pool de workers requer os.fork")
+def test_worker_pool_serves_and_shuts_down_whole_pool():
+    import subprocess
+    import sys
+    import time
+
+    port = _free_port()
+    env = dict(os.environ, MCP_PORT=str(port), MCP_MODE="threaded")
+    proc = subprocess.Popen([sys.executable, SERVER_PATH, "--workers", "2"], env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        for _ in range(50):
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+                _request(conn, "GET", "/health")
+                break
+            except OSError:
+                time.sleep(0.1)
+        for _ in range(4):
+            response, data = _request(conn, "POST", "/tools/list_pdfs", {})
+            assert response.status == 200 and data["files"]
+        _request(conn, "POST", "/shutdown", {})
+        assert proc.wait(timeout=10) == 0
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+
+
+def test_metrics_endpoint_prometheus_text(threaded_server):
+    conn = http.client.HTTPConnection("127.0.0.1", threaded_server.server_address[1], timeout=5)
+    _request(conn, "GET", "/health")
+    _request(conn, "POST", "/tools/summarize_pdf", {"path": "labs/02_mcp/assets/pdfs/guideline_abc.txt"})
+    _request(conn, "POST", "/tools/summarize_pdf", {"path": "nao/existe.txt"})
+    _request(conn, "GET", "/nada/123")
+    conn.request("GET", "/metrics")
+    response = conn.getresponse()
+    text = response.read().decode("utf-8")
+    assert response.getheader("Content-Type").startswith("text/plain; version=0.0.4")
+    assert 'mcp_requests_total{method="GET",route="/health",status="200"}' in text
+    assert 'mcp_requests_total{method="GET",route="other",status="404"}' in text
+    assert 'mcp_tool_calls_total{tool="summarize_pdf",outcome="ok"}' in text
+    assert 'mcp_tool_calls_total{tool="summarize_pdf",outcome="error"}' in text
+    assert 'mcp_request_duration_seconds_bucket{route="/tools/summarize_pdf",le="+Inf"}' in text
+    assert 'mcp_requests_in_flight{route="/metrics"} 1' in text  # a própria coleta está em andamento
+    conn.close()
+
+
+def test_profile_spans_cover_client_and_server(threaded_server, tmp_path):
+    from shared import profiling
+    from shared.profiling import session
+    base = f"http://127.0.0.1:{threaded_server.server_address[1]}"
+    with session("lab", tmp_path, frozenset({"spans"})) as written:
+        with mcp_client.MCPClient(base) as client:
+            client.call_tool("list_pdfs")
+        # o servidor fecha o span da rota depois de enviar a resposta: espera por ele
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline and sum(
+                e["name"] == "POST /tools/list_pdfs" for e in profiling._tracer.events) < 2:
+            time.sleep(0.01)
+    trace = json.loads(written["trace"].read_text(encoding="utf-8"))
+    spans = [e for e in trace["traceEvents"] if e["ph"] == "X"]
+    by_name = {}
+    for e in spans:
+        by_name.setdefault(e["name"], []).append(e)
+    # cliente: chamada > tentativa; servidor (outra thread): rota com status
+    call, attempt = by_name["POST /tools/list_pdfs"][0], by_name["attempt"][0]
+    assert call["cat"] == "http" and call["tid"] == attempt["tid"]
+    assert attempt["args"]["status"] == 200
+    handled = [e for e in by_name["POST /tools/list_pdfs"] if e["tid"] != call["tid"]]
+    assert handled and handled[0]["args"]["status"] == 200
@@ -0,0 +1,132 @@
+# tests/test_metrics.py
+"""Testes das métricas (mcp_stub.metrics) e do GET /metrics do app do shim."""
+import asyncio
+import json
+import os
+import sys
+import threading
+
+import pytest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from mcp_stub.metrics import HttpMetrics, MetricsMiddleware, Registry, _Metric
+
+LAB_PY = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'labs', '02_mcp', 'py'))
+sys.path.insert(0, LAB_PY)
+import server as shim  # noqa: E402
+
+
+def _series(text):
+    """``{"nome{rótulos}": valor}`` de um texto Prometheus."""
+    out = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            out[name] = float(value)
+    return out
+
+
+def test_render_counter_gauge_histogram():
+    registry = Registry()
+    hits = registry.counter("hits_total", "Hits.", ("route",))
+    busy = registry.gauge("busy", "Busy.")
+    latency = registry.histogram("lat_seconds", "Latency.", ("route",), buckets=(0.1, 1))
+    hits.inc(("/a",))
+    hits.inc(("/a",), 2)
+    hits.inc(('say "hi"\n',))
+    busy.inc()
+    busy.inc()
+    busy.dec()
+    for value in (0.05, 0.1, 0.5, 3):
+        latency.observe(value, ("/a",))
+    text = registry.render()
+    assert "# TYPE hits_total counter\n" in text and "# TYPE lat_seconds histogram\n" in text
+    assert 'hits_total{route="/a"} 3\n' in text
+    assert 'hits_total{route="say \\"hi\\"\\n"} 1\n' in text
+    assert "busy 1\n" in text
+    # baldes cumulativos, "le" inclusivo, +Inf = contagem
+    assert 'lat_seconds_bucket{route="/a",le="0.1"} 2\n' in text
+    assert 'lat_seconds_bucket{route="/a",le="1"} 3\n' in text
+    assert 'lat_seconds_bucket{route="/a",le="+Inf"} 4\n' in text
+    assert 'lat_seconds_count{route="/a"} 4\n' in text
+    assert _series(text)['lat_seconds_sum{route="/a"}'] == pytest.approx(3.65)
+    with pytest.raises(ValueError):
+        registry.counter("hits_total", "de novo")
+
+
+
+def test_metric_without_render_is_rejected_at_creation():
+    class Silent(_Metric):
+        pass
+
+    with pytest.raises(TypeError):
+        Silent("silent", "Sem render.")
+
+def test_thread_shards_add_up():
+    registry = Registry()
+    counter = registry.counter("n_total", "N.")
+    histogram = registry.histogram("h", "H.")
+    gauge = registry.gauge("g", "G.")
+    def work():
+        for _ in range(5000):
+            counter.inc()
+            histogram.observe(0.001)
+            gauge.inc()
+        gauge.dec(amount=5000)
+    threads = [threading.Thread(target=work) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert counter.value() == 40000 and histogram.count() == 40000 and gauge.value() == 0
+    assert len(counter._shards) == 8
+
+
+def _call(app, method, path, body=b""):
+    sent = []
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+    async def send(message):
+        sent.append(message)
+    asyncio.run(app({"type": "http", "method": method, "path": path}, receive, send))
+    return sent
+
+
+def test_middleware_records_route_template_status_and_bytes():
+    app = FastAPI(max_workers=2)
+
+    @app.post("/echo/{n}")
+    def echo(n: int, body):
+        return {"n": n, "body": body}
+
+    metrics = HttpMetrics(prefix="t")
+    route_of = lambda m, p: app.match(m, p)[0].path if app.match(m, p) else "other"  # noqa: E731
+    wrapped = MetricsMiddleware(app, metrics, route_of)
+    sent = _call(wrapped, "POST", "/echo/1", b'{"a": 1}')
+    _call(wrapped, "POST", "/echo/2", b'{"a": 22}')
+    _call(wrapped, "GET", "/nada")
+    body = b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body")
+    series = _series(metrics.render())
+    assert series['t_requests_total{method="POST",route="/echo/{n}",status="200"}'] == 2
+    assert series['t_request_errors_total{method="GET",route="other"}'] == 1
+    assert series['t_request_bytes_total{route="/echo/{n}"}'] == 17
+    assert series['t_response_bytes_total{route="/echo/{n}"}'] >= 2 * len(body) - 1
+    assert series['t_requests_in_flight{route="/echo/{n}"}'] == 0
+    assert series['t_request_duration_seconds_count{route="/echo/{n}"}'] == 2
+
+
+def test_shim_metrics_endpoint_counts_tools():
+    client = TestClient(shim.app)
+    client.post("/invoke", json={"tool_name": "calculator", "arguments": {"expression": "1 + 1"}})
+    client.post("/invoke", json={"tool_name": "calculator", "arguments": {"expressao": "1"}})
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    series = _series(response.content.decode("utf-8"))
+    assert series['mcp_tool_calls_total{tool="calculator",outcome="ok"}'] >= 1
+    assert series['mcp_tool_calls_total{tool="calculator",outcome="invalid"}'] >= 1
+    assert series['mcp_tool_duration_seconds_count{tool="calculator"}'] >= 1
+    # o app servido (asgi_app) mede as rotas pelo modelo do caminho
+    sent = _call(shim.asgi_app, "GET", "/tools/calculator")
+    assert sent[0]["status"] == 200
+    assert _series(shim.METRICS.render())['mcp_requests_total{method="GET",route="/tools/{name}",status="200"}'] >= 1
@@ -0,0 +1,113 @@
+# tests/test_pdf.py
+"""Testes do extrator de texto de PDF (mcp_stub.pdf)."""
+import os
+import zlib
+
+import pytest
+
+from mcp_stub.pdf import PdfDocument, PdfError, PdfTextStore, build_pdf
+
+PAGES = ["Diretriz de hipertensão\nPressão (alvo) < 130/80 mmHg", "Segunda página: dose diária", ""]
+
+
+@pytest.mark.parametrize("options", [{}, {"compress": False}, {"object_streams": True}])
+def test_extracts_every_page(tmp_path, options):
+    fp = tmp_path / "doc.pdf"
+    fp.write_bytes(build_pdf(PAGES, **options))
+    with PdfDocument(fp) as doc:
+        assert doc.page_count == 3
+        assert list(doc.iter_pages()) == PAGES
+
+
+@pytest.mark.parametrize("options", [{}, {"object_streams": True}])
+def test_damaged_xref_falls_back_to_object_scan(tmp_path, options):
+    fp = tmp_path / "doc.pdf"
+    fp.write_bytes(build_pdf(PAGES, **options).replace(b"startxref", b"startxrex"))
+    with PdfDocument(fp) as doc:
+        assert doc.page_text(1) == PAGES[1]
+
+
+def test_tounicode_cmap_and_glyph_positions(tmp_path):
+    # Fonte Type0 com CMap: cada palavra é posicionada por Td (como navegadores geram).
+    cmap = (b"begincmap 1 begincodespacerange <0000> <FFFF> endcodespacerange "
+            b"2 beginbfchar <0001> <00E7> <0002> <00E3> endbfchar "
+            b"1 beginbfrange <0010> <0012> <0061> endbfrange endcmap")
+    content = zlib.compress(b"BT /F1 10 Tf 1 0 0 1 0 700 Tm <001000010002> Tj 40 0 Td <0011> Tj "
+                            b"[<0012> -50 <0010>] TJ 0 -12 Td <0011> Tj ET")
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /Resources << /Font << /F1 4 0 R >> >> /Contents 5 0 R >>",
+        b"<< /Type /Font /Subtype /Type0 /Encoding /Identity-H /ToUnicode 6 0 R "
+        b"/DescendantFonts [<< /DW 500 >>] >>",
+        b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(content) + content + b"\nendstream",
+        b"<< /Length %d >>\nstream\n" % len(cmap) + cmap + b"\nendstream",
+    ]
+    body = b"%PDF-1.4\n" + b"".join(b"%d 0 obj\n%s\nendobj\n" % (i, obj) for i, obj in enumerate(objects, 1))
+    fp = tmp_path / "cmap.pdf"
+    fp.write_bytes(body + b"%%EOF\n")  # sem xref: força a varredura
+    with PdfDocument(fp) as doc:
+        assert doc.page_text(0) == "açã bca\nb"
+
+
+def test_rejects_non_pdf(tmp_path):
+    fp = tmp_path / "doc.pdf"
+    fp.write_text("texto puro", encoding="utf-8")
+    with pytest.raises(PdfError):
+        PdfDocument(fp)
+
+
+def test_text_store_persists_and_invalidates(tmp_path):
+    fp = tmp_path / "doc.pdf"
+    fp.write_bytes(build_pdf(PAGES))
+    store = PdfTextStore(tmp_path / "store")
+    assert store.first_words(fp, 4) == "Diretriz de hipertensão Pressão"
+    assert store.extracted == 1  # só a primeira página foi decodificada
+
+    fresh = PdfTextStore(tmp_path / "store")
+    assert fresh.text(fp).startswith("Diretriz") and fresh.extracted == 2
+
+    again = PdfTextStore(tmp_path / "store")
+    assert again.page_text(fp, 1) == PAGES[1] and again.extracted == 0
+
+    fp.write_bytes(build_pdf(["Nova versão"]))
+    st = fp.stat()
+    os.utime(fp, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    assert again.page_count(fp) == 1 and again.page_text(fp, 0) == "Nova versão"
+
+
+def _one_page(page, content, stream_dict=b""):
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /Contents 4 0 R " + page + b">>",
+        b"<< /Length %d %s>>\nstream\n" % (len(content), stream_dict) + content + b"\nendstream",
+    ]
+    return b"%PDF-1.4\n" + b"".join(b"%d 0 obj\n%s\nendobj\n" % (i, obj) for i, obj in enumerate(objects, 1)) + b"%%EOF\n"
+
+
+@pytest.mark.parametrize("pdf", [
+    _one_page(b"", b"<~z{{{~>", b"/Filter /A85 "),                        # ValueError do base64
+    _one_page(b"/Resources 7 ", b"BT /F1 1 Tf (a) Tj ET"),                # AttributeError
+    _one_page(b"/Resources << /Font << /F1 << /Widths 5 /FirstChar 1 >> >> >> ", b"BT /F1 1 Tf (a) Tj ET"),  # TypeError
+])
+def test_text_store_reports_malformed_files_as_pdf_error(tmp_path, pdf):
+    fp = tmp_path / "doc.pdf"
+    fp.write_bytes(pdf)
+    store = PdfTextStore(tmp_path / "store")
+    with pytest.raises(PdfError, match="doc.pdf"):
+        store.first_words(fp, 5)
+    with pytest.raises(IndexError):  # página inexistente continua sendo IndexError
+        store.page_text(fp, 3)
+
+
+def test_inflate_is_capped(tmp_path, monkeypatch):
+    from mcp_stub import pdf
+    monkeypatch.setattr(pdf, "MAX_STREAM_BYTES", 10_000)
+    bomb = zlib.compress(b"BT " + b" " * 1_000_000 + b"(a) Tj ET", 9)  # ~1 KB que vira 1 MB
+    fp = tmp_path / "bomb.pdf"
+    fp.write_bytes(_one_page(b"", bomb, b"/Filter /FlateDecode "))
+    with pytest.raises(PdfError, match="inflates past 10000 bytes"):
+        PdfTextStore(tmp_path / "store").page_text(fp, 0)
+    fp.write_bytes(build_pdf(["cabe no limite"]))
+    assert PdfTextStore(tmp_path / "store").page_text(fp, 0) == "cabe no limite"
@@ -0,0 +1,110 @@
+# tests/test_profiling.py
+"""Testes do perfilamento opcional (shared/profiling.py, AGENTS_PROFILE)."""
+import asyncio
+import json
+import os
+import pstats
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from fastapi.testclient import TestClient
+from shared import profiling
+from shared.profiling import enabled_modes, session, span
+
+LAB_PY = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'labs', '02_mcp', 'py'))
+sys.path.insert(0, LAB_PY)
+import server as shim  # noqa: E402
+
+
+def _events(path):
+    return [e for e in json.loads(path.read_text(encoding="utf-8"))["traceEvents"] if e["ph"] == "X"]
+
+
+def test_modes_from_env(monkeypatch):
+    monkeypatch.delenv("AGENTS_PROFILE", raising=False)
+    assert enabled_modes() == frozenset()
+    assert enabled_modes(" Spans, cprofile ") == {"spans", "cprofile"}
+    with pytest.raises(ValueError):
+        enabled_modes("spans,flame")
+
+
+def test_off_spans_are_shared_noops(tmp_path):
+    assert span("a") is span("b", x=1)
+    with session("run", tmp_path, frozenset()) as written:
+        with span("a") as s:
+            s.set(n=1)
+    assert written == {} and not (tmp_path / "profile").exists()
+
+
+def test_spans_nest_per_thread_and_task(tmp_path):
+    async def request(i):
+        with span("request", req=i):
+            await asyncio.sleep(0.01)
+
+    async def both():
+        await asyncio.gather(request(0), request(1))
+
+    def worker():
+        with span("thread_work"):
+            pass
+
+    with session("run", tmp_path, frozenset({"spans"})) as written:
+        with span("outer") as s:
+            with span("inner"):
+                pass
+            s.set(status=200)
+        t = threading.Thread(target=worker, name="w1")
+        t.start()
+        t.join()
+        asyncio.run(both())
+        with pytest.raises(KeyError):
+            with span("fails"):
+                raise KeyError("x")
+    assert profiling._tracer is None
+    events = {e["name"] + str(e.get("args", {}).get("req", "")): e for e in _events(written["trace"])}
+    outer, inner = events["outer"], events["inner"]
+    # aninhamento por tempo na mesma linha
+    assert outer["tid"] == inner["tid"] and outer["ts"] <= inner["ts"]
+    assert inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert outer["args"] == {"status": 200}
+    assert events["thread_work"]["tid"] != outer["tid"]
+    # tarefas concorrentes em linhas próprias
+    assert events["request0"]["tid"] != events["request1"]["tid"]
+    assert events["fails"]["args"] == {"error": "KeyError"}
+    names = [e["args"]["name"] for e in json.loads(written["trace"].read_text())["traceEvents"] if e["ph"] == "M"]
+    assert "run" in names and "w1" in names
+
+
+def test_cprofile_dump_per_run(tmp_path):
+    with session("run", tmp_path, frozenset({"cprofile"})) as written:
+        sum(i * i for i in range(1000))
+    assert written["profile"] == tmp_path / "profile" / "run.prof"
+    assert pstats.Stats(str(written["profile"])).total_calls > 0
+    assert "trace" not in written
+
+
+def _handler_work():
+    return sum(i * i for i in range(1000))
+
+
+def test_cprofile_covers_threads_started_in_the_session(tmp_path):
+    # como o pool do MCP_MODE=threaded e o executor do shim: threads criadas sob demanda
+    with session("run", tmp_path, frozenset({"cprofile"})) as written:
+        with ThreadPoolExecutor(2) as pool:
+            assert list(pool.map(lambda _: _handler_work(), range(4))) == [332833500] * 4
+    calls = {func[2]: stat[1] for func, stat in pstats.Stats(str(written["profile"])).stats.items()}
+    assert calls.get("_handler_work") == 4
+    assert threading.getprofile() is None
+
+
+def test_invoke_tool_spans(tmp_path):
+    client = TestClient(shim.app)
+    with session("shim", tmp_path, frozenset({"spans"})) as written:
+        client.post("/invoke", json={"tool_name": "calculator", "arguments": {"expression": "1 + 2"}})
+        client.post("/invoke", json={"tool_name": "calculator", "arguments": {}})
+    names = [e["name"] for e in _events(written["trace"])]
+    assert names.count("validate") == 2
+    assert names.count("tool:calculator") == 1  # argumentos inválidos não chegam à função
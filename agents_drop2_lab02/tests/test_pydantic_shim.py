@@ -0,0 +1,89 @@
+# tests/test_pydantic_shim.py
+"""Testes do BaseModel gerado (pydantic shim)."""
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, ValidationError
+
+
+class Item(BaseModel):
+    nome: str
+    quantidade: int = 1
+
+
+class Pedido(BaseModel):
+    cliente: str
+    itens: List[Item]
+    extras: Dict[str, Any] = {}
+    nota: Optional[str] = None
+    peso: float = 0.0
+
+
+def test_slots_sem_dict_por_instancia():
+    item = Item(nome="a")
+    assert not hasattr(item, "__dict__")
+    assert Item.__slots__ == ("nome", "quantidade")
+    assert list(Item.model_fields) == ["nome", "quantidade"]
+
+
+def test_defaults_e_copia_de_mutaveis():
+    a, b = Pedido(cliente="x", itens=[]), Pedido(cliente="y", itens=[])
+    a.extras["k"] = 1
+    assert b.extras == {}
+    assert a.nota is None and a.peso == 0.0
+
+
+def test_modelos_aninhados_e_dump():
+    pedido = Pedido(cliente="x", itens=[{"nome": "a", "quantidade": 2}, Item(nome="b")], peso=3)
+    assert isinstance(pedido.itens[0], Item)
+    assert pedido.peso == 3.0 and type(pedido.peso) is float
+    expected = {"cliente": "x", "itens": [{"nome": "a", "quantidade": 2}, {"nome": "b", "quantidade": 1}],
+                "extras": {}, "nota": None, "peso": 3.0}
+    assert pedido.dict() == expected == pedido.model_dump()
+    assert pedido == Pedido(**expected)
+
+
+def test_erros_reunidos():
+    with pytest.raises(ValidationError) as info:
+        Pedido(itens=[{"nome": 1}], nota=5)
+    locs = [e["loc"][0] for e in info.value.errors()]
+    assert locs == ["cliente", "itens", "nota"]
+    assert isinstance(info.value, ValueError)
+
+
+@pytest.mark.parametrize("valor", ["1", True, 1.5, None])
+def test_int_rejeita_tipos_errados(valor):
+    with pytest.raises(ValidationError):
+        Item(nome="a", quantidade=valor)
+
+
+def test_int_aceita_float_inteiro_e_ignora_extras():
+    item = Item(nome="a", quantidade=2.0, desconhecido=True)
+    assert item.quantidade == 2 and type(item.quantidade) is int
+
+
+def test_heranca_acumula_campos():
+    class Especial(Item):
+        codigo: str = "z"
+
+    obj = Especial(nome="a")
+    assert list(Especial.model_fields) == ["nome", "quantidade", "codigo"]
+    assert obj.dict() == {"nome": "a", "quantidade": 1, "codigo": "z"}
+    assert not hasattr(obj, "__dict__")
+
+
+def test_corpo_invalido_retorna_422():
+    app = FastAPI()
+
+    @app.post("/itens")
+    def criar(item: Item):
+        return item
+
+    client = TestClient(app)
+    assert client.post("/itens", json={"nome": "a"}).json() == {"nome": "a", "quantidade": 1}
+    response = client.post("/itens", json={"nome": 3})
+    assert response.status_code == 422
+    assert "nome" in response.json()["detail"]
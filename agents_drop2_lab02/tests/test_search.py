@@ -0,0 +1,124 @@
+# tests/test_search.py
+"""Testes do índice BM25 (mcp_stub.search)."""
+import os
+import threading
+
+from mcp_stub.pdf import build_pdf
+from mcp_stub.search import SearchIndex, tokenize
+
+
+def _touch(fp):
+    st = fp.stat()
+    os.utime(fp, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+def test_tokenize_folds_case_and_accents():
+    assert tokenize("Pressão ARTERIAL, 120/80") == ["pressao", "arterial", "120", "80"]
+
+
+def test_search_ranks_pages_and_updates_incrementally(tmp_path):
+    assets = tmp_path / "assets"
+    assets.mkdir()
+    (assets / "hipertensao.pdf").write_bytes(build_pdf([
+        "Introdução geral ao documento",
+        "Pressão arterial alvo abaixo de 130/80 em hipertensos",
+    ]))
+    (assets / "diabetes.txt").write_text("Glicemia de jejum e hemoglobina glicada", encoding="utf-8")
+    index = SearchIndex(assets, tmp_path / "idx" / "search.sqlite3", refresh_interval=0)
+
+    hits = index.search("pressao arterial")["results"]
+    assert (hits[0]["file"], hits[0]["page"]) == ("hipertensao.pdf", 2)
+    assert index.search("glicemia")["results"][0]["file"] == "diabetes.txt"
+    assert index.refresh() == {"added": 0, "updated": 0, "removed": 0}
+
+    (assets / "diabetes.txt").write_text("Insulina basal noturna", encoding="utf-8")
+    _touch(assets / "diabetes.txt")
+    (assets / "hipertensao.pdf").unlink()
+    (assets / "renal.txt").write_text("Taxa de filtração glomerular", encoding="utf-8")
+    assert index.refresh() == {"added": 1, "updated": 1, "removed": 1}
+    assert index.search("glicemia")["results"] == []
+    assert index.search("insulina")["results"][0]["file"] == "diabetes.txt"
+    assert index.search("pressao")["results"] == []
+    assert index.search("filtracao")["results"][0]["file"] == "renal.txt"
+
+
+def test_search_index_persists_on_disk(tmp_path):
+    assets = tmp_path / "assets"
+    assets.mkdir()
+    (assets / "a.txt").write_text("termo raro zzyzx", encoding="utf-8")
+    SearchIndex(assets, tmp_path / "search.sqlite3").refresh()
+    reopened = SearchIndex(assets, tmp_path / "search.sqlite3")
+    assert reopened.refresh() == {"added": 0, "updated": 0, "removed": 0}
+    assert reopened.search("zzyzx")["results"][0]["file"] == "a.txt"
+
+
+def test_index_touches_disk_only_when_used(tmp_path):
+    index = SearchIndex(tmp_path / "assets", tmp_path / "idx" / "search.sqlite3")
+    assert not (tmp_path / "idx").exists()
+    (tmp_path / "assets").mkdir()
+    assert index.refresh() == {"added": 0, "updated": 0, "removed": 0}
+    assert (tmp_path / "idx" / "search.sqlite3").exists()
+
+
+def test_concurrent_refresh_of_a_shared_file(tmp_path):
+    # um índice por "processo" (workers pré-forkados): a trava da instância não os coordena
+    assets = tmp_path / "assets"
+    assets.mkdir()
+    for i in range(20):
+        (assets / f"doc{i}.txt").write_text(f"palavra{i} " * 2000, encoding="utf-8")
+    indexes = [SearchIndex(assets, tmp_path / "search.sqlite3") for _ in range(4)]
+    barrier = threading.Barrier(len(indexes))
+    results, errors = [], []
+
+    def refresh(index):
+        barrier.wait()
+        try:
+            results.append(index.refresh())
+        except Exception as e:  # noqa: BLE001
+            errors.append(e)
+
+    threads = [threading.Thread(target=refresh, args=(index,)) for index in indexes]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert sum(r["added"] for r in results) == 20  # cada documento indexado uma vez
+    assert indexes[0].search("palavra7")["results"][0]["file"] == "doc7.txt"
+
+
+def test_other_workers_refresh_invalidates_corpus_stats(tmp_path):
+    assets = tmp_path / "assets"
+    assets.mkdir()
+    (assets / "a.txt").write_text("pressão arterial alvo", encoding="utf-8")
+    mine = SearchIndex(assets, tmp_path / "search.sqlite3", refresh_interval=3600)
+    other = SearchIndex(assets, tmp_path / "search.sqlite3", refresh_interval=3600)
+    assert mine.search("pressão")["passages"] == 1
+    (assets / "b.txt").write_text("pressão " * 50 + "outro documento", encoding="utf-8")
+    assert other.refresh()["added"] == 1
+    # ``mine`` não reindexou nada, mas N e avgdl seguem o arquivo compartilhado
+    assert mine.search("pressão")["passages"] == 2 and mine.generation() == other.generation()
+
+
+def test_refresh_commits_each_document(tmp_path):
+    import sqlite3
+    assets = tmp_path / "assets"
+    assets.mkdir()
+    for i in range(3):
+        (assets / f"doc{i}.txt").write_text(f"palavra{i}", encoding="utf-8")
+    index = SearchIndex(assets, tmp_path / "search.sqlite3")
+    extract, seen = index._extract, []
+
+    def extract_and_write(name):
+        # outro worker consegue gravar entre um documento e outro (sem esperar)
+        if seen:
+            with sqlite3.connect(tmp_path / "search.sqlite3", timeout=0) as db:
+                db.execute("BEGIN IMMEDIATE")
+                seen.append(db.execute("SELECT COUNT(*) FROM docs").fetchone()[0])
+        else:
+            seen.append(0)
+        return extract(name)
+
+    index._extract = extract_and_write
+    assert index.refresh()["added"] == 3
+    assert seen == [0, 1, 2]
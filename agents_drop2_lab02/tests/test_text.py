@@ -0,0 +1,48 @@
+# tests/test_text.py
+"""Testes do tokenizador em streaming (mcp_stub.text)."""
+import random
+import time
+
+from mcp_stub.text import MAX_WORD_LENGTH, first_words, iter_words
+
+
+def test_iter_words_matches_split_for_any_chunk_size(tmp_path):
+    rng = random.Random(7)
+    vocab = ["ação", "coração", "pressão", "β-bloqueador", "mg/dL", " ", "x"]
+    text = "".join(rng.choice(vocab) + rng.choice([" ", "\n", "\t", "  ", ""]) for _ in range(2000))
+    fp = tmp_path / "doc.txt"
+    fp.write_text(text, encoding="utf-8")
+    for chunk_size in (1, 2, 3, 5, 64, 8192):
+        assert list(iter_words(fp, chunk_size)) == text.split()
+
+
+def test_iter_words_ignores_invalid_utf8(tmp_path):
+    fp = tmp_path / "doc.txt"
+    fp.write_bytes(b"ok \xff\xfebad ca\xc3\xa7a")
+    assert list(iter_words(fp, 2)) == ["ok", "bad", "caça"]
+
+
+def test_first_words_stops_early(tmp_path):
+    fp = tmp_path / "grande.txt"
+    fp.write_text("palavra " * 200_000, encoding="utf-8")
+    assert first_words(fp, 3) == "palavra palavra palavra"
+    assert first_words(fp, 0) == ""
+    short = tmp_path / "curto.txt"
+    short.write_text("só duas", encoding="utf-8")
+    assert first_words(short, 40) == "só duas"
+
+
+def test_words_without_whitespace_come_out_in_pieces(tmp_path):
+    fp = tmp_path / "sem_espacos.txt"
+    fp.write_bytes(b"a" * 4_000_000)
+    start = time.perf_counter()
+    assert first_words(fp, 1) == "a" * MAX_WORD_LENGTH
+    pieces = list(iter_words(fp))
+    assert time.perf_counter() - start < 5.0
+    assert "".join(pieces) == "a" * 4_000_000 and max(map(len, pieces)) == MAX_WORD_LENGTH
+    # os mesmos pedaços para qualquer tamanho de bloco
+    mixed = tmp_path / "misto.txt"
+    mixed.write_text("curta " + "b" * 2500 + " fim", encoding="utf-8")
+    expected = ["curta", "b" * 1024, "b" * 1024, "b" * 452, "fim"]
+    for chunk_size in (1, 7, 1024, 8192):
+        assert list(iter_words(mixed, chunk_size)) == expected
@@ -0,0 +1,85 @@
+# tests/test_tools.py
+"""Testes do registro de ferramentas (mcp_stub.tools)."""
+import json
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from mcp_stub.tools import ToolError, ToolRegistry
+
+
+def _registry():
+    registry = ToolRegistry()
+
+    @registry.tool(executor="process")
+    def soma(a: int, b: float = 1.0, extra: Optional[Dict[str, Any]] = None, tags: List[str] = None, flag: bool = False):
+        """Soma dois números.
+
+        a: primeira parcela
+        b: segunda parcela
+        """
+        return a + b
+
+    return registry, soma
+
+
+def test_schema_is_derived_from_signature_and_docstring():
+    registry, soma = _registry()
+    spec = registry.get("soma")
+    assert spec.func is soma and spec.executor == "process"
+    assert spec.schema == {
+        "name": "soma",
+        "description": "Soma dois números.",
+        "parameters": {
+            "a": {"type": "integer", "description": "primeira parcela"},
+            "b": {"type": "number", "description": "segunda parcela"},
+            "extra": {"type": "object", "description": ""},
+            "tags": {"type": "array", "description": ""},
+            "flag": {"type": "boolean", "description": ""},
+        },
+        "required": ["a"],
+    }
+
+
+def test_validator_catches_bad_arguments_before_the_call():
+    registry, _ = _registry()
+    validate = registry.get("soma").validate
+    assert validate({"a": 1}) is None
+    assert validate({"a": 1, "b": 2, "extra": None, "tags": None, "flag": True}) is None
+    assert "ausente: a" in validate({})
+    assert "desconhecidos: c" in validate({"a": 1, "c": 2})
+    assert "a: tipo inválido (str)" in validate({"a": "1"})
+    assert "a: tipo inválido (bool)" in validate({"a": True})
+    assert "tipo inválido" in validate({"a": 1, "tags": "x"})
+    assert "objeto" in validate([1])
+
+
+def test_payload_is_cached_and_follows_runtime_changes():
+    registry, _ = _registry()
+    first = registry.payload()
+    assert registry.payload() is first
+    assert [t["name"] for t in json.loads(first)] == ["soma"]
+    etag = registry.etag()
+
+    registry.register(lambda **kw: kw, name="eco", description="Devolve os argumentos.")
+    assert registry.get("eco").validate({"qualquer": 1}) is None
+    assert [t["name"] for t in json.loads(registry.payload())] == ["soma", "eco"]
+    assert registry.etag() != etag
+
+    assert registry.unregister("eco") is True
+    assert registry.unregister("eco") is False
+    assert "eco" not in registry and registry.payload() == first
+
+
+def test_rejects_unsupported_definitions():
+    registry = ToolRegistry()
+    with pytest.raises(ToolError):
+        registry.register(lambda x: x, executor="gpu")
+    with pytest.raises(ToolError):
+        registry.register(lambda *args: args)
+
+    def complexo(x: complex):
+        return x
+
+    with pytest.raises(ToolError):
+        registry.register(complexo)
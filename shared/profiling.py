@@ -0,0 +1,221 @@
+"""Opt-in profiling of lab runs: timing spans and cProfile.
+
+``AGENTS_PROFILE`` selects what is recorded (comma separated):
+
+* ``spans`` — every ``with span(...)`` block becomes a trace event
+  (``ph: "X"``) and the run is written as trace-event JSON, which
+  ``chrome://tracing`` and https://ui.perfetto.dev open directly.  Blocks
+  nest by time on each thread; asyncio tasks get their own row.
+* ``cprofile`` — a ``cProfile`` dump (``python -m pstats`` or snakeviz read
+  it) of the thread that opened the :func:`session` and of every thread
+  started while it is open (handler pools, executors), merged into one
+  file.  Threads that were already running when it opened are not seen.
+
+Each :func:`session` writes ``<name>.trace.json`` / ``<name>.prof`` under
+``<out_dir>/profile/``, replacing the previous run's.  Timestamps are wall
+clock microseconds, so traces of the client and the server of one run line
+up when loaded together.
+
+With the variable unset, :func:`span` returns a shared object whose
+``__enter__``/``__exit__`` do nothing: a global check and a call.
+
+The module lives in ``shared/`` and both drops import it as
+``shared.profiling`` (each entry point puts the repository root on
+``sys.path``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import cProfile
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+MODES = ("cprofile", "spans")
+
+# relógio de parede em µs a partir do perf_counter (monotônico e preciso)
+_EPOCH = time.time() - time.perf_counter()
+
+
+def enabled_modes(value: Optional[str] = None) -> FrozenSet[str]:
+    """Modes in ``value`` (default: ``AGENTS_PROFILE``); empty when profiling is off."""
+    value = os.getenv("AGENTS_PROFILE", "") if value is None else value
+    modes = frozenset(m.strip().lower() for m in value.split(",") if m.strip())
+    unknown = sorted(modes - set(MODES))
+    if unknown:
+        raise ValueError(f"AGENTS_PROFILE inválido: {', '.join(unknown)} (use {', '.join(MODES)})")
+    return modes
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+    def set(self, **args: Any) -> None:
+        return None
+
+
+_NULL = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "cat", "args", "start")
+
+    def __init__(self, tracer: "Tracer", name: str, cat: str, args: Dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        end = time.perf_counter()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer.record(self.name, self.cat, self.start, end, self.args)
+
+    def set(self, **args: Any) -> None:
+        """Attach arguments known only inside the block (status, sizes...)."""
+        self.args.update(args)
+
+
+class Tracer:
+    """Collects finished spans as trace events."""
+
+    def __init__(self) -> None:
+        self.pid = os.getpid()
+        self.events: List[Dict[str, Any]] = []
+        self._lanes: Dict[Tuple[int, int], int] = {}
+        self._names: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def _lane(self) -> int:
+        # uma linha por thread e, dentro dela, por tarefa asyncio: tarefas
+        # concorrentes se sobrepõem no tempo e não aninhariam na mesma linha
+        thread = threading.current_thread()
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        key = (thread.ident or 0, id(task) if task is not None else 0)
+        lane = self._lanes.get(key)
+        if lane is None:
+            with self._lock:
+                lane = self._lanes.setdefault(key, len(self._lanes) + 1)
+                self._names[lane] = thread.name if task is None else f"{thread.name}/{task.get_name()}"
+        return lane
+
+    def record(self, name: str, cat: str, start: float, end: float, args: Dict[str, Any]) -> None:
+        event = {"name": name, "cat": cat, "ph": "X", "ts": round((_EPOCH + start) * 1e6, 3),
+                 "dur": round((end - start) * 1e6, 3), "pid": self.pid, "tid": self._lane()}
+        if args:
+            event["args"] = args
+        self.events.append(event)  # list.append é atômico sob o GIL
+
+    def trace(self, process_name: str) -> Dict[str, Any]:
+        """The trace-event JSON object, with process and row names."""
+        meta = [{"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0, "args": {"name": process_name}}]
+        meta += [{"name": "thread_name", "ph": "M", "pid": self.pid, "tid": lane, "args": {"name": name}}
+                 for lane, name in sorted(self._names.items())]
+        return {"traceEvents": meta + sorted(self.events, key=lambda e: e["ts"]), "displayTimeUnit": "ms"}
+
+
+class _ThreadProfiles:
+    """One ``cProfile.Profile`` per thread started while a session is open."""
+
+    # até o 3.11 o cProfile só vê a thread que chamou enable(); a partir do
+    # 3.12 ele usa sys.monitoring e já cobre todas as threads do processo
+    needed = sys.version_info < (3, 12)
+
+    def __init__(self) -> None:
+        self.profilers: List[cProfile.Profile] = []
+        self._lock = threading.Lock()
+
+    def start(self, *_: Any) -> None:
+        # gancho do threading.setprofile: roda no primeiro evento da thread nova
+        # e é trocado pelo profiler dela no enable()
+        profiler = cProfile.Profile()
+        with self._lock:
+            self.profilers.append(profiler)
+        profiler.enable()
+
+    def merge_into(self, profiler: cProfile.Profile, path: Path) -> None:
+        stats = pstats.Stats(profiler)
+        with self._lock:
+            profilers = list(self.profilers)
+        for other in profilers:
+            other.create_stats()
+            if other.stats:
+                stats.add(other)
+        stats.dump_stats(str(path))
+
+
+_tracer: Optional[Tracer] = None
+
+
+def span(name: str, cat: str = "lab", **args: Any) -> Any:
+    """Context manager timing the block as ``name`` while a spans session is open."""
+    if _tracer is None:
+        return _NULL
+    return _Span(_tracer, name, cat, args)
+
+
+@contextmanager
+def session(name: str, out_dir: Path, modes: Optional[FrozenSet[str]] = None) -> Iterator[Dict[str, Path]]:
+    """Profile the enclosed block as ``AGENTS_PROFILE`` (or ``modes``) asks.
+
+    Yields a dict that gets the paths written (``trace``, ``profile``) when
+    the block ends; empty when profiling is off.
+    """
+    global _tracer
+    modes = enabled_modes() if modes is None else modes
+    written: Dict[str, Path] = {}
+    if not modes:
+        yield written
+        return
+    folder = Path(out_dir) / "profile"
+    profiler = cProfile.Profile() if "cprofile" in modes else None
+    threads = _ThreadProfiles() if profiler is not None and _ThreadProfiles.needed else None
+    tracer = Tracer() if "spans" in modes else None
+    previous, _tracer = _tracer, tracer or _tracer
+    if threads is not None:
+        threading.setprofile(threads.start)
+    if profiler is not None:
+        profiler.enable()
+    try:
+        with span(name, cat="session"):
+            yield written
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        if threads is not None:
+            threading.setprofile(None)
+        _tracer = previous
+        folder.mkdir(parents=True, exist_ok=True)
+        if profiler is not None:
+            written["profile"] = folder / f"{name}.prof"
+            if threads is not None:
+                threads.merge_into(profiler, written["profile"])
+            else:
+                profiler.dump_stats(str(written["profile"]))
+        if tracer is not None:
+            written["trace"] = folder / f"{name}.trace.json"
+            written["trace"].write_text(json.dumps(tracer.trace(name), ensure_ascii=False), encoding="utf-8")
+
+
+__all__ = ["MODES", "Tracer", "enabled_modes", "session", "span"]
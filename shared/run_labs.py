@@ -0,0 +1,258 @@
+"""
+Parallel lab runner with content-hash caching.
+Discovers labs by their lab.yaml, runs each lab's run.sh and grading tests in
+a process pool, and records the outcome in the drop's .passports directory.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import platform
+import shlex
+import socket
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+
+# Generated or tool-owned directories never count as lab inputs
+SKIP_DIRS = {"outputs", "__pycache__", "node_modules", ".passports", ".pytest_cache", ".git"}
+# Environment that changes what a lab run does; part of the inputs hash
+HASHED_ENV = ("BACKEND", "OFFLINE", "MODEL")
+LOG_TAIL_LINES = 40
+
+
+@dataclass
+class Lab:
+    """A lab directory (labs/<name>/lab.yaml) inside a drop."""
+
+    name: str
+    path: Path
+    drop: Path
+    title: str = ""
+    grading: List[str] = field(default_factory=list)
+
+    @property
+    def label(self) -> str:
+        return f"{self.drop.name}/{self.name}"
+
+    @property
+    def passport(self) -> Path:
+        return self.drop / ".passports" / f"{self.name}.json"
+
+
+def _unquote(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+def read_lab_yaml(path: Path) -> Tuple[Dict[str, str], List[str]]:
+    """Top-level scalars and the ``grading`` pytest commands of a lab.yaml.
+
+    Reads only what the runner needs, so no YAML library is required.
+    """
+    info: Dict[str, str] = {}
+    grading: List[str] = []
+    section = None
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if not line.strip() or line.lstrip().startswith("#"):
+            continue
+        if not line[0].isspace():
+            key, _, value = line.partition(":")
+            section = key.strip()
+            if value.strip():
+                info[section] = _unquote(value)
+        elif section == "grading" and line.strip().startswith("- "):
+            key, _, value = line.strip()[2:].partition(":")
+            if key.strip() == "pytest" and value.strip():
+                grading.append(_unquote(value))
+    return info, grading
+
+
+def _walk(root: Path) -> Iterator[Path]:
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d not in SKIP_DIRS and not d.startswith("."))
+        for name in sorted(filenames):
+            yield Path(dirpath) / name
+
+
+def discover(roots: List[Path]) -> List[Lab]:
+    """Every labs/<name>/lab.yaml under ``roots``, in path order."""
+    labs: Dict[Path, Lab] = {}
+    for root in roots:
+        for path in _walk(root.resolve()):
+            if path.name != "lab.yaml" or path.parent.parent.name != "labs":
+                continue
+            info, grading = read_lab_yaml(path)
+            lab_dir = path.parent
+            labs[lab_dir] = Lab(lab_dir.name, lab_dir, lab_dir.parent.parent,
+                                info.get("title", info.get("name", "")), grading)
+    return [labs[p] for p in sorted(labs)]
+
+
+def inputs_hash(lab: Lab, all_labs: List[Lab]) -> str:
+    """SHA-256 of the files a lab run depends on.
+
+    That is the lab directory plus the rest of its drop (shared packages,
+    tests, assets), minus other labs and generated directories; the Python
+    version and HASHED_ENV are included too.
+    """
+    others = {other.path for other in all_labs if other.drop == lab.drop and other.path != lab.path}
+    digest = hashlib.sha256()
+    digest.update(platform.python_version().encode())
+    for name in HASHED_ENV:
+        digest.update(f"{name}={os.getenv(name, '')}\0".encode())
+    for path in _walk(lab.drop):
+        if any(other in path.parents for other in others):
+            continue
+        digest.update(str(path.relative_to(lab.drop)).encode() + b"\0")
+        digest.update(hashlib.sha256(path.read_bytes()).digest())
+    return digest.hexdigest()
+
+
+def load_passport(lab: Lab) -> Optional[Dict]:
+    try:
+        return json.loads(lab.passport.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _step(name: str, cmd: List[str], cwd: Path, env: Dict[str, str], timeout: float) -> Dict:
+    start = time.perf_counter()
+    try:
+        proc = subprocess.run(cmd, cwd=cwd, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                              text=True, timeout=timeout)
+        returncode, output = proc.returncode, proc.stdout
+    except subprocess.TimeoutExpired as e:
+        returncode = None
+        output = (e.stdout.decode(errors="replace") if isinstance(e.stdout, bytes) else e.stdout or "")
+        output += f"\n[timeout after {timeout:g}s]"
+    return {
+        "name": name,
+        "cmd": shlex.join(cmd),
+        "returncode": returncode,
+        "duration_s": round(time.perf_counter() - start, 3),
+        "log_tail": output.splitlines()[-LOG_TAIL_LINES:] if returncode != 0 else [],
+    }
+
+
+def run_lab(lab: Lab, digest: str, timeout: float) -> Dict:
+    """Run run.sh and the grading tests of one lab; returns its passport."""
+    (lab.drop / ".passports").mkdir(exist_ok=True)  # run.sh touches its .ok file there
+    env = dict(os.environ)
+    # labs that start a server bind MCP_PORT; parallel labs must not collide
+    env["MCP_PORT"] = str(_free_port())
+    started = time.time()
+    steps = [_step("run.sh", ["bash", str(lab.path / "run.sh")], lab.drop, env, timeout)]
+    for command in lab.grading:
+        cmd = shlex.split(command)
+        if cmd and cmd[0] == "pytest":
+            cmd = [sys.executable, "-m"] + cmd
+        steps.append(_step("pytest", cmd, lab.drop, env, timeout))
+    return {
+        "lab": lab.name,
+        "title": lab.title,
+        "status": "passed" if all(s["returncode"] == 0 for s in steps) else "failed",
+        "inputs_sha256": digest,
+        "started_at": datetime.fromtimestamp(started, timezone.utc).isoformat(timespec="seconds"),
+        "duration_s": round(time.time() - started, 3),
+        "python": platform.python_version(),
+        "steps": steps,
+    }
+
+
+def _summary(rows: List[Tuple[Lab, str, Optional[Dict]]]) -> str:
+    width = max([len(lab.label) for lab, _, _ in rows] + [3])
+    lines = [f"{'lab':<{width}}  {'status':<7}  {'time':>8}  last run"]
+    for lab, status, passport in rows:
+        seconds = f"{passport['duration_s']:.1f}s" if passport else "-"
+        when = passport.get("started_at", "") if passport else ""
+        lines.append(f"{lab.label:<{width}}  {status:<7}  {seconds:>8}  {when}")
+        if status == "failed" and passport:
+            failed = next(s for s in passport["steps"] if s["returncode"] != 0)
+            lines.append(f"    {failed['name']} failed ({failed['cmd']}):")
+            lines += [f"    | {line}" for line in failed["log_tail"][-10:]]
+    return "\n".join(lines)
+
+
+def status(labs: List[Lab]) -> int:
+    """Print the recorded passports without running anything."""
+    rows = []
+    for lab in labs:
+        passport = load_passport(lab)
+        rows.append((lab, passport["status"] if passport else "never", passport))
+    print(_summary(rows))
+    return 0
+
+
+def run(labs: List[Lab], jobs: int, force: bool, timeout: float) -> int:
+    """Run the labs whose inputs changed since their last passing run."""
+    rows: Dict[Path, Tuple[Lab, str, Optional[Dict]]] = {}
+    pending = []
+    for lab in labs:
+        digest = inputs_hash(lab, labs)
+        passport = load_passport(lab)
+        if not force and passport and passport.get("status") == "passed" \
+                and passport.get("inputs_sha256") == digest:
+            rows[lab.path] = (lab, "cached", passport)
+        else:
+            pending.append((lab, digest))
+    if pending:
+        with ProcessPoolExecutor(max_workers=max(1, min(jobs, len(pending)))) as pool:
+            futures = {pool.submit(run_lab, lab, digest, timeout): lab for lab, digest in pending}
+            for future in as_completed(futures):
+                lab = futures[future]
+                passport = future.result()
+                lab.passport.write_text(json.dumps(passport, indent=2, ensure_ascii=False) + "\n",
+                                        encoding="utf-8")
+                rows[lab.path] = (lab, passport["status"], passport)
+                print(f"[labs] {lab.label}: {passport['status']} in {passport['duration_s']:.1f}s", flush=True)
+    ordered = [rows[lab.path] for lab in labs]
+    print(_summary(ordered))
+    ran = sum(1 for _, s, _ in ordered if s != "cached")
+    failed = sum(1 for _, s, _ in ordered if s == "failed")
+    print(f"\n{len(labs)} labs: {ran} run, {len(labs) - ran} cached, {failed} failed")
+    return 1 if failed else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main function."""
+    parser = argparse.ArgumentParser(description="Run every lab in parallel, skipping unchanged ones.")
+    parser.add_argument("roots", nargs="*", type=Path, default=[REPO_ROOT],
+                        help="directories searched for labs/<name>/lab.yaml (default: the repository)")
+    parser.add_argument("--lab", action="append", default=[], help="only this lab (repeatable)")
+    parser.add_argument("--jobs", "-j", type=int, default=max(2, os.cpu_count() or 1),
+                        help="labs run at once (they mostly wait on subprocesses)")
+    parser.add_argument("--force", action="store_true", help="run even if the inputs did not change")
+    parser.add_argument("--timeout", type=float, default=600, help="seconds per step")
+    parser.add_argument("--status", action="store_true", help="only show the recorded passports")
+    args = parser.parse_args(argv)
+
+    labs = discover(args.roots)
+    if args.lab:
+        labs = [lab for lab in labs if lab.name in args.lab]
+    if not labs:
+        print("No labs found (labs/<name>/lab.yaml).")
+        return 1
+    if args.status:
+        return status(labs)
+    return run(labs, args.jobs, args.force, args.timeout)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
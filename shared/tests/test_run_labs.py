@@ -0,0 +1,91 @@
+# tests/test_run_labs.py
+"""Testes do executor de labs com cache por hash (shared/run_labs.py)."""
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import run_labs  # noqa: E402
+
+LAB_YAML = """\
+# comentário ignorado
+name: lab99_demo
+title: "Lab de teste"
+steps:
+  - run_py_offline: "python labs/99_demo/py/app.py"
+grading:
+  - pytest: "pytest -q labs/99_demo/tests"
+  - notebook: "não é pytest"
+"""
+
+RUN_SH = """\
+#!/usr/bin/env bash
+set -e
+cd "$(dirname "$0")"
+mkdir -p outputs
+echo run >> outputs/runs.log
+"""
+
+
+@pytest.fixture
+def drop(tmp_path, monkeypatch):
+    for name in run_labs.HASHED_ENV:
+        monkeypatch.delenv(name, raising=False)
+    lab = tmp_path / "drop" / "labs" / "99_demo"
+    (lab / "tests").mkdir(parents=True)
+    (lab / "lab.yaml").write_text(LAB_YAML, encoding="utf-8")
+    (lab / "run.sh").write_text(RUN_SH, encoding="utf-8")
+    (lab / "tests" / "test_demo.py").write_text("def test_ok():\n    assert True\n", encoding="utf-8")
+    (tmp_path / "drop" / "lib.py").write_text("VALUE = 1\n", encoding="utf-8")
+    return tmp_path / "drop"
+
+
+def _runs(drop):
+    log = drop / "labs" / "99_demo" / "outputs" / "runs.log"
+    return len(log.read_text().splitlines()) if log.exists() else 0
+
+
+def test_read_lab_yaml(drop):
+    info, grading = run_labs.read_lab_yaml(drop / "labs" / "99_demo" / "lab.yaml")
+    assert info == {"name": "lab99_demo", "title": "Lab de teste"}
+    assert grading == ["pytest -q labs/99_demo/tests"]
+
+
+def test_run_caches_until_an_input_changes(drop, capsys):
+    labs = run_labs.discover([drop])
+    assert [(lab.name, lab.title, lab.drop) for lab in labs] == [("99_demo", "Lab de teste", drop.resolve())]
+
+    assert run_labs.run(labs, jobs=1, force=False, timeout=60) == 0
+    passport = json.loads(labs[0].passport.read_text(encoding="utf-8"))
+    assert passport["status"] == "passed" and passport["lab"] == "99_demo"
+    assert passport["inputs_sha256"] == run_labs.inputs_hash(labs[0], labs)
+    assert [(s["name"], s["returncode"]) for s in passport["steps"]] == [("run.sh", 0), ("pytest", 0)]
+    assert _runs(drop) == 1
+
+    # nada mudou (outputs/ e .passports/ não contam): fica no cache
+    assert run_labs.run(labs, jobs=1, force=False, timeout=60) == 0
+    assert _runs(drop) == 1
+    assert "1 labs: 0 run, 1 cached, 0 failed" in capsys.readouterr().out
+
+    # um arquivo do drop mudou: roda de novo
+    (drop / "lib.py").write_text("VALUE = 2\n", encoding="utf-8")
+    assert run_labs.run(labs, jobs=1, force=False, timeout=60) == 0
+    assert _runs(drop) == 2
+    assert "1 labs: 1 run, 0 cached, 0 failed" in capsys.readouterr().out
+
+    assert run_labs.run(labs, jobs=1, force=True, timeout=60) == 0
+    assert _runs(drop) == 3
+
+
+def test_failed_run_is_recorded_and_not_cached(drop, capsys):
+    (drop / "labs" / "99_demo" / "run.sh").write_text(RUN_SH + "echo quebrou\nexit 3\n", encoding="utf-8")
+    labs = run_labs.discover([drop])
+    assert run_labs.run(labs, jobs=1, force=False, timeout=60) == 1
+    passport = run_labs.load_passport(labs[0])
+    assert passport["status"] == "failed"
+    assert passport["steps"][0]["returncode"] == 3 and passport["steps"][0]["log_tail"] == ["quebrou"]
+    assert run_labs.run(labs, jobs=1, force=False, timeout=60) == 1
+    assert _runs(drop) == 2
+    assert "run.sh failed" in capsys.readouterr().out